@@ -9,8 +9,13 @@ https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
-application = get_asgi_application()
+# what get_asgi_application() does, with the recipe read pool handler
+django.setup(set_prefix=False)
+
+from recipe.asgi import ReadPoolASGIHandler  # noqa: E402
+
+application = ReadPoolASGIHandler()
@@ -75,17 +75,52 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.0/ref/settings/#databases
 
+# DB_POOL=1 draws connections from an in-process pool, see core.db.pool;
+# they go back to it after each request. Otherwise connections persist
+# for DB_CONN_MAX_AGE seconds. Reused connections are checked with a
+# SELECT 1 first (CONN_HEALTH_CHECKS, see core.db).
+DB_POOL = os.environ.get('DB_POOL', '0') == '1'
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.backends.postgresql' if DB_POOL
+        else 'django.db.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),  # Mention The Docker File
         'NAME': os.environ.get('DB_NAME'),  # Mention The Docker File
         'USER': os.environ.get('DB_USER'),  # Mention The Docker File
         'PASSWORD': os.environ.get('DB_PASS'),  # Mention The Docker File
-
+        'CONN_MAX_AGE': 0 if DB_POOL
+        else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': not DB_POOL,
+        'POOL': {
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'IDLE_TIMEOUT': int(os.environ.get('DB_POOL_IDLE_TIMEOUT', 300)),
+            'WAIT_TIMEOUT': int(os.environ.get('DB_POOL_WAIT_TIMEOUT', 30)),
+            },
         }
     }
 
+# Read replicas, DB_REPLICA_HOSTS is a comma separated list of hosts
+# sharing the primary's credentials. Safe requests of the recipe api read
+# from one of them, see core.db.routers, except for a user who wrote in
+# the last DB_STICKY_SECONDS. The window is held in a signed cookie and,
+# keyed by user id, in the DB_STICKY_CACHE_ALIAS cache, which covers token
+# clients that do not keep cookies. With more than one worker that cache
+# must be one they share.
+DATABASE_REPLICAS = []
+for index, host in enumerate(
+        filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))):
+    DATABASE_REPLICAS.append(f'replica_{index}')
+    DATABASES[f'replica_{index}'] = dict(
+        DATABASES['default'],
+        HOST=host.strip(),
+        TEST={'MIRROR': 'default'}
+        )
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+DB_STICKY_SECONDS = int(os.environ.get('DB_STICKY_SECONDS', 5))
+DB_STICKY_COOKIE = 'db_primary'
+DB_STICKY_CACHE_ALIAS = 'default'
+
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
 
@@ -130,3 +165,91 @@ STATIC_ROOT = '/vol/web/static'
 
 # User Auth Setting Custom
 AUTH_USER_MODEL = 'core.User'
+
+# Keyset pagination of the recipe api, clients may ask for smaller or
+# larger pages with ?page_size= up to the max
+RECIPE_API_PAGE_SIZE = 100
+RECIPE_API_MAX_PAGE_SIZE = 1000
+
+# Token auth cache used by user.authentication.CachedTokenAuthentication.
+# Without TOKEN_AUTH_CACHE_ALIAS a revoked token or deactivated user keeps
+# authenticating on other workers for up to TOKEN_AUTH_CACHE_TTL seconds.
+# With more than one worker set it to a CACHES alias they share, every
+# request then checks it and revocations apply at once.
+TOKEN_AUTH_CACHE_SIZE = 1024
+TOKEN_AUTH_CACHE_TTL = 60
+TOKEN_AUTH_CACHE_ALIAS = None
+
+# Largest batch accepted by POST /api/recipe/recipes/bulk/
+RECIPE_API_MAX_BULK_SIZE = 1000
+
+# List pages built from values() rows by recipe.rows instead of model
+# instances and serializer fields, same output
+RECIPE_API_FAST_LIST = True
+
+# Uploaded recipe images are re-encoded without metadata by recipe.images,
+# on a pool of RECIPE_IMAGE_WORKERS threads unless RECIPE_IMAGE_ASYNC is off
+RECIPE_IMAGE_ASYNC = True
+RECIPE_IMAGE_WORKERS = 2
+RECIPE_IMAGE_QUALITY = 85
+
+# Resized copies of recipe images served by /recipes/<id>/image/<name>/.
+# They are written next to the original, on first request or right after
+# upload processing when RECIPE_IMAGE_EAGER_RENDITIONS is on.
+RECIPE_IMAGE_RENDITIONS = {
+    'thumb': {'width': 160, 'format': 'webp', 'quality': 70},
+    'small': {'width': 480, 'format': 'webp', 'quality': 75},
+    'medium': {'width': 960, 'format': 'jpeg', 'quality': 80},
+    'large': {'width': 1600, 'format': 'jpeg', 'quality': 85},
+    }
+RECIPE_IMAGE_EAGER_RENDITIONS = True
+
+# Limits checked while an image upload streams in, see recipe.uploads
+RECIPE_IMAGE_MAX_BYTES = 20 * 1024 * 1024
+RECIPE_IMAGE_MAX_PIXELS = 40 * 1000 * 1000
+RECIPE_IMAGE_FORMATS = ('JPEG', 'PNG', 'WEBP')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    # rendered list responses, any backend works since keys are versioned,
+    # e.g. django.core.cache.backends.filebased.FileBasedCache to share
+    # them between workers on one host
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'recipe-responses',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+        },
+    }
+
+# Response cache of the recipe, tag and ingredient lists, see
+# recipe.caching; set the alias to None to disable it
+RECIPE_RESPONSE_CACHE_ALIAS = 'responses'
+RECIPE_RESPONSE_CACHE_TTL = 300
+
+# Delta sync at /api/recipe/sync/, see recipe.sync. Changes younger than
+# the settle window are sent but the token stays before them, so a slow
+# transaction committing an older change id is not skipped.
+RECIPE_SYNC_MAX_CHANGES = 1000
+RECIPE_SYNC_SETTLE_SECONDS = 5
+# Rows per page of a full copy, sync without a token
+RECIPE_SYNC_PAGE_SIZE = 1000
+# Changes older than this are deleted by the prune_changes command, a
+# token from before them gets 410 and the client starts a full copy
+RECIPE_SYNC_RETENTION_DAYS = 30
+
+# Text search configuration of the recipe search vectors on PostgreSQL,
+# see core.search
+RECIPE_SEARCH_CONFIG = 'english'
+
+# Recipes read per server side cursor fetch by the streaming export, each
+# chunk loads its tags and ingredients in one query per relation
+RECIPE_EXPORT_CHUNK_SIZE = 500
+
+# Threads of the ASGI read pool serving recipe, tag and ingredient reads,
+# see recipe.asgi. Each holds a database connection.
+RECIPE_ASGI_READ_THREADS = 8
+
+# /readyz also fails while migrations are pending, see core.views
+READYZ_CHECK_MIGRATIONS = True
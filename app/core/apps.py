@@ -3,3 +3,10 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        """Connect The Collection Version And Connection Check Signals"""
+        from django.core.signals import request_started
+        from core import signals  # noqa: F401
+        from core.db import check_connections
+        request_started.connect(check_connections)
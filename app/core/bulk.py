@@ -0,0 +1,57 @@
+from collections import Counter
+
+from django.db import connection
+
+from core import signals
+from core.models import Change, Ingredients, Recipe, Tag
+
+# m2m fields of Recipe written straight into their through tables
+RECIPE_RELATIONS = ('ingredients', 'tag')
+RELATED_MODELS = {'ingredients': Ingredients, 'tag': Tag}
+
+
+def insert_recipes(recipes):
+    """Insert New Recipes, Setting Their ids"""
+    if connection.features.can_return_rows_from_bulk_insert:
+        Recipe.objects.bulk_create(recipes)
+    else:
+        # backend can not hand back ids of bulk inserted rows; these saves
+        # send post_save, callers batch them with recipes_written
+        for recipe in recipes:
+            recipe.save()
+
+
+def link_recipes(recipes, links):
+    """Insert The Through Rows Of links, One Dict Per Recipe"""
+    for relation in RECIPE_RELATIONS:
+        through = getattr(Recipe, relation).through
+        rows = [
+            through(recipe_id=recipe.id, **{f'{relation}_id': pk})
+            for recipe, link in zip(recipes, links)
+            for pk in dict.fromkeys(link.get(relation, ()))
+            ]
+        through.objects.bulk_create(rows)
+        RELATED_MODELS[relation].objects.add_recipe_counts(Counter(
+            getattr(row, f'{relation}_id') for row in rows
+            ))
+
+
+def unlink_recipes(recipe_ids):
+    """Delete Every Through Row Of The Recipes"""
+    for relation in RECIPE_RELATIONS:
+        links = getattr(Recipe, relation).through.objects.filter(
+            recipe_id__in=recipe_ids
+            )
+        counts = Counter(links.values_list(f'{relation}_id', flat=True))
+        links.delete()
+        RELATED_MODELS[relation].objects.add_recipe_counts(
+            {pk: -count for pk, count in counts.items()}
+            )
+
+
+def recipes_written(user_id, recipe_ids):
+    """Do What The Signals Would Have Done For Bulk Written Recipes"""
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+    signals.written(user_id, Change.RECIPE, recipe_ids, recipe_ids)
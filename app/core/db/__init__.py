@@ -0,0 +1,43 @@
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db.migrations.executor import MigrationExecutor
+
+
+def check_connections(**kwargs):
+    """Drop Reused Connections That No Longer Answer
+
+    Runs on request_started after Django closed the obsolete ones, for
+    databases with CONN_HEALTH_CHECKS set, so a persistent connection
+    the server dropped fails here instead of in the view.
+    """
+    for connection in connections.all():
+        if not connection.settings_dict.get('CONN_HEALTH_CHECKS'):
+            continue
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        if not connection.is_usable():
+            connection.close()
+
+
+def probe(alias=DEFAULT_DB_ALIAS):
+    """Run SELECT 1 On alias, Raising OperationalError When It Fails
+
+    A failed connection is closed so the next probe reconnects.
+    """
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    except OperationalError:
+        connection.close()
+        raise
+
+
+def pending_migrations(alias=DEFAULT_DB_ALIAS):
+    """Names Of The Migrations Not Yet Applied On alias"""
+    executor = MigrationExecutor(connections[alias])
+    targets = executor.loader.graph.leaf_nodes()
+    return [
+        f'{migration.app_label}.{migration.name}'
+        for migration, _ in executor.migration_plan(targets)
+        ]
@@ -0,0 +1,235 @@
+import threading
+import time
+from collections import deque
+
+from django.db.utils import OperationalError
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(OperationalError):
+    """No Connection Came Free Within The Wait Timeout"""
+
+
+def ping(conn):
+    """Whether A DB-API Connection Still Answers"""
+    try:
+        cursor = conn.cursor()
+        try:
+            cursor.execute('SELECT 1')
+        finally:
+            cursor.close()
+    except Exception:
+        return False
+    return True
+
+
+class ConnectionPool:
+    """Thread Safe Pool Of DB-API Connections
+
+    At most max_size connections are open, idle or in use. Idle ones are
+    closed after idle_timeout seconds and pinged before reuse; callers
+    finding the pool full queue for up to wait_timeout seconds.
+    """
+
+    def __init__(self, connect, max_size=10, idle_timeout=300,
+                 wait_timeout=30, check=ping):
+        self.connect = connect
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.wait_timeout = wait_timeout
+        self.check = check
+        # (connection, returned at), most recently returned last
+        self._idle = deque()
+        self._size = 0
+        self._waiting = 0
+        # reentrant, _close counts while _expire holds it
+        self._condition = threading.Condition(threading.RLock())
+        self._counters = dict.fromkeys((
+            'created', 'closed', 'reused', 'failed_checks', 'waits',
+            'timeouts', 'max_waiting'
+            ), 0)
+        self._wait_seconds = 0.0
+
+    def acquire(self):
+        """Return A Checked Idle Connection Or A New One"""
+        while True:
+            conn = self._take()
+            if conn is None:
+                return self._create()
+            if self.check(conn):
+                self._count('reused')
+                return conn
+            self._count('failed_checks')
+            self.discard(conn)
+
+    def _take(self):
+        """Pop An Idle Connection, Or Reserve A Slot And Return None"""
+        deadline = time.monotonic() + self.wait_timeout
+        waited_from = None
+        with self._condition:
+            try:
+                while True:
+                    self._expire()
+                    if self._idle:
+                        return self._idle.pop()[0]
+                    if self._size < self.max_size:
+                        self._size += 1
+                        return None
+                    if waited_from is None:
+                        waited_from = time.monotonic()
+                        self._counters['waits'] += 1
+                        self._waiting += 1
+                        self._counters['max_waiting'] = max(
+                            self._counters['max_waiting'],
+                            self._waiting
+                            )
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._counters['timeouts'] += 1
+                        raise PoolTimeout(
+                            f'No database connection free after '
+                            f'{self.wait_timeout}s, pool size '
+                            f'{self.max_size}'
+                            )
+                    self._condition.wait(remaining)
+            finally:
+                if waited_from is not None:
+                    self._waiting -= 1
+                    self._wait_seconds += time.monotonic() - waited_from
+
+    def _expire(self):
+        """Close Connections Idle Past idle_timeout, Oldest First"""
+        limit = time.monotonic() - self.idle_timeout
+        while self._idle and self._idle[0][1] < limit:
+            self._close(self._idle.popleft()[0])
+            self._size -= 1
+
+    def _create(self):
+        try:
+            conn = self.connect()
+        except BaseException:
+            self._release_slot()
+            raise
+        self._count('created')
+        return conn
+
+    def release(self, conn, reusable=True):
+        """Hand A Connection Back, Closing It Unless reusable"""
+        if not reusable:
+            self.discard(conn)
+            return
+        with self._condition:
+            self._idle.append((conn, time.monotonic()))
+            self._condition.notify()
+
+    def discard(self, conn):
+        """Close A Connection Taken From The Pool And Free Its Slot"""
+        self._close(conn)
+        self._release_slot()
+
+    def _release_slot(self):
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._count('closed')
+
+    def _count(self, name):
+        with self._condition:
+            self._counters[name] += 1
+
+    def close_idle(self):
+        """Close Every Idle Connection"""
+        with self._condition:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._condition.notify(len(idle))
+        for conn in idle:
+            self._close(conn)
+
+    def stats(self):
+        """Sizes And Counters, For Metrics"""
+        with self._condition:
+            return dict(
+                self._counters,
+                max_size=self.max_size,
+                size=self._size,
+                idle=len(self._idle),
+                in_use=self._size - len(self._idle),
+                waiting=self._waiting,
+                wait_seconds=round(self._wait_seconds, 6),
+                )
+
+
+def get_pool(alias, options, connect):
+    """The Process Wide Pool Of A Database Alias, Created On First Use"""
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = ConnectionPool(
+                connect,
+                max_size=options.get('MAX_SIZE', 10),
+                idle_timeout=options.get('IDLE_TIMEOUT', 300),
+                wait_timeout=options.get('WAIT_TIMEOUT', 30)
+                )
+        return _pools[alias]
+
+
+def drop_pool(alias):
+    """Forget The Pool Of alias, Closing Its Idle Connections"""
+    with _pools_lock:
+        pool = _pools.pop(alias, None)
+    if pool is not None:
+        pool.close_idle()
+
+
+def all_stats():
+    """Stats Of Every Pool By Alias"""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.stats() for alias, pool in pools.items()}
+
+
+class PooledDatabaseWrapperMixin:
+    """Borrow Connections From The Alias Pool Instead Of Opening Them
+
+    Mixed into a backend DatabaseWrapper. Closing hands the connection
+    back after a rollback; one that failed, or is closed inside an
+    atomic block, is discarded. Wrappers stay per thread as usual, the
+    pool is shared by every thread of the process, so it serves WSGI
+    worker threads and the ASGI read pool alike.
+    """
+
+    @property
+    def pool(self):
+        return get_pool(
+            self.alias,
+            self.settings_dict.get('POOL', {}),
+            self._open_connection
+            )
+
+    def _open_connection(self):
+        return super().get_new_connection(self.get_connection_params())
+
+    def get_new_connection(self, conn_params):
+        return self.pool.acquire()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        reusable = not self.in_atomic_block
+        if reusable:
+            try:
+                self.connection.rollback()
+            except Exception:
+                reusable = False
+        if reusable and self.errors_occurred:
+            reusable = self.is_usable()
+        self.pool.release(self.connection, reusable)
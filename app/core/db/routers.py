@@ -0,0 +1,90 @@
+import random
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+# replica alias reads of the current request go to, None for the primary
+_local = threading.local()
+
+
+def read_alias():
+    return getattr(_local, 'alias', None)
+
+
+def route_reads(alias):
+    """Send The Reads Of This Thread To alias, None For The Primary"""
+    _local.alias = alias
+
+
+def choose_replica():
+    """A Replica Alias, Or None Without Replicas"""
+    replicas = settings.DATABASE_REPLICAS
+    return random.choice(replicas) if replicas else None
+
+
+def _sticky_key(user_id):
+    return f'db-sticky:{user_id}'
+
+
+def stick(user_id):
+    """Keep The Reads Of user_id On The Primary For A While
+
+    Held in the DB_STICKY_CACHE_ALIAS cache, a no-op when it is None;
+    see recipe.routing for the cookie that also pins the client.
+    """
+    alias = settings.DB_STICKY_CACHE_ALIAS
+    if alias and settings.DB_STICKY_SECONDS > 0:
+        caches[alias].set(
+            _sticky_key(user_id),
+            True,
+            settings.DB_STICKY_SECONDS
+            )
+
+
+def is_sticky(user_id):
+    """Whether user_id Wrote Within The Sticky Window"""
+    alias = settings.DB_STICKY_CACHE_ALIAS
+    if not alias:
+        return False
+    return caches[alias].get(_sticky_key(user_id)) is not None
+
+
+def pinned(iterable, alias):
+    """Iterate With Reads Routed To alias, For Streamed Responses"""
+    iterator = iter(iterable)
+    while True:
+        previous = read_alias()
+        route_reads(alias)
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            route_reads(previous)
+        yield item
+
+
+class ReplicaRouter:
+    """Reads To The Replica Chosen For The Request, Everything Else Primary
+
+    Reads follow the database of a related instance, so one loaded from
+    a replica fetches its relations there too. Writes always go to the
+    primary, replicas get no migrations.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,136 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.db.pool import PooledDatabaseWrapperMixin, all_stats, drop_pool
+
+ALIAS = 'bench_connections'
+
+
+class Command(BaseCommand):
+    """Compare Connection Setup Cost Per Request With And Without Reuse"""
+    help = (
+        'Simulate requests that each run one query on the default '
+        'database: with a new connection per request, with a persistent '
+        'health checked connection and with the core.db.pool pool. '
+        'Reports time per request and connections opened.'
+        )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=4,
+            help='Concurrent request threads, each with its own wrapper'
+            )
+        parser.add_argument('--pool-size', type=int, default=2)
+        parser.add_argument(
+            '--connect-latency-ms',
+            type=float,
+            default=0.0,
+            help='Added to every new connection, standing in for the TCP '
+                 'and auth round trips of a remote server'
+            )
+
+    def handle(self, *args, **options):
+        """Run Each Mode On Fresh Wrappers Of The Default Database"""
+        latency = options['connect_latency_ms'] / 1000
+        opened = []
+        connection = connections[DEFAULT_DB_ALIAS]
+
+        class Wrapper(connection.__class__):
+            def get_new_connection(self, conn_params):
+                time.sleep(latency)
+                opened.append(1)
+                return super().get_new_connection(conn_params)
+
+        class PooledWrapper(PooledDatabaseWrapperMixin, Wrapper):
+            pass
+
+        settings_dict = dict(
+            connection.settings_dict,
+            POOL={
+                'MAX_SIZE': options['pool_size'],
+                'WAIT_TIMEOUT': 60
+                }
+            )
+        modes = (
+            ('new', Wrapper, {'CONN_MAX_AGE': 0}),
+            ('persistent', Wrapper, {
+                'CONN_MAX_AGE': None,
+                'CONN_HEALTH_CHECKS': True
+                }),
+            ('pool', PooledWrapper, {'CONN_MAX_AGE': 0}),
+            )
+        for name, wrapper_class, overrides in modes:
+            opened.clear()
+            started = time.perf_counter()
+            try:
+                self.run(
+                    wrapper_class,
+                    dict(settings_dict, **overrides),
+                    options
+                    )
+                elapsed = time.perf_counter() - started
+                stats = ''
+                if wrapper_class is PooledWrapper:
+                    pool_stats = all_stats()[ALIAS]
+                    stats = (
+                        f' reused {pool_stats["reused"]}'
+                        f' waits {pool_stats["waits"]}'
+                        f' waited {pool_stats["wait_seconds"]:.3f}s'
+                        )
+            finally:
+                drop_pool(ALIAS)
+            self.stdout.write(
+                f'{name:<11}{options["requests"]:>6} requests '
+                f'{elapsed / options["requests"] * 1000:8.3f} ms/request '
+                f'{len(opened):>6} connections opened{stats}'
+                )
+
+    def run(self, wrapper_class, settings_dict, options):
+        """Split The Requests Over Threads, Each With Its Own Wrapper"""
+        per_thread, extra = divmod(options['requests'], options['threads'])
+        errors = []
+
+        def worker(count):
+            wrapper = wrapper_class(settings_dict, ALIAS)
+            try:
+                for _ in range(count):
+                    self.request(wrapper)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                if wrapper.connection is not None:
+                    wrapper.close()
+
+        threads = [
+            threading.Thread(
+                target=worker,
+                args=[per_thread + (index < extra)]
+                )
+            for index in range(options['threads'])
+            ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+    def request(self, wrapper):
+        """What A Request Does To Its Connection, Around One Query"""
+        # request_started: obsolete then unhealthy connections are dropped
+        wrapper.close_if_unusable_or_obsolete()
+        if wrapper.settings_dict.get('CONN_HEALTH_CHECKS') and \
+                wrapper.connection is not None and \
+                not wrapper.is_usable():
+            wrapper.close()
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        # request_finished
+        wrapper.close_if_unusable_or_obsolete()
@@ -0,0 +1,234 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, InvalidOperation
+from functools import partial
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core import bulk, signals
+from core.models import ImportCheckpoint, Ingredients, Recipe, Tag
+
+FORMATS = ('csv', 'ndjson')
+MAX_LENGTH = 255
+MAX_PRICE = Decimal('999999.99')
+
+
+def _names(value, separator):
+    """Distinct Stripped Names From A List Or A Separated String"""
+    if value is None or value == '':
+        return []
+    if isinstance(value, str):
+        value = value.split(separator)
+    if not isinstance(value, list):
+        raise ValueError('must be a list of names')
+    names = []
+    for name in value:
+        name = str(name).strip()
+        if len(name) > MAX_LENGTH:
+            raise ValueError(f'name longer than {MAX_LENGTH} characters')
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def parse_record(fmt, separator, raw):
+    """Validated Recipe Dict, Or An Error Message, For One Raw Record
+
+    Pure python so it can run in worker processes.
+    """
+    try:
+        data = json.loads(raw) if fmt == 'ndjson' else raw
+        if not isinstance(data, dict):
+            raise ValueError('record is not an object')
+        title = str(data.get('title') or '').strip()
+        if not title or len(title) > MAX_LENGTH:
+            raise ValueError(f'title must be 1 to {MAX_LENGTH} characters')
+        time_minute = int(data.get('time_minute'))
+        if time_minute < 0:
+            raise ValueError('time_minute must not be negative')
+        price = Decimal(str(data.get('price'))).quantize(Decimal('0.01'))
+        if not 0 <= price <= MAX_PRICE:
+            raise ValueError('price out of range')
+        link = str(data.get('link') or '').strip()
+        if len(link) > MAX_LENGTH:
+            raise ValueError(f'link longer than {MAX_LENGTH} characters')
+        return {
+            'title': title,
+            'time_minute': time_minute,
+            'price': price,
+            'link': link,
+            'tag': _names(data.get('tags'), separator),
+            'ingredients': _names(data.get('ingredients'), separator),
+            }, None
+    except (TypeError, ValueError, InvalidOperation) as exc:
+        return None, str(exc) or exc.__class__.__name__
+
+
+def read_records(path, fmt):
+    """Raw Records Of The File, Streamed"""
+    with open(path, newline='', encoding='utf-8') as source:
+        if fmt == 'csv':
+            yield from csv.DictReader(source)
+        else:
+            for line in source:
+                if line.strip():
+                    yield line
+
+
+def chunks(records, size):
+    """Lists Of Up To size Records"""
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Command(BaseCommand):
+    """Import Recipes From A CSV Or NDJSON File In Committed Chunks"""
+    help = (
+        'Stream recipes from a CSV or NDJSON file into a user account. '
+        'Each chunk commits with a checkpoint, so running the command '
+        'again after a crash continues where it stopped.'
+        )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--user', required=True, help='Owner email')
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Defaults to the file extension'
+            )
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument(
+            '--separator',
+            default='|',
+            help='Between tag and ingredient names in CSV cells'
+            )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=0,
+            help='Parse in this many processes, 0 parses inline'
+            )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore the checkpoint of an earlier run'
+            )
+
+    def handle(self, *args, **options):
+        """Parse, Write And Checkpoint One Chunk At A Time"""
+        path = options['path']
+        if not os.path.isfile(path):
+            raise CommandError(f'No such file {path}')
+        fmt = options['format'] or os.path.splitext(path)[1].lstrip('.')
+        if fmt not in FORMATS:
+            raise CommandError(f'Unknown format {fmt}, use --format')
+        if options['chunk_size'] <= 0:
+            raise CommandError('--chunk-size must be positive')
+        try:
+            user = get_user_model().object.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user {options["user"]}')
+
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(
+            user=user,
+            source=os.path.abspath(path)[-255:]
+            )
+        if options['restart']:
+            checkpoint.position = 0
+        if checkpoint.position:
+            self.stdout.write(
+                f'Resuming after record {checkpoint.position}'
+                )
+        records = islice(read_records(path, fmt), checkpoint.position, None)
+        parse = partial(parse_record, fmt, options['separator'])
+        stats = {'records': 0, 'recipes': 0, 'invalid': 0}
+        started = time.perf_counter()
+        executor = None
+        if options['workers'] > 0:
+            executor = ProcessPoolExecutor(max_workers=options['workers'])
+        try:
+            for raw, parsed in self.parsed_chunks(
+                    chunks(records, options['chunk_size']),
+                    parse,
+                    executor):
+                valid = []
+                for offset, (record, error) in enumerate(parsed):
+                    if error is None:
+                        valid.append(record)
+                        continue
+                    stats['invalid'] += 1
+                    number = checkpoint.position + offset + 1
+                    self.stderr.write(f'Record {number} skipped: {error}')
+                # one transaction, the saves insert_recipes falls back to
+                # join recipes_written
+                with signals.batched():
+                    self.write_chunk(user, valid)
+                    checkpoint.position += len(raw)
+                    checkpoint.save(update_fields=['position', 'updated_at'])
+                stats['records'] += len(raw)
+                stats['recipes'] += len(valid)
+                self.report(stats, started)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {stats["recipes"]} recipes, '
+            f'skipped {stats["invalid"]} invalid records'
+            ))
+        self.report(stats, started)
+
+    def parsed_chunks(self, raw_chunks, parse, executor):
+        """Yield (raw, parsed) Chunks, The Pool Parsing One Chunk Ahead"""
+        if executor is None:
+            for raw in raw_chunks:
+                yield raw, [parse(record) for record in raw]
+            return
+        pending = None
+        for raw in raw_chunks:
+            # submitted before the previous chunk is written
+            batch = max(1, len(raw) // (executor._max_workers * 4))
+            submitted = raw, executor.map(parse, raw, chunksize=batch)
+            if pending is not None:
+                yield pending[0], list(pending[1])
+            pending = submitted
+        if pending is not None:
+            yield pending[0], list(pending[1])
+
+    def write_chunk(self, user, records):
+        """Get Or Create Names, Bulk Insert Recipes And Their Links"""
+        named = {
+            relation: model.objects.get_or_create_many(
+                user,
+                [name for record in records for name in record[relation]]
+                )
+            for relation, model in (('tag', Tag), ('ingredients', Ingredients))
+            }
+        links = [
+            {
+                relation: [named[relation][name].id for name in names]
+                for relation in bulk.RECIPE_RELATIONS
+                for names in [record.pop(relation)]
+                }
+            for record in records
+            ]
+        recipes = [Recipe(user=user, **record) for record in records]
+        bulk.insert_recipes(recipes)
+        bulk.link_recipes(recipes, links)
+        bulk.recipes_written(user.id, [recipe.id for recipe in recipes])
+
+    def report(self, stats, started):
+        elapsed = time.perf_counter() - started
+        rate = stats['records'] / elapsed if elapsed else 0
+        self.stdout.write(
+            f'{stats["records"]} records, {stats["recipes"]} recipes '
+            f'in {elapsed:.1f}s ({rate:.0f} records/s)'
+            )
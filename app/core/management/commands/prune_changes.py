@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.models import Change
+
+
+class Command(BaseCommand):
+    """Delete Change Log Entries Past The Sync Retention"""
+    help = (
+        'Delete changes older than --days, RECIPE_SYNC_RETENTION_DAYS by '
+        'default, in batches. Sync tokens from before them are refused '
+        'afterwards and those clients start a full copy again.'
+        )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Keep this many days of changes'
+            )
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        """Prune Everything Logged Before The Cutoff"""
+        days = options['days']
+        if days is None:
+            days = settings.RECIPE_SYNC_RETENTION_DAYS
+        if days < 0 or options['batch_size'] < 1:
+            raise CommandError(
+                '--days must not be negative, --batch-size positive'
+                )
+        pruned = Change.prune(
+            timezone.now() - timedelta(days=days),
+            batch_size=options['batch_size']
+            )
+        self.stdout.write(f'Pruned {pruned} changes older than {days} days')
@@ -0,0 +1,46 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from core.models import Ingredients, Tag
+
+
+class Command(BaseCommand):
+    """Recompute recipe_count Of Tags And Ingredients From Their Links"""
+    help = (
+        'Repair the recipe_count counters of tags and ingredients after '
+        'writes that bypassed them, such as raw SQL. Rows are recounted '
+        'in id ranges of --batch-size, one transaction each, and only '
+        'rows that drifted are written.'
+        )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Owner email, default every user')
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        """Recount Each Model Batch By Batch"""
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        scope = {}
+        if options['user']:
+            try:
+                scope['user'] = get_user_model().object.get(
+                    email=options['user']
+                    )
+            except get_user_model().DoesNotExist:
+                raise CommandError(f'No user {options["user"]}')
+        for model in (Tag, Ingredients):
+            queryset = model.objects.filter(**scope)
+            last = queryset.aggregate(last=Max('id'))['last'] or 0
+            fixed = 0
+            for start in range(0, last + 1, options['batch_size']):
+                with transaction.atomic():
+                    fixed += queryset.filter(
+                        id__gte=start,
+                        id__lt=start + options['batch_size']
+                        ).recount_recipes()
+            self.stdout.write(
+                f'Fixed {fixed} {model._meta.verbose_name_plural}'
+                )
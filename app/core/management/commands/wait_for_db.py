@@ -1,19 +1,66 @@
+import random
 import time
-from django.db import connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from core.db import pending_migrations, probe
 
 
 class Command(BaseCommand):
     """Django Command to pause execution until the Database available"""
+    help = (
+        'Wait until the database answers SELECT 1, retrying with '
+        'exponential backoff and full jitter until the timeout.'
+        )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=60,
+            help='Seconds to keep retrying before failing'
+            )
+        parser.add_argument('--initial-delay', type=float, default=0.1)
+        parser.add_argument('--max-delay', type=float, default=5)
+        parser.add_argument(
+            '--check-migrations',
+            action='store_true',
+            help='Fail when the database has unapplied migrations'
+            )
+
     def handle(self, *args, **options):
         """Handle the command"""
         self.stdout.write('Waiting For DataBase')
-        db_conn = None
-        while not db_conn:
+        deadline = time.monotonic() + options['timeout']
+        attempt = 0
+        while True:
             try:
-                db_conn = connections['default']
-            except OperationalError:
-                self.stdout.write('Data Base Unavailable Waiting For 1 second')
-                time.sleep(1)
+                probe(options['database'])
+                break
+            except OperationalError as exc:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        f'Data Base Unavailable after '
+                        f'{options["timeout"]}s: {exc}'
+                        )
+                delay = min(
+                    options['max_delay'],
+                    options['initial_delay'] * 2 ** attempt
+                    )
+                # full jitter, so restarted containers do not retry in step
+                delay = min(random.uniform(0, delay), remaining)
+                attempt += 1
+                self.stdout.write(
+                    f'Data Base Unavailable Waiting For {delay:.2f} seconds'
+                    )
+                time.sleep(delay)
         self.stdout.write(self.style.SUCCESS('Data Base Available'))
+        if options['check_migrations']:
+            pending = pending_migrations(options['database'])
+            if pending:
+                raise CommandError(
+                    f'{len(pending)} unapplied migrations: '
+                    f'{", ".join(pending)}'
+                    )
+            self.stdout.write(self.style.SUCCESS('Migrations Applied'))
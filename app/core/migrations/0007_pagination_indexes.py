@@ -0,0 +1,25 @@
+# Generated by Django 3.0 on 2026-10-18 12:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_auto_20191212_1651'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredients',
+            index=models.Index(fields=['user', '-name', 'id'], name='core_ingr_user_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', '-id'], name='core_recipe_user_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', '-name', 'id'], name='core_tag_user_name_idx'),
+        ),
+    ]
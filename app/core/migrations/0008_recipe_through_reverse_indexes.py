@@ -0,0 +1,29 @@
+# Generated by Django 3.0 on 2026-10-18 12:39
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Reverse (related_id, recipe_id) indexes on the recipe m2m tables
+
+    The auto created through tables only index (recipe_id, related_id)
+    plus each column on its own. Looking up recipes by tag or ingredient
+    and the assigned_only EXISTS checks read them from the related side.
+    """
+
+    dependencies = [
+        ('core', '0007_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX core_recipe_tag_rev_idx '
+            'ON core_recipe_tag (tag_id, recipe_id);',
+            'DROP INDEX core_recipe_tag_rev_idx;',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX core_recipe_ingr_rev_idx '
+            'ON core_recipe_ingredients (ingredients_id, recipe_id);',
+            'DROP INDEX core_recipe_ingr_rev_idx;',
+        ),
+    ]
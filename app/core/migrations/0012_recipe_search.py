@@ -0,0 +1,114 @@
+# Generated by Django 3.0 on 2026-10-18 12:56
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import TextField, Value
+
+BACKFILL_CHUNK = 500
+FTS_TABLE = 'core_recipe_fts'
+
+
+def reindex(Recipe, connection, recipe_ids):
+    """Search Documents Of recipe_ids, Built As core.search Did Here
+
+    A copy rather than an import, so later changes to core.search do not
+    change what this migration writes.
+    """
+    alias = connection.alias
+    titles = dict(Recipe.objects.using(alias).filter(
+        id__in=recipe_ids
+        ).values_list('id', 'title'))
+    names = {recipe_id: [] for recipe_id in titles}
+    for relation in ('tag', 'ingredients'):
+        links = getattr(Recipe, relation).through.objects.using(
+            alias
+            ).filter(recipe_id__in=titles).values_list(
+            'recipe_id',
+            f'{relation}__name'
+            )
+        for recipe_id, name in links:
+            names[recipe_id].append(name)
+    if connection.vendor == 'postgresql':
+        config = settings.RECIPE_SEARCH_CONFIG
+        recipes = []
+        for recipe_id, title in titles.items():
+            recipe = Recipe(id=recipe_id)
+            recipe.search_vector = SearchVector(
+                Value(title, output_field=TextField()),
+                config=config,
+                weight='A'
+                ) + SearchVector(
+                Value(' '.join(names[recipe_id]), output_field=TextField()),
+                config=config,
+                weight='B'
+                )
+            recipes.append(recipe)
+        Recipe.objects.using(alias).bulk_update(recipes, ['search_vector'])
+    elif connection.vendor == 'sqlite' and titles:
+        placeholders = ', '.join(['%s'] * len(titles))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})',
+                list(titles)
+                )
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, names) '
+                'VALUES (%s, %s, %s)',
+                [
+                    (recipe_id, title, ' '.join(names[recipe_id]))
+                    for recipe_id, title in titles.items()
+                    ]
+                )
+
+
+def create_search_index(apps, schema_editor):
+    """GIN Index On PostgreSQL, An FTS5 Table On SQLite, Then Backfill"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX core_recipe_search_idx '
+            'ON core_recipe USING gin (search_vector);'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE {FTS_TABLE} '
+            "USING fts5(title, names, tokenize = 'porter unicode61');"
+        )
+    else:
+        return
+    Recipe = apps.get_model('core', 'Recipe')
+    ids = list(Recipe.objects.using(
+        schema_editor.connection.alias
+        ).order_by('id').values_list('id', flat=True))
+    for start in range(0, len(ids), BACKFILL_CHUNK):
+        reindex(
+            Recipe,
+            schema_editor.connection,
+            ids[start:start + BACKFILL_CHUNK]
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX core_recipe_search_idx;')
+    elif vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE {FTS_TABLE};')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_change_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.0 on 2026-10-18 13:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_recipe_search'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='price',
+            field=models.DecimalField(decimal_places=2, max_digits=8),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'time_minute', 'id'], name='core_recipe_user_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'price', 'id'], name='core_recipe_user_price_idx'),
+        ),
+    ]
@@ -0,0 +1,145 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import F, TextField, Value
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+CHUNK = 500
+FTS_TABLE = 'core_recipe_fts'
+RELATIONS = (('tag', 'core_tag'), ('ingredients', 'core_ingredients'))
+
+
+def chunked(items):
+    items = list(items)
+    for start in range(0, len(items), CHUNK):
+        yield items[start:start + CHUNK]
+
+
+def reindex(Recipe, connection, recipe_ids):
+    """Search Documents Of recipe_ids, Built As core.search Did Here
+
+    A copy of the one in 0012 rather than an import of core.search.
+    """
+    alias = connection.alias
+    titles = dict(Recipe.objects.using(alias).filter(
+        id__in=recipe_ids
+        ).values_list('id', 'title'))
+    names = {recipe_id: [] for recipe_id in titles}
+    for relation in ('tag', 'ingredients'):
+        links = getattr(Recipe, relation).through.objects.using(
+            alias
+            ).filter(recipe_id__in=titles).values_list(
+            'recipe_id',
+            f'{relation}__name'
+            )
+        for recipe_id, name in links:
+            names[recipe_id].append(name)
+    if connection.vendor == 'postgresql':
+        config = settings.RECIPE_SEARCH_CONFIG
+        recipes = []
+        for recipe_id, title in titles.items():
+            recipe = Recipe(id=recipe_id)
+            recipe.search_vector = SearchVector(
+                Value(title, output_field=TextField()),
+                config=config,
+                weight='A'
+                ) + SearchVector(
+                Value(' '.join(names[recipe_id]), output_field=TextField()),
+                config=config,
+                weight='B'
+                )
+            recipes.append(recipe)
+        Recipe.objects.using(alias).bulk_update(recipes, ['search_vector'])
+    elif connection.vendor == 'sqlite' and titles:
+        placeholders = ', '.join(['%s'] * len(titles))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})',
+                list(titles)
+                )
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, names) '
+                'VALUES (%s, %s, %s)',
+                [
+                    (recipe_id, title, ' '.join(names[recipe_id]))
+                    for recipe_id, title in titles.items()
+                    ]
+                )
+
+
+def merge_duplicates(apps, schema_editor):
+    """Fold Same Named Tags And Ingredients Of A User Into The Oldest"""
+    Recipe = apps.get_model('core', 'Recipe')
+    Change = apps.get_model('core', 'Change')
+    CollectionVersion = apps.get_model('core', 'CollectionVersion')
+    alias = schema_editor.connection.alias
+    touched = set()
+    for relation, _ in RELATIONS:
+        model = apps.get_model('core', relation)
+        through = getattr(Recipe, relation).through
+        column = f'{relation}_id'
+        keepers, duplicates = {}, {}
+        rows = model.objects.using(alias).annotate(key=Lower('name')).order_by(
+            'id'
+            ).values_list('id', 'user_id', 'key')
+        for pk, user_id, key in rows:
+            keeper = keepers.setdefault((user_id, key), pk)
+            if keeper != pk:
+                duplicates[pk] = (keeper, user_id)
+        changed = {}
+        for ids in chunked(duplicates):
+            links = through.objects.using(alias).filter(
+                **{f'{column}__in': ids}
+                )
+            moved = []
+            for recipe_id, other_id in links.values_list('recipe_id', column):
+                keeper, user_id = duplicates[other_id]
+                moved.append(through(recipe_id=recipe_id, **{column: keeper}))
+                changed[recipe_id] = user_id
+            through.objects.using(alias).bulk_create(
+                moved,
+                ignore_conflicts=True
+                )
+            links.delete()
+            model.objects.using(alias).filter(id__in=ids).delete()
+        touched.update(user_id for _, user_id in duplicates.values())
+        Change.objects.using(alias).bulk_create(
+            [
+                Change(user_id=user_id, kind=relation, object_id=pk,
+                       deleted=True)
+                for pk, (_, user_id) in duplicates.items()
+                ] + [
+                Change(user_id=user_id, kind='recipe', object_id=pk)
+                for pk, user_id in changed.items()
+                ],
+            batch_size=CHUNK
+            )
+        for ids in chunked(changed):
+            reindex(Recipe, schema_editor.connection, ids)
+    # cached lists and ETags still show the merged copies
+    now = timezone.now()
+    for user_id in touched:
+        versions = CollectionVersion.objects.using(alias)
+        if not versions.filter(user_id=user_id).update(
+                version=F('version') + 1,
+                modified_at=now):
+            versions.create(user_id=user_id, version=1, modified_at=now)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ] + [
+        migrations.RunSQL(
+            f'CREATE UNIQUE INDEX {table}_user_lower_name_uniq '
+            f'ON {table} (user_id, lower(name));',
+            f'DROP INDEX {table}_user_lower_name_uniq;',
+        )
+        for _, table in RELATIONS
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 3.0 on 2026-10-18 13:32
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_recipes(apps, schema_editor):
+    """Backfill recipe_count From The Existing Links"""
+    Recipe = apps.get_model('core', 'Recipe')
+    alias = schema_editor.connection.alias
+    for relation in ('tag', 'ingredients'):
+        model = apps.get_model('core', relation)
+        links = getattr(Recipe, relation).through.objects.filter(
+            **{f'{relation}_id': OuterRef('pk')}
+            ).order_by().values(f'{relation}_id').annotate(
+            count=Count('*')
+            ).values('count')
+        model.objects.using(alias).update(
+            recipe_count=Coalesce(Subquery(links), 0)
+            )
+
+
+# SQLite rebuilds a table to add or remove a column and loses indexes
+# Django does not track, the lower(name) ones of 0015: drop them before
+# the rebuild and create them again after, in either direction
+LOWER_NAME_INDEXES = [
+    (
+        f'CREATE UNIQUE INDEX IF NOT EXISTS {table}_user_lower_name_uniq '
+        f'ON {table} (user_id, lower(name));',
+        f'DROP INDEX IF EXISTS {table}_user_lower_name_uniq;',
+    )
+    for table in ('core_tag', 'core_ingredients')
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_unique_lower_names'),
+    ]
+
+    operations = [
+        migrations.RunSQL(drop, create) for create, drop in LOWER_NAME_INDEXES
+    ] + [
+        migrations.AddField(
+            model_name='ingredients',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ] + [
+        migrations.RunSQL(create, drop) for create, drop in LOWER_NAME_INDEXES
+    ] + [
+        migrations.RunPython(count_recipes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='ingredients',
+            index=models.Index(condition=models.Q(recipe_count__gt=0), fields=['user', '-name', 'id'], name='core_ingr_user_assigned_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(condition=models.Q(recipe_count__gt=0), fields=['user', '-name', 'id'], name='core_tag_user_assigned_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.0 on 2026-10-18 13:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_recipe_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeHorizon',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
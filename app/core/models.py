@@ -3,6 +3,10 @@ from django.contrib.auth.models import AbstractBaseUser
 from django.contrib.auth.models import BaseUserManager
 from django.contrib.auth.models import PermissionsMixin
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest, Lower
+from django.utils import timezone
 
 import uuid
 import os
@@ -54,6 +58,94 @@ class User(AbstractBaseUser, PermissionsMixin):
         return self.email
 
 
+def adjusted_count(delta):
+    """recipe_count Plus delta, Never Below Zero Even When It Drifted"""
+    return Greatest(F('recipe_count') + delta, 0)
+
+
+class NamedQuerySet(models.QuerySet):
+    """Tags Or Ingredients, With Their recipe_count Counters"""
+
+    def add_recipe_counts(self, counts):
+        """Add Each Delta Of counts, {pk: delta}, To recipe_count"""
+        by_delta = {}
+        for pk, delta in counts.items():
+            if delta:
+                by_delta.setdefault(delta, []).append(pk)
+        for delta, pks in by_delta.items():
+            self.filter(pk__in=pks).update(recipe_count=adjusted_count(delta))
+
+    def recount_recipes(self):
+        """Recompute recipe_count From The Links, Return The Rows Fixed"""
+        relation = self.model._meta.model_name
+        links = getattr(Recipe, relation).through.objects.filter(
+            **{f'{relation}_id': OuterRef('pk')}
+            ).order_by().values(f'{relation}_id').annotate(
+            count=Count('*')
+            ).values('count')
+        counted = Coalesce(Subquery(links), 0)
+        drifted = {}
+        for pk, user_id in self.exclude(recipe_count=counted).values_list(
+                'pk',
+                'user_id'):
+            drifted.setdefault(user_id, []).append(pk)
+        if not drifted:
+            return 0
+        fixed = self.filter(
+            pk__in=[pk for pks in drifted.values() for pk in pks]
+            ).update(recipe_count=counted)
+        # the count is part of the api output, so cached lists change
+        for user_id, pks in drifted.items():
+            CollectionVersion.bump(user_id)
+            Change.record(user_id, self.model._meta.model_name, pks)
+        return fixed
+
+
+class NamedManager(models.Manager.from_queryset(NamedQuerySet)):
+    """Manager Of Tags And Ingredients, Unique Per User By lower(name)"""
+
+    def get_or_create_many(self, user, names):
+        """Map Each Of names To The user's Object, Creating Missing Ones
+
+        Names match case insensitively, the first spelling seen is the
+        one created. Missing names go in one insert that skips rows a
+        concurrent writer got to first, then one select reads them all.
+        Bulk inserts send no signals, so changes are logged here.
+        """
+        user_id = getattr(user, 'pk', user)
+        names = list(dict.fromkeys(name for name in names if name))
+        if not names:
+            return {}
+        keys = {name.lower() for name in names} | set(names)
+        existing = self.annotate(key=Lower('name')).filter(
+            user_id=user_id,
+            key__in=keys
+            )
+        found = self._by_key(existing)
+        missing = {}
+        for name in names:
+            if name.lower() not in found:
+                missing.setdefault(name.lower(), name)
+        if missing:
+            objs = [
+                self.model(user_id=user_id, name=name)
+                for name in missing.values()
+                ]
+            self.bulk_create(objs, ignore_conflicts=True)
+            found = self._by_key(existing.all())
+            CollectionVersion.bump(user_id)
+            Change.record(
+                user_id,
+                self.model._meta.model_name,
+                [found[key].pk for key in missing]
+                )
+        return {name: found[name.lower()] for name in names}
+
+    @staticmethod
+    def _by_key(queryset):
+        return {obj.name.lower(): obj for obj in queryset}
+
+
 class Tag(models.Model):
     """Tag To Used For Recipe"""
     name = models.CharField(max_length=255)
@@ -61,6 +153,26 @@ class Tag(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
         )
+    updated_at = models.DateTimeField(auto_now=True)
+    # recipes linked, kept by core.signals and core.bulk, fixed by the
+    # recount_recipes command
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+    objects = NamedManager()
+
+    class Meta:
+        indexes = [
+            # backs the (-name, id) keyset pagination of the api
+            models.Index(
+                fields=['user', '-name', 'id'],
+                name='core_tag_user_name_idx'
+                ),
+            # the same pages with assigned_only
+            models.Index(
+                fields=['user', '-name', 'id'],
+                name='core_tag_user_assigned_idx',
+                condition=Q(recipe_count__gt=0)
+                ),
+            ]
 
     def __str__(self):
         return self.name
@@ -73,6 +185,26 @@ class Ingredients(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
         )
+    updated_at = models.DateTimeField(auto_now=True)
+    # recipes linked, kept by core.signals and core.bulk, fixed by the
+    # recount_recipes command
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+    objects = NamedManager()
+
+    class Meta:
+        indexes = [
+            # backs the (-name, id) keyset pagination of the api
+            models.Index(
+                fields=['user', '-name', 'id'],
+                name='core_ingr_user_name_idx'
+                ),
+            # the same pages with assigned_only
+            models.Index(
+                fields=['user', '-name', 'id'],
+                name='core_ingr_user_assigned_idx',
+                condition=Q(recipe_count__gt=0)
+                ),
+            ]
 
     def __str__(self):
         return self.name
@@ -80,17 +212,192 @@ class Ingredients(models.Model):
 
 class Recipe(models.Model):
     """Recipe Model"""
+    # lifecycle of an uploaded image, see recipe.images
+    IMAGE_PENDING = 'pending'
+    IMAGE_READY = 'ready'
+    IMAGE_FAILED = 'failed'
+    IMAGE_STATUS_CHOICES = (
+        (IMAGE_PENDING, 'Pending'),
+        (IMAGE_READY, 'Ready'),
+        (IMAGE_FAILED, 'Failed'),
+        )
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
         )
     title = models.CharField(max_length=255)
     time_minute = models.IntegerField()
-    price = models.FloatField()
+    price = models.DecimalField(max_digits=8, decimal_places=2)
     link = models.CharField(max_length=255, blank=True)
     ingredients = models.ManyToManyField('Ingredients')
     tag = models.ManyToManyField('Tag')
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image_status = models.CharField(
+        max_length=10,
+        choices=IMAGE_STATUS_CHOICES,
+        blank=True
+        )
+    updated_at = models.DateTimeField(auto_now=True)
+    # title and tag / ingredient names, kept current by core.search; the
+    # GIN index is created by migration 0012 on PostgreSQL only
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # backs the (-id) keyset pagination of the api
+            models.Index(
+                fields=['user', '-id'],
+                name='core_recipe_user_id_idx'
+                ),
+            # sorted and range filtered lists, id keeps the keyset exact
+            models.Index(
+                fields=['user', 'time_minute', 'id'],
+                name='core_recipe_user_time_idx'
+                ),
+            models.Index(
+                fields=['user', 'price', 'id'],
+                name='core_recipe_user_price_idx'
+                ),
+            ]
 
     def __str__(self):
         return self.title
+
+
+class CollectionVersion(models.Model):
+    """Counter Bumped On Every Write To A User's Recipes, Tags Or Ingredients
+
+    Lets read endpoints answer conditional requests with one primary key
+    lookup instead of running the query they would otherwise serve.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True
+        )
+    version = models.PositiveIntegerField(default=0)
+    modified_at = models.DateTimeField(default=timezone.now)
+
+    @classmethod
+    def bump(cls, user_id, create=True):
+        """Record A Change To The Collection Of user_id"""
+        now = timezone.now()
+        updated = cls.objects.filter(user_id=user_id).update(
+            version=F('version') + 1,
+            modified_at=now
+            )
+        if not updated and create:
+            cls.objects.get_or_create(
+                user_id=user_id,
+                defaults={'version': 1, 'modified_at': now}
+                )
+
+    @classmethod
+    def current(cls, user_id):
+        """Return (version, modified_at), (0, None) Before Any Write"""
+        row = cls.objects.filter(user_id=user_id).values_list(
+            'version',
+            'modified_at'
+            ).first()
+        return row or (0, None)
+
+
+class Change(models.Model):
+    """Append Only Log Of Writes To Recipes, Tags And Ingredients
+
+    The id doubles as the delta sync position. user_id is a plain column
+    rather than a foreign key so deletes cascading from a user can still
+    write their tombstones.
+    """
+    RECIPE = 'recipe'
+    TAG = 'tag'
+    INGREDIENTS = 'ingredients'
+    KIND_CHOICES = (
+        (RECIPE, 'Recipe'),
+        (TAG, 'Tag'),
+        (INGREDIENTS, 'Ingredients'),
+        )
+    user_id = models.IntegerField()
+    kind = models.CharField(max_length=12, choices=KIND_CHOICES)
+    object_id = models.IntegerField()
+    deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user_id', 'id'],
+                name='core_change_user_id_idx'
+                ),
+            ]
+
+    @classmethod
+    def record(cls, user_id, kind, object_ids, deleted=False):
+        """Log A Write To Each Of object_ids"""
+        cls.objects.bulk_create(
+            cls(user_id=user_id, kind=kind, object_id=object_id,
+                deleted=deleted)
+            for object_id in object_ids
+            )
+
+    @classmethod
+    def prune(cls, before, batch_size=10000):
+        """Delete Changes Logged Before before, Return How Many
+
+        The horizon moves first, so sync tokens from the pruned part are
+        refused before any of their changes is gone.
+        """
+        last = cls.objects.filter(created_at__lt=before).order_by(
+            '-id'
+            ).values_list('id', flat=True).first()
+        if last is None:
+            return 0
+        ChangeHorizon.advance(last)
+        pruned = 0
+        while True:
+            ids = list(cls.objects.filter(id__lte=last).order_by(
+                'id'
+                ).values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return pruned
+            pruned += cls.objects.filter(id__in=ids).delete()[0]
+
+
+class ChangeHorizon(models.Model):
+    """Highest Change id Pruned From The Log, One Row At Most
+
+    A sync token before it may have missed pruned changes.
+    """
+    position = models.IntegerField(default=0)
+
+    @classmethod
+    def advance(cls, position):
+        """Move The Horizon Up To position, Never Down"""
+        if not cls.objects.filter(position__lt=position).update(
+                position=position):
+            if not cls.objects.exists():
+                cls.objects.create(position=position)
+
+    @classmethod
+    def current(cls):
+        return cls.objects.values_list(
+            'position',
+            flat=True
+            ).order_by('-position').first() or 0
+
+
+class ImportCheckpoint(models.Model):
+    """Records Of An Import Source Already Committed For A User"""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+        )
+    source = models.CharField(max_length=255)
+    position = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'source')
+
+    def __str__(self):
+        return f'{self.source} @ {self.position}'
@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import connection
+from django.db.models import TextField, Value
+
+from core.models import Recipe
+
+# FTS5 table standing in for Recipe.search_vector on SQLite, one row per
+# recipe keyed by rowid = recipe id
+FTS_TABLE = 'core_recipe_fts'
+
+
+def documents(recipe_ids):
+    """Map recipe id To (title, tag and ingredient names)"""
+    titles = dict(Recipe.objects.filter(
+        id__in=recipe_ids
+        ).values_list('id', 'title'))
+    names = {recipe_id: [] for recipe_id in titles}
+    for relation in ('tag', 'ingredients'):
+        links = getattr(Recipe, relation).through.objects.filter(
+            recipe_id__in=titles
+            ).values_list('recipe_id', f'{relation}__name')
+        for recipe_id, name in links:
+            names[recipe_id].append(name)
+    return {
+        recipe_id: (title, ' '.join(names[recipe_id]))
+        for recipe_id, title in titles.items()
+        }
+
+
+def refresh(recipe_ids):
+    """Recompute The Search Vector Of Each Recipe In recipe_ids
+
+    Titles weigh more than tag and ingredient names.
+    """
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+    docs = documents(recipe_ids)
+    if connection.vendor == 'postgresql':
+        config = settings.RECIPE_SEARCH_CONFIG
+        recipes = []
+        for recipe_id, (title, names) in docs.items():
+            recipe = Recipe(id=recipe_id)
+            recipe.search_vector = SearchVector(
+                Value(title, output_field=TextField()),
+                config=config,
+                weight='A'
+                ) + SearchVector(
+                Value(names, output_field=TextField()),
+                config=config,
+                weight='B'
+                )
+            recipes.append(recipe)
+        Recipe.objects.bulk_update(recipes, ['search_vector'])
+    elif connection.vendor == 'sqlite':
+        remove(recipe_ids)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, names) '
+                'VALUES (%s, %s, %s)',
+                [(pk, title, names) for pk, (title, names) in docs.items()]
+                )
+
+
+def remove(recipe_ids):
+    """Drop Deleted Recipes From The SQLite Index"""
+    # on PostgreSQL the vector is a column and goes with its row
+    if connection.vendor != 'sqlite' or not recipe_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(recipe_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})',
+            list(recipe_ids)
+            )
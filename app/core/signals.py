@@ -0,0 +1,194 @@
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from threading import local
+
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete
+    )
+from django.dispatch import receiver
+
+from core import search
+from core.models import (
+    Change,
+    CollectionVersion,
+    Ingredients,
+    Recipe,
+    Tag,
+    adjusted_count
+    )
+
+
+# writes collected by batched(), None outside of it
+_pending = local()
+
+
+def change_kind(model):
+    """Change.kind Of A Tracked Model"""
+    return model._meta.model_name
+
+
+@contextmanager
+def batched():
+    """Apply The Writes Of A Block With One Bump, Change And Reindex
+
+    Saves and links inside the block are collected per user and kind and
+    written once on exit, in the same transaction. Nested blocks join the
+    outermost one.
+    """
+    if getattr(_pending, 'writes', None) is not None:
+        yield
+        return
+    _pending.writes = defaultdict(lambda: defaultdict(dict))
+    _pending.refresh = {}
+    try:
+        with transaction.atomic():
+            yield
+            writes, refresh = _pending.writes, _pending.refresh
+            _pending.writes = _pending.refresh = None
+            for user_id, kinds in writes.items():
+                CollectionVersion.bump(user_id)
+                for kind, object_ids in kinds.items():
+                    Change.record(user_id, kind, object_ids)
+            search.refresh(refresh)
+    finally:
+        _pending.writes = _pending.refresh = None
+
+
+def written(user_id, kind, object_ids, refresh_ids=()):
+    """Bump, Log And Reindex A Write, Deferred Inside batched()"""
+    writes = getattr(_pending, 'writes', None)
+    if writes is None:
+        CollectionVersion.bump(user_id)
+        Change.record(user_id, kind, object_ids)
+        search.refresh(refresh_ids)
+        return
+    # dicts keep the first-seen order and drop repeats
+    writes[user_id][kind].update(dict.fromkeys(object_ids))
+    _pending.refresh.update(dict.fromkeys(refresh_ids))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredients)
+def bump_on_save(sender, instance, **kwargs):
+    """Any Saved Row Changes Its Owner's Collection"""
+    refresh_ids = []
+    if sender is Recipe:
+        refresh_ids = [instance.pk]
+    elif not kwargs.get('created'):
+        # a renamed tag or ingredient changes the recipes it is linked to
+        through = getattr(Recipe, change_kind(sender)).through
+        refresh_ids = list(through.objects.filter(
+            **{f'{change_kind(sender)}_id': instance.pk}
+            ).values_list('recipe_id', flat=True))
+    written(
+        instance.user_id,
+        change_kind(sender),
+        [instance.pk],
+        refresh_ids
+        )
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredients)
+def track_unlinked_recipes(sender, instance, **kwargs):
+    """Recipes Lose The Link When A Tag Or Ingredient Is Deleted"""
+    # the cascade removes through rows without any m2m_changed signal
+    through = getattr(Recipe, change_kind(sender)).through
+    instance._unlinked_recipe_ids = list(through.objects.filter(
+        **{f'{change_kind(sender)}_id': instance.pk}
+        ).values_list('recipe_id', flat=True))
+    Change.record(
+        instance.user_id,
+        Change.RECIPE,
+        instance._unlinked_recipe_ids
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredients)
+def bump_on_delete(sender, instance, **kwargs):
+    """Deleted Rows Change The Collection Too"""
+    # never create: when the user itself is being deleted the version
+    # row goes away in the same cascade
+    CollectionVersion.bump(instance.user_id, create=False)
+    # tombstone, also written for rows removed by a cascade
+    Change.record(
+        instance.user_id,
+        change_kind(sender),
+        [instance.pk],
+        deleted=True
+        )
+    if sender is Recipe:
+        search.remove([instance.pk])
+    else:
+        # the links are gone now, reindex without the deleted name
+        search.refresh(instance.__dict__.pop('_unlinked_recipe_ids', []))
+
+
+@receiver(m2m_changed, sender=Recipe.tag.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def bump_on_link(sender, instance, action, reverse, pk_set, **kwargs):
+    """Linking Or Unlinking Tags And Ingredients Changes The Collection"""
+    if reverse and action == 'pre_clear':
+        # the cleared recipes are unknown once the rows are gone
+        field = change_kind(type(instance))
+        instance._cleared_recipe_ids = list(sender.objects.filter(
+            **{f'{field}_id': instance.pk}
+            ).values_list('recipe_id', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        recipe_ids = [instance.pk]
+    elif action == 'post_clear':
+        recipe_ids = instance.__dict__.pop('_cleared_recipe_ids', [])
+    else:
+        recipe_ids = pk_set
+    written(instance.user_id, Change.RECIPE, recipe_ids, recipe_ids)
+
+
+@receiver(m2m_changed, sender=Recipe.tag.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def count_links(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """Keep recipe_count Of Tags And Ingredients In Step With The Links"""
+    named = type(instance) if reverse else model
+    field = f'{change_kind(named)}_id'
+    if action in ('pre_remove', 'pre_clear'):
+        # only links that exist are counted down, remove takes any id
+        links = sender.objects.filter(
+            **{field if reverse else 'recipe_id': instance.pk}
+            )
+        if action == 'pre_remove':
+            links = links.filter(
+                **{'recipe_id__in' if reverse else f'{field}__in': pk_set}
+                )
+        instance._unlinked_named_ids = list(
+            links.values_list(field, flat=True)
+            )
+    elif action == 'post_add':
+        # pk_set holds only the links that were missing
+        named_ids = [instance.pk] * len(pk_set) if reverse else pk_set
+        named.objects.add_recipe_counts(Counter(named_ids))
+    elif action in ('post_remove', 'post_clear'):
+        named_ids = instance.__dict__.pop('_unlinked_named_ids', [])
+        named.objects.add_recipe_counts(
+            {pk: -count for pk, count in Counter(named_ids).items()}
+            )
+
+
+@receiver(pre_delete, sender=Recipe)
+def uncount_deleted_recipe(sender, instance, **kwargs):
+    """A Deleted Recipe No Longer Counts For Its Tags And Ingredients"""
+    # the cascade removes through rows without any m2m_changed signal
+    for named in (Tag, Ingredients):
+        through = getattr(Recipe, change_kind(named)).through
+        named.objects.filter(
+            pk__in=through.objects.filter(recipe_id=instance.pk).values(
+                f'{change_kind(named)}_id'
+                )
+            ).update(recipe_count=adjusted_count(-1))
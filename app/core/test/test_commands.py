@@ -1,7 +1,16 @@
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
 from django.test import TestCase
+from core import bulk
+from core.models import ImportCheckpoint, Ingredients, Recipe, Tag
 
 
 class CommandsTestCase(TestCase):
@@ -9,16 +18,265 @@ class CommandsTestCase(TestCase):
 
     def test_wait_for_db_ready(self):
         """Test Waiting For Db When Db Is Available"""
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.return_value = True
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 1)
+        with patch('core.management.commands.wait_for_db.probe') as probe:
+            call_command('wait_for_db', stdout=StringIO())
+            self.assertEqual(probe.call_count, 1)
+
+    def test_wait_for_db_runs_query(self):
+        """Test The Probe Really Queries The Database"""
+        with self.assertNumQueries(1):
+            call_command('wait_for_db', stdout=StringIO())
 
     @patch('time.sleep', return_value=True)
     def test_wait_for(self, ts):
         """Test Waiting For Db"""
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.side_effect = [OperationalError] * 5 + [True]
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 6)
+        with patch('core.management.commands.wait_for_db.probe') as probe:
+            probe.side_effect = [OperationalError] * 5 + [None]
+            call_command(
+                'wait_for_db',
+                initial_delay=1,
+                max_delay=4,
+                stdout=StringIO()
+                )
+            self.assertEqual(probe.call_count, 6)
+        delays = [call[0][0] for call in ts.call_args_list]
+        self.assertEqual(len(delays), 5)
+        # jittered below the doubling, capped at max_delay
+        for attempt, delay in enumerate(delays):
+            self.assertLessEqual(delay, min(4, 2 ** attempt))
+            self.assertGreaterEqual(delay, 0)
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_deadline(self, ts):
+        """Test Giving Up Once The Timeout Passes"""
+        with patch('core.management.commands.wait_for_db.probe') as probe:
+            probe.side_effect = OperationalError('refused')
+            with self.assertRaises(CommandError):
+                call_command('wait_for_db', timeout=0, stdout=StringIO())
+        ts.assert_not_called()
+
+    def test_wait_for_db_pending_migrations(self):
+        """Test The Migration Check Fails While Migrations Are Pending"""
+        call_command('wait_for_db', check_migrations=True, stdout=StringIO())
+        with patch(
+                'core.management.commands.wait_for_db.pending_migrations',
+                return_value=['core.9999_next']):
+            with self.assertRaises(CommandError):
+                call_command(
+                    'wait_for_db',
+                    check_migrations=True,
+                    stdout=StringIO()
+                    )
+
+
+class ImportRecipesCommandTest(TestCase):
+    """Test The import_recipes Command"""
+
+    def setUp(self):
+        self.user = get_user_model().object.create_user(
+            email='test@gmail.com',
+            password='test_pass@123'
+            )
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as target:
+            target.write(content)
+        return path
+
+    def write_ndjson(self, count, name='recipes.ndjson'):
+        return self.write(name, ''.join(
+            json.dumps({
+                'title': f'recipe {index}',
+                'time_minute': index,
+                'price': '2.50',
+                'tags': ['Vegan', f'tag {index % 3}'],
+                'ingredients': ['Salt'],
+                }) + '\n'
+            for index in range(count)
+            ))
+
+    def run_import(self, path, **options):
+        out = StringIO()
+        call_command(
+            'import_recipes',
+            path,
+            user=self.user.email,
+            stdout=out,
+            stderr=StringIO(),
+            **options
+            )
+        return out.getvalue()
+
+    def test_import_csv(self):
+        """Test Recipes, Names And Links Are Created From A CSV File"""
+        Tag.objects.create(user=self.user, name='Vegan')
+        path = self.write(
+            'recipes.csv',
+            'title,time_minute,price,link,tags,ingredients\n'
+            'Curry,30,7.25,,Vegan|Dinner,Rice|Salt\n'
+            'Soup,15,3,http://soup.test,Dinner,Salt\n'
+            )
+        out = self.run_import(path, chunk_size=1)
+        self.assertIn('Imported 2 recipes', out)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        curry = Recipe.objects.get(title='Curry')
+        self.assertEqual(curry.price, Decimal('7.25'))
+        self.assertEqual(
+            sorted(curry.tag.values_list('name', flat=True)),
+            ['Dinner', 'Vegan']
+            )
+        self.assertEqual(
+            sorted(curry.ingredients.values_list('name', flat=True)),
+            ['Rice', 'Salt']
+            )
+        soup = Recipe.objects.get(title='Soup')
+        self.assertEqual(soup.link, 'http://soup.test')
+        self.assertEqual(
+            Ingredients.objects.get(user=self.user, name='Salt').recipe_count,
+            2
+            )
+
+    def test_import_ndjson_in_chunks(self):
+        """Test An NDJSON File Is Imported Chunk By Chunk"""
+        path = self.write_ndjson(7)
+        out = self.run_import(path, chunk_size=3)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 7)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 4)
+        self.assertIn('records/s', out)
+        checkpoint = ImportCheckpoint.objects.get(user=self.user)
+        self.assertEqual(checkpoint.position, 7)
+        recipe = Recipe.objects.get(title='recipe 4')
+        self.assertEqual(
+            sorted(recipe.tag.values_list('name', flat=True)),
+            ['Vegan', 'tag 1']
+            )
+
+    def test_invalid_records_are_skipped(self):
+        """Test Invalid Records Are Reported And Not Imported"""
+        path = self.write(
+            'recipes.ndjson',
+            '{"title": "Good", "time_minute": 5, "price": "1"}\n'
+            '{"title": "", "time_minute": 5, "price": "1"}\n'
+            '{"title": "Bad time", "time_minute": -1, "price": "1"}\n'
+            'not json\n'
+            )
+        out = self.run_import(path)
+        self.assertIn('skipped 3 invalid records', out)
+        self.assertEqual(
+            list(Recipe.objects.values_list('title', flat=True)),
+            ['Good']
+            )
+
+    def test_resume_after_crash(self):
+        """Test A Rerun Continues After The Last Committed Chunk"""
+        path = self.write_ndjson(6)
+        link_recipes = bulk.link_recipes
+        calls = []
+
+        def crash_on_second_chunk(recipes, links):
+            calls.append(recipes)
+            if len(calls) == 2:
+                raise RuntimeError('crash')
+            link_recipes(recipes, links)
+
+        with patch('core.bulk.link_recipes', crash_on_second_chunk):
+            with self.assertRaises(RuntimeError):
+                self.run_import(path, chunk_size=2)
+        self.assertEqual(Recipe.objects.count(), 2)
+        self.assertEqual(ImportCheckpoint.objects.get().position, 2)
+
+        out = self.run_import(path, chunk_size=2)
+        self.assertIn('Resuming after record 2', out)
+        self.assertEqual(
+            sorted(Recipe.objects.values_list('time_minute', flat=True)),
+            list(range(6))
+            )
+        self.assertEqual(Recipe.tag.through.objects.count(), 12)
+
+    def test_restart_imports_again(self):
+        """Test --restart Ignores The Checkpoint"""
+        path = self.write_ndjson(2)
+        self.run_import(path)
+        self.run_import(path)
+        self.assertEqual(Recipe.objects.count(), 2)
+        self.run_import(path, restart=True)
+        self.assertEqual(Recipe.objects.count(), 4)
+
+    def test_import_with_workers(self):
+        """Test Parsing In A Process Pool Imports Every Record In Order"""
+        path = self.write_ndjson(25)
+        self.run_import(path, chunk_size=4, workers=2)
+        self.assertEqual(
+            list(Recipe.objects.order_by('id').values_list(
+                'time_minute',
+                flat=True
+                )),
+            list(range(25))
+            )
+
+    def test_unknown_user(self):
+        """Test Importing For A Missing User Fails"""
+        path = self.write_ndjson(1)
+        with self.assertRaises(CommandError):
+            call_command('import_recipes', path, user='nobody@gmail.com')
+
+
+class RecountRecipesCommandTest(TestCase):
+    """Test The recount_recipes Command"""
+
+    def setUp(self):
+        self.user = get_user_model().object.create_user(
+            email='test@gmail.com',
+            password='test_pass@123'
+            )
+        self.tags = [
+            Tag.objects.create(user=self.user, name=f'tag {index}')
+            for index in range(5)
+            ]
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Curry',
+            time_minute=30,
+            price=5
+            )
+        recipe.tag.add(*self.tags[:3])
+
+    def test_repairs_drifted_counters(self):
+        """Test Counters Are Recomputed Across Batches"""
+        Tag.objects.update(recipe_count=4)
+        out = StringIO()
+        call_command('recount_recipes', batch_size=2, stdout=out)
+        self.assertIn('Fixed 5 tags', out.getvalue())
+        self.assertIn('Fixed 0 ingredients', out.getvalue())
+        self.assertEqual(
+            [tag.recipe_count for tag in Tag.objects.order_by('id')],
+            [1, 1, 1, 0, 0]
+            )
+
+    def test_limited_to_user(self):
+        """Test --user Leaves Other Users Alone"""
+        other = get_user_model().object.create_user(
+            email='other@gmail.com',
+            password='test_pass@123'
+            )
+        drifted = Tag.objects.create(user=other, name='Vegan')
+        Tag.objects.update(recipe_count=4)
+        call_command(
+            'recount_recipes',
+            user=self.user.email,
+            stdout=StringIO()
+            )
+        drifted.refresh_from_db()
+        self.assertEqual(drifted.recipe_count, 4)
+        self.assertEqual(
+            Tag.objects.filter(user=self.user, recipe_count=4).count(),
+            0
+            )
 
+    def test_unknown_user(self):
+        """Test Recounting For A Missing User Fails"""
+        with self.assertRaises(CommandError):
+            call_command('recount_recipes', user='nobody@gmail.com')
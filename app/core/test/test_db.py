@@ -0,0 +1,184 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
+from django.db import connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, TestCase
+from core.db import check_connections
+from core.db.pool import (
+    ConnectionPool,
+    PooledDatabaseWrapperMixin,
+    PoolTimeout,
+    all_stats,
+    drop_pool
+    )
+
+
+def sqlite_pool(**options):
+    """Pool Of In Memory SQLite Connections Usable From Any Thread"""
+    return ConnectionPool(
+        lambda: sqlite3.connect(':memory:', check_same_thread=False),
+        **options
+        )
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test The Connection Pool"""
+
+    def test_released_connection_is_reused(self):
+        """A Returned Connection Is Handed Out Again After A Ping"""
+        pool = sqlite_pool()
+        conn = pool.acquire()
+        pool.release(conn)
+        self.assertIs(pool.acquire(), conn)
+        stats = pool.stats()
+        self.assertEqual((stats['created'], stats['reused']), (1, 1))
+        self.assertEqual((stats['size'], stats['in_use']), (1, 1))
+
+    def test_broken_connection_is_replaced(self):
+        """A Connection Failing Its Check Is Closed, Not Reused"""
+        pool = sqlite_pool()
+        conn = pool.acquire()
+        conn.close()
+        pool.release(conn)
+        self.assertIsNot(pool.acquire(), conn)
+        stats = pool.stats()
+        self.assertEqual(stats['failed_checks'], 1)
+        self.assertEqual(stats['size'], 1)
+
+    def test_idle_connections_expire(self):
+        """Connections Idle Past The Timeout Are Closed"""
+        pool = sqlite_pool(idle_timeout=0)
+        conn = pool.acquire()
+        pool.release(conn)
+        time.sleep(0.01)
+        self.assertIsNot(pool.acquire(), conn)
+        self.assertEqual(pool.stats()['closed'], 1)
+
+    def test_full_pool_times_out(self):
+        """A Caller Waiting Past wait_timeout Gets PoolTimeout"""
+        pool = sqlite_pool(max_size=1, wait_timeout=0.05)
+        pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        stats = pool.stats()
+        self.assertEqual((stats['waits'], stats['timeouts']), (1, 1))
+        self.assertEqual(stats['waiting'], 0)
+
+    def test_threads_share_bounded_pool(self):
+        """Threads Queue For The Slots, Never Exceeding max_size"""
+        pool = sqlite_pool(max_size=2)
+        in_use = []
+        peak = []
+        lock = threading.Lock()
+
+        def work():
+            for _ in range(20):
+                conn = pool.acquire()
+                with lock:
+                    in_use.append(conn)
+                    peak.append(len(in_use))
+                conn.execute('SELECT 1')
+                with lock:
+                    in_use.remove(conn)
+                pool.release(conn)
+
+        threads = [threading.Thread(target=work) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = pool.stats()
+        self.assertLessEqual(max(peak), 2)
+        self.assertEqual(stats['created'] + stats['reused'], 120)
+        self.assertLessEqual(stats['created'], 2)
+        self.assertEqual((stats['in_use'], stats['waiting']), (0, 0))
+
+
+class PooledWrapper(PooledDatabaseWrapperMixin, DatabaseWrapper):
+    """SQLite Backend On The Pool, For The Mixin Tests"""
+
+
+class PooledDatabaseWrapperTests(SimpleTestCase):
+    """Test A Backend Drawing Connections From The Pool"""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+        self.addCleanup(drop_pool, 'pooled_test')
+        self.settings_dict = dict(
+            connections['default'].settings_dict,
+            NAME=self.path,
+            CONN_MAX_AGE=0,
+            POOL={'MAX_SIZE': 2}
+            )
+
+    def test_close_returns_connection(self):
+        """Closing The Wrapper Hands Its Connection Back For Reuse"""
+        first = PooledWrapper(self.settings_dict, 'pooled_test')
+        first.ensure_connection()
+        raw = first.connection
+        first.close()
+        second = PooledWrapper(self.settings_dict, 'pooled_test')
+        with second.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        self.assertIs(second.connection, raw)
+        second.close()
+        stats = all_stats()['pooled_test']
+        self.assertEqual((stats['created'], stats['idle']), (1, 1))
+
+    def test_closed_in_transaction_is_discarded(self):
+        """A Connection Closed Inside An Atomic Block Is Not Reused"""
+        wrapper = PooledWrapper(self.settings_dict, 'pooled_test')
+        wrapper.ensure_connection()
+        wrapper.in_atomic_block = True
+        wrapper.close()
+        stats = all_stats()['pooled_test']
+        self.assertEqual((stats['size'], stats['closed']), (0, 1))
+
+
+class ConnectionHealthCheckTests(TestCase):
+    """Test Reused Connections Are Checked On Request Start"""
+
+    def test_unusable_connection_closed(self):
+        """A Connection Failing is_usable Is Closed Before The Request"""
+        handle, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        wrapper = DatabaseWrapper(
+            dict(
+                connections['default'].settings_dict,
+                NAME=path,
+                CONN_HEALTH_CHECKS=True
+                ),
+            'checked'
+            )
+        wrapper.ensure_connection()
+        with patch.object(connections, 'all', return_value=[wrapper]):
+            check_connections()
+            self.assertIsNotNone(wrapper.connection)
+            with patch.object(wrapper, 'is_usable', return_value=False):
+                check_connections()
+        self.assertIsNone(wrapper.connection)
+
+
+class BenchDbConnectionsTest(SimpleTestCase):
+    """Test The Connection Setup Benchmark Command"""
+
+    def test_reports_each_mode(self):
+        """Each Mode Reports Its Connections And The Pool Its Reuse"""
+        out = StringIO()
+        call_command('bench_db_connections', requests=8, threads=2,
+                     stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(
+            [line.split()[0] for line in lines],
+            ['new', 'persistent', 'pool']
+            )
+        self.assertIn('reused', lines[2])
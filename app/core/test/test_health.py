@@ -0,0 +1,54 @@
+from unittest.mock import patch
+from django.db.utils import OperationalError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from core import views
+
+HEALTHZ_URL = reverse('healthz')
+READYZ_URL = reverse('readyz')
+
+
+class HealthEndpointsTests(TestCase):
+    """Test The Liveness And Readiness Endpoints"""
+
+    def setUp(self):
+        views._migrated = False
+
+    def test_healthz(self):
+        """Liveness Answers Without A Query"""
+        with self.assertNumQueries(0):
+            res = self.client.get(HEALTHZ_URL)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), {'status': 'ok'})
+
+    def test_readyz(self):
+        """Readiness Queries The Database, Migrations Checked Once"""
+        res = self.client.get(READYZ_URL)
+        self.assertEqual(res.status_code, 200)
+        with self.assertNumQueries(1):
+            res = self.client.get(READYZ_URL)
+        self.assertEqual(res.status_code, 200)
+
+    def test_readyz_database_down(self):
+        """Readiness Fails When The Database Does Not Answer"""
+        with patch('core.views.probe', side_effect=OperationalError):
+            res = self.client.get(READYZ_URL)
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res.json()['reason'], 'database')
+
+    def test_readyz_pending_migrations(self):
+        """Readiness Fails While Migrations Are Pending"""
+        with patch(
+                'core.views.pending_migrations',
+                return_value=['core.9999_next']):
+            res = self.client.get(READYZ_URL)
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res.json()['pending'], ['core.9999_next'])
+
+    @override_settings(READYZ_CHECK_MIGRATIONS=False)
+    def test_readyz_without_migration_check(self):
+        """The Migration Check Can Be Turned Off"""
+        with patch('core.views.pending_migrations') as pending:
+            res = self.client.get(READYZ_URL)
+        self.assertEqual(res.status_code, 200)
+        pending.assert_not_called()
@@ -1,6 +1,10 @@
+from importlib import import_module
+from types import SimpleNamespace
+from django.apps import apps
+from django.db import IntegrityError, connection, transaction
 from django.test import TestCase
 from django.contrib.auth import get_user_model
-from core import models
+from core import bulk, models
 from unittest.mock import patch
 
 
@@ -84,3 +88,279 @@ class ModelTests(TestCase):
     
         exp_path = f'uploads/recipe/{uuid}.jpg'
         self.assertEqual(file_path, exp_path)
+
+    def test_collection_version_bumped_on_write(self):
+        """Saving Or Deleting A Tag Bumps Its Owner's Version"""
+        user = create_sample_user()
+        tag = models.Tag.objects.create(user=user, name='Vegan')
+        version, modified_at = models.CollectionVersion.current(user.id)
+        self.assertEqual(version, 1)
+        tag.delete()
+        self.assertEqual(models.CollectionVersion.current(user.id)[0], 2)
+
+    def test_delete_user_with_recipes(self):
+        """Deleting A User Cascades Without Recreating Its Version Row"""
+        user = create_sample_user()
+        models.Recipe.objects.create(
+            user=user,
+            title='Soup',
+            time_minute=5,
+            price=5.00
+            )
+        user.delete()
+        self.assertFalse(models.CollectionVersion.objects.exists())
+
+
+class NamedManagerTests(TestCase):
+    """Test Tags And Ingredients Are Unique Per User By Name"""
+
+    def setUp(self):
+        self.user = create_sample_user()
+
+    def test_get_or_create_many(self):
+        """Existing Names Match Regardless Of Case, Missing Ones Are Made"""
+        vegan = models.Tag.objects.create(user=self.user, name='Vegan')
+        other = create_sample_user(email='other@gmail.com')
+        models.Tag.objects.create(user=other, name='Dinner')
+        with self.assertNumQueries(5):
+            # select, insert, select, version bump, change log
+            tags = models.Tag.objects.get_or_create_many(
+                self.user,
+                ['vegan', 'Dinner', 'DINNER', 'Lunch']
+                )
+        self.assertEqual(tags['vegan'], vegan)
+        self.assertEqual(tags['Dinner'], tags['DINNER'])
+        self.assertEqual(tags['Dinner'].user, self.user)
+        self.assertEqual(
+            sorted(models.Tag.objects.filter(
+                user=self.user
+                ).values_list('name', flat=True)),
+            ['Dinner', 'Lunch', 'Vegan']
+            )
+        self.assertEqual(
+            sorted(models.Change.objects.filter(
+                user_id=self.user.id,
+                kind=models.Change.TAG
+                ).values_list('object_id', flat=True)),
+            sorted([vegan.id, tags['Dinner'].id, tags['Lunch'].id])
+            )
+
+    def test_get_or_create_many_existing_only(self):
+        """Names That All Exist Cost One Query"""
+        salt = models.Ingredients.objects.create(user=self.user, name='Salt')
+        with self.assertNumQueries(1):
+            found = models.Ingredients.objects.get_or_create_many(
+                self.user.id,
+                ['SALT']
+                )
+        self.assertEqual(found, {'SALT': salt})
+
+    def test_name_unique_per_user_ignoring_case(self):
+        """A Second Tag Differing Only In Case Is Rejected"""
+        models.Tag.objects.create(user=self.user, name='Vegan')
+        models.Tag.objects.create(
+            user=create_sample_user(email='other@gmail.com'),
+            name='vegan'
+            )
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            models.Tag.objects.create(user=self.user, name='vegan')
+
+
+class MergeDuplicateNamesTests(TestCase):
+    """Test The Migration Folding Duplicate Names Together"""
+
+    def test_merge_duplicates(self):
+        """Links Move To The Oldest Tag And The Copies Are Deleted"""
+        migration = import_module('core.migrations.0015_unique_lower_names')
+        user = create_sample_user()
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX core_tag_user_lower_name_uniq')
+        keeper = models.Tag.objects.create(user=user, name='Vegan')
+        copy = models.Tag.objects.create(user=user, name='vegan')
+        both = models.Recipe.objects.create(
+            user=user,
+            title='Both',
+            time_minute=5,
+            price=5
+            )
+        both.tag.add(keeper, copy)
+        only_copy = models.Recipe.objects.create(
+            user=user,
+            title='Copy',
+            time_minute=5,
+            price=5
+            )
+        only_copy.tag.add(copy)
+        version = models.CollectionVersion.current(user.id)[0]
+        migration.merge_duplicates(
+            apps,
+            SimpleNamespace(connection=connection)
+            )
+        self.assertEqual(
+            list(models.Tag.objects.values_list('id', flat=True)),
+            [keeper.id]
+            )
+        self.assertEqual(list(both.tag.all()), [keeper])
+        self.assertEqual(list(only_copy.tag.all()), [keeper])
+        self.assertTrue(models.Change.objects.filter(
+            kind=models.Change.TAG,
+            object_id=copy.id,
+            deleted=True
+            ).exists())
+        self.assertGreater(
+            models.CollectionVersion.current(user.id)[0],
+            version
+            )
+
+    def test_unique_indexes_survive_migrations(self):
+        """The lower(name) Indexes Django Does Not Track Still Exist"""
+        # a table rebuild on SQLite drops them without a word
+        with connection.cursor() as cursor:
+            for table in ('core_tag', 'core_ingredients'):
+                constraints = connection.introspection.get_constraints(
+                    cursor,
+                    table
+                    )
+                self.assertIn(f'{table}_user_lower_name_uniq', constraints)
+                self.assertTrue(
+                    constraints[f'{table}_user_lower_name_uniq']['unique']
+                    )
+
+
+class RecipeCountTests(TestCase):
+    """Test recipe_count Follows The Links Of Tags And Ingredients"""
+
+    def setUp(self):
+        self.user = create_sample_user()
+        self.vegan = models.Tag.objects.create(user=self.user, name='Vegan')
+        self.lunch = models.Tag.objects.create(user=self.user, name='Lunch')
+        self.salt = models.Ingredients.objects.create(
+            user=self.user,
+            name='Salt'
+            )
+        self.recipes = [
+            models.Recipe.objects.create(
+                user=self.user,
+                title=f'recipe {index}',
+                time_minute=5,
+                price=5
+                )
+            for index in range(3)
+            ]
+
+    def counts(self):
+        return {
+            obj.name: obj.recipe_count
+            for model in (models.Tag, models.Ingredients)
+            for obj in model.objects.all()
+            }
+
+    def test_recipe_side_links(self):
+        """Adding, Removing, Setting And Clearing From A Recipe"""
+        recipe = self.recipes[0]
+        recipe.tag.add(self.vegan, self.lunch)
+        recipe.tag.add(self.vegan)
+        recipe.ingredients.add(self.salt)
+        self.assertEqual(self.counts(), {'Vegan': 1, 'Lunch': 1, 'Salt': 1})
+        recipe.tag.set([self.lunch])
+        self.assertEqual(self.counts(), {'Vegan': 0, 'Lunch': 1, 'Salt': 1})
+        # not linked, nothing to count down
+        recipe.tag.remove(self.vegan)
+        recipe.ingredients.clear()
+        self.assertEqual(self.counts(), {'Vegan': 0, 'Lunch': 1, 'Salt': 0})
+
+    def test_tag_side_links(self):
+        """Adding, Removing And Clearing From A Tag"""
+        self.vegan.recipe_set.add(*self.recipes)
+        self.vegan.recipe_set.add(self.recipes[0])
+        self.assertEqual(self.counts()['Vegan'], 3)
+        self.vegan.recipe_set.remove(self.recipes[0])
+        self.vegan.recipe_set.remove(self.recipes[0])
+        self.assertEqual(self.counts()['Vegan'], 2)
+        self.vegan.recipe_set.clear()
+        self.assertEqual(self.counts()['Vegan'], 0)
+
+    def test_deleted_recipe_uncounted(self):
+        """Deleting A Recipe Counts Down Everything It Was Linked To"""
+        for recipe in self.recipes:
+            recipe.tag.add(self.vegan)
+            recipe.ingredients.add(self.salt)
+        models.Recipe.objects.filter(
+            id__in=[recipe.id for recipe in self.recipes[:2]]
+            ).delete()
+        self.assertEqual(self.counts(), {'Vegan': 1, 'Lunch': 0, 'Salt': 1})
+
+    def test_bulk_links(self):
+        """core.bulk Counts The Links It Writes And Deletes"""
+        bulk.link_recipes(self.recipes, [
+            {'tag': [self.vegan.id, self.vegan.id], 'ingredients': []},
+            {'tag': [self.vegan.id, self.lunch.id]},
+            {'ingredients': [self.salt.id]},
+            ])
+        self.assertEqual(self.counts(), {'Vegan': 2, 'Lunch': 1, 'Salt': 1})
+        bulk.unlink_recipes([self.recipes[1].id, self.recipes[2].id])
+        self.assertEqual(self.counts(), {'Vegan': 1, 'Lunch': 0, 'Salt': 0})
+
+    def test_recount_recipes(self):
+        """Drifted Counters Are Recomputed, Others Left Alone"""
+        self.recipes[0].tag.add(self.vegan, self.lunch)
+        models.Tag.objects.filter(id=self.vegan.id).update(recipe_count=7)
+        version = models.CollectionVersion.current(self.user.id)[0]
+        fixed = models.Tag.objects.all().recount_recipes()
+        self.assertEqual(fixed, 1)
+        self.assertEqual(self.counts()['Vegan'], 1)
+        # cached tag lists show the count, they must change
+        self.assertGreater(
+            models.CollectionVersion.current(self.user.id)[0],
+            version
+            )
+        self.assertTrue(models.Change.objects.filter(
+            kind=models.Change.TAG,
+            object_id=self.vegan.id
+            ).exists())
+        self.assertEqual(models.Tag.objects.all().recount_recipes(), 0)
+
+    def test_drifted_low_counter_does_not_block_writes(self):
+        """A Counter Already At Zero Stays There Instead Of Failing"""
+        recipe = self.recipes[0]
+        recipe.tag.add(self.vegan, self.lunch)
+        recipe.ingredients.add(self.salt)
+        models.Tag.objects.update(recipe_count=0)
+        models.Ingredients.objects.update(recipe_count=0)
+        recipe.tag.remove(self.vegan)
+        recipe.ingredients.clear()
+        recipe.delete()
+        self.assertEqual(self.counts(), {'Vegan': 0, 'Lunch': 0, 'Salt': 0})
+
+
+class SearchBackfillTests(TestCase):
+    """Test The Search Backfill Of Migration 0012"""
+
+    def test_reindex(self):
+        """Documents Are Rebuilt From Historical Models On Its Connection"""
+        if connection.vendor != 'sqlite':
+            self.skipTest('checks the SQLite FTS table')
+        migration = import_module('core.migrations.0012_recipe_search')
+        user = create_sample_user()
+        recipe = models.Recipe.objects.create(
+            user=user,
+            title='Curry',
+            time_minute=5,
+            price=5
+            )
+        recipe.tag.add(models.Tag.objects.create(user=user, name='Vegan'))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {migration.FTS_TABLE}')
+        migration.reindex(
+            apps.get_model('core', 'Recipe'),
+            connection,
+            [recipe.id]
+            )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, title, names FROM {migration.FTS_TABLE}'
+                )
+            self.assertEqual(
+                cursor.fetchall(),
+                [(recipe.id, 'Curry', 'Vegan')]
+                )
@@ -1,3 +1,38 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.db.utils import OperationalError
+from django.http import JsonResponse
 
-# Create your views here.
+from core.db import pending_migrations, probe
+
+# set once the migrations are found applied, they stay applied
+_migrated = False
+
+
+def healthz(request):
+    """Liveness, The Process Answers Without Touching The Database"""
+    return JsonResponse({'status': 'ok'})
+
+
+def readyz(request):
+    """Readiness, The Database Answers And Is Migrated
+
+    Plain Django views, no rest framework or authentication involved.
+    """
+    global _migrated
+    try:
+        probe()
+    except OperationalError:
+        return JsonResponse(
+            {'status': 'unavailable', 'reason': 'database'},
+            status=503
+            )
+    if settings.READYZ_CHECK_MIGRATIONS and not _migrated:
+        pending = pending_migrations()
+        if pending:
+            return JsonResponse(
+                {'status': 'unavailable', 'reason': 'migrations',
+                 'pending': pending},
+                status=503
+                )
+        _migrated = True
+    return JsonResponse({'status': 'ok'})
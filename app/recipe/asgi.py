@@ -0,0 +1,78 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.db import close_old_connections
+from django.urls import Resolver404, get_resolver
+
+from core.db import check_connections
+
+# url names served on the read pool, GET and HEAD only
+READ_VIEWS = (
+    'recipe:recipe-list',
+    'recipe:recipe-detail',
+    'recipe:tag-list',
+    'recipe:ingredients-list',
+    )
+READ_METHODS = ('GET', 'HEAD')
+
+
+class ReadPoolASGIHandler(ASGIHandler):
+    """ASGI Handler Serving The Read Endpoints Concurrently
+
+    Django 3.0 runs every view through sync_to_async on one shared
+    thread, so an ASGI worker answers a single request at a time. Reads
+    of the recipe api go to a pool of RECIPE_ASGI_READ_THREADS threads
+    instead, each with its own database connection; the pool size bounds
+    the connections taken. Every other request keeps Django's path.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def executor(self):
+        """Read Pool, Started On First Use"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.RECIPE_ASGI_READ_THREADS,
+                    thread_name_prefix='recipe-read'
+                    )
+            return self._executor
+
+    def is_read(self, request):
+        """Whether request Goes To The Read Pool"""
+        if request.method not in READ_METHODS:
+            return False
+        try:
+            match = get_resolver().resolve(request.path_info)
+        except Resolver404:
+            return False
+        return match.view_name in READ_VIEWS
+
+    def serve_read(self, request):
+        """get_response In A Pool Thread"""
+        # request_started and request_finished close connections on the
+        # thread they are sent from, not this one
+        close_old_connections()
+        check_connections()
+        try:
+            return super().get_response(request)
+        finally:
+            close_old_connections()
+
+    async def get_response(self, request):
+        if self.is_read(request):
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(
+                self.executor,
+                self.serve_read,
+                request
+                )
+        return await sync_to_async(super().get_response)(request)
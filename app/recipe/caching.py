@@ -0,0 +1,159 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from core.models import CollectionVersion
+
+# id list params whose order and duplicates do not change the result
+ID_LIST_PARAMS = ('tag', 'ingredients')
+
+
+class ResponseCache:
+    """Rendered List Responses Per User, Url And Collection Version
+
+    Keys embed the user's CollectionVersion, which the model and m2m
+    signals in core.signals bump on every write, so a write invalidates
+    every cached page of that user at once in all workers, whether the
+    backend is local memory or shared files. Old entries simply expire.
+    """
+
+    key_prefix = 'recipe-response'
+
+    @property
+    def cache(self):
+        alias = settings.RECIPE_RESPONSE_CACHE_ALIAS
+        return caches[alias] if alias else None
+
+    def key(self, request, version, modified_at):
+        """Cache Key For This Request, None When It Is Not Cacheable"""
+        if self.cache is None or request.accepted_renderer.format != 'json':
+            return None
+        params = []
+        for name in sorted(request.query_params):
+            values = request.query_params.getlist(name)
+            if name in ID_LIST_PARAMS:
+                ids = {i for value in values for i in value.split(',')}
+                values = [','.join(sorted(ids))]
+            params.extend((name, value) for value in sorted(values))
+        raw = '|'.join((
+            str(version),
+            # tells apart a version row that was deleted and recreated
+            str(modified_at.timestamp() if modified_at else 0),
+            request.build_absolute_uri(request.path),
+            urlencode(params)
+            ))
+        digest = hashlib.md5(raw.encode()).hexdigest()
+        return f'{self.key_prefix}:{request.user.id}:{digest}'
+
+    def get(self, key):
+        """Cached (content, content_type) Or None, Counting The Outcome"""
+        hit = self.cache.get(key)
+        self._count('hits' if hit is not None else 'misses')
+        return hit
+
+    def set(self, key, response):
+        """Store The Rendered Body Of A Successful Response"""
+        self.cache.set(
+            key,
+            (response.rendered_content, response['Content-Type']),
+            settings.RECIPE_RESPONSE_CACHE_TTL
+            )
+
+    def _count(self, name):
+        key = f'{self.key_prefix}:stats:{name}'
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            # first event, or the counter was evicted
+            self.cache.add(key, 1, None)
+
+    def stats(self):
+        """Hit And Miss Counters Since The Cache Was Last Cleared"""
+        counters = self.cache.get_many([
+            f'{self.key_prefix}:stats:hits',
+            f'{self.key_prefix}:stats:misses'
+            ])
+        return {
+            name: counters.get(f'{self.key_prefix}:stats:{name}', 0)
+            for name in ('hits', 'misses')
+            }
+
+
+response_cache = ResponseCache()
+
+
+class ConditionalGetMixin:
+    """Answer If-None-Match / If-Modified-Since From The Collection Version
+
+    The user's CollectionVersion changes on every write to their recipes,
+    tags or ingredients, so a matching validator means the response would
+    be identical and it is skipped before any query or serialization.
+    Lists that do have to be sent come from the response cache when the
+    same page was already rendered at this version.
+    Only list is wrapped here, viewsets with a detail route wrap retrieve
+    themselves so the router does not grow routes the view lacks.
+    """
+    response_cache_key = None
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(self.cached_list, request, *args, **kwargs)
+
+    def cached_list(self, request, *args, **kwargs):
+        """Serve A Rendered Page From The Response Cache If Present"""
+        key = response_cache.key(request, *self.collection_version)
+        if key is not None:
+            hit = response_cache.get(key)
+            if hit is not None:
+                content, content_type = hit
+                response = HttpResponse(content, content_type=content_type)
+                response['X-Cache'] = 'HIT'
+                return response
+            self.response_cache_key = key
+        return super().list(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request,
+            response,
+            *args,
+            **kwargs
+            )
+        if self.response_cache_key and response.status_code == 200:
+            response.render()
+            response_cache.set(self.response_cache_key, response)
+            response['X-Cache'] = 'MISS'
+        return response
+
+    def conditional(self, handler, request, *args, **kwargs):
+        """Run handler Unless The Client Copy Is Still Current"""
+        version, modified_at = CollectionVersion.current(request.user.id)
+        self.collection_version = (version, modified_at)
+        etag = self.get_etag(request, version)
+        last_modified = modified_at and int(modified_at.timestamp())
+        not_modified = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified
+            )
+        response = not_modified or handler(request, *args, **kwargs)
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        # clients may keep the body but must revalidate before reuse
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get_etag(self, request, version):
+        """Validator For This Url And Representation At version"""
+        key = '|'.join((
+            str(request.user.id),
+            str(version),
+            request.get_full_path(),
+            request.accepted_media_type or ''
+            ))
+        return quote_etag(hashlib.md5(key.encode()).hexdigest())
@@ -0,0 +1,38 @@
+from itertools import islice
+
+from recipe.renderers import FastJSONRenderer
+
+
+def chunked(rows, size):
+    """Lists Of Up To size Rows, Read Through A Server Side Cursor"""
+    rows = rows.iterator(chunk_size=size)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def represented(reader, rows, size):
+    """Represented Chunks, Each Loading Its Relations In One Batch"""
+    for chunk in chunked(rows, size):
+        yield reader.represent(chunk)
+
+
+def stream_json(reader, rows, size):
+    """Bytes Of One JSON Array, A Chunk At A Time"""
+    renderer = FastJSONRenderer()
+    yield b'['
+    separator = b''
+    for items in represented(reader, rows, size):
+        # the rendered list without its brackets
+        yield separator + renderer.render(items)[1:-1]
+        separator = b','
+    yield b']'
+
+
+def stream_ndjson(reader, rows, size):
+    """Bytes Of One JSON Document Per Line, A Chunk At A Time"""
+    renderer = FastJSONRenderer()
+    for items in represented(reader, rows, size):
+        yield b''.join(renderer.render(item) + b'\n' for item in items)
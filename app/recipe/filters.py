@@ -0,0 +1,159 @@
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import (
+    Count,
+    Exists,
+    F,
+    FloatField,
+    OuterRef,
+    Value
+    )
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from core.models import Recipe
+from core.search import FTS_TABLE
+
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+MATCH_MODES = (MATCH_ANY, MATCH_ALL)
+
+# range params accepted on the recipe list and how each is parsed
+RANGE_FILTERS = {
+    'time_minute__gte': serializers.IntegerField(min_value=0),
+    'time_minute__lte': serializers.IntegerField(min_value=0),
+    'price__gte': serializers.DecimalField(max_digits=8, decimal_places=2),
+    'price__lte': serializers.DecimalField(max_digits=8, decimal_places=2),
+    }
+
+# comma separated ids of the tag and ingredients params
+ID_LIST = serializers.ListField(child=serializers.IntegerField(min_value=1))
+# assigned_only of the tag and ingredient lists, 0 and 1 among others
+FLAG = serializers.BooleanField()
+
+# ordering param values, id breaks ties in the same direction so each
+# ordering is one walk of a (user, field, id) index in either direction
+ORDERINGS = {
+    '-id': ('-id',),
+    'id': ('id',),
+    'time_minute': ('time_minute', 'id'),
+    '-time_minute': ('-time_minute', '-id'),
+    'price': ('price', 'id'),
+    '-price': ('-price', '-id'),
+    }
+
+
+def _through(relation):
+    """Auto Created M2M Table Behind Recipe.<relation>"""
+    return getattr(Recipe, relation).through
+
+
+def assigned_only(queryset):
+    """Keep Tags Or Ingredients Linked To At Least One Recipe"""
+    # the recipe_count counter, no look at the links at all
+    return queryset.filter(recipe_count__gt=0)
+
+
+def recipes_with_related(queryset, relation, ids, match=MATCH_ANY):
+    """Keep Recipes Linked To Any Or All Of The Given Related ids"""
+    links = _through(relation).objects.filter(
+        **{f'{relation}_id__in': ids}
+        )
+    if match == MATCH_ALL:
+        # group the links per recipe and keep those hitting every id
+        matching = links.values('recipe_id').annotate(
+            hits=Count(f'{relation}_id')
+            ).filter(hits=len(set(ids))).values('recipe_id')
+        return queryset.filter(id__in=matching)
+    return queryset.filter(Exists(links.filter(recipe_id=OuterRef('pk'))))
+
+
+def _param(name, field, value):
+    """value Of The name Param Parsed By field, Errors Keyed By name"""
+    try:
+        return field.run_validation(value)
+    except ValidationError as exc:
+        raise ValidationError({name: exc.detail})
+
+
+def id_list(params, name):
+    """ids In The Comma Separated name Param, None Without It"""
+    if not params.get(name):
+        return None
+    return _param(name, ID_LIST, params[name].split(','))
+
+
+def flag(params, name):
+    """Boolean name Param, False Without It"""
+    if name not in params:
+        return False
+    return _param(name, FLAG, params[name])
+
+
+def in_ranges(queryset, params):
+    """Apply The RANGE_FILTERS Present In params"""
+    conditions = {}
+    errors = {}
+    for name, field in RANGE_FILTERS.items():
+        if name not in params:
+            continue
+        try:
+            conditions[name] = field.run_validation(params[name])
+        except ValidationError as exc:
+            errors[name] = exc.detail
+    if errors:
+        raise ValidationError(errors)
+    return queryset.filter(**conditions)
+
+
+def ordering(params, default):
+    """Ordering Fields Named By The ordering Param, Else default"""
+    name = params.get('ordering')
+    if not name:
+        return default
+    if name not in ORDERINGS:
+        raise ValidationError(
+            {'ordering': f'Must be one of {", ".join(ORDERINGS)}'}
+            )
+    return ORDERINGS[name]
+
+
+def search(queryset, text):
+    """Keep Recipes Matching Every Word Of text, Annotated With rank
+
+    A higher rank is a better match, titles count more than tag and
+    ingredient names.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return queryset.annotate(
+            rank=Value(0.0, output_field=FloatField())
+            ).none()
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(
+            ' '.join(words),
+            config=settings.RECIPE_SEARCH_CONFIG
+            )
+        # double precision, so the keyset cursor holds the exact value
+        return queryset.filter(search_vector=query).annotate(
+            rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+            )
+    # FTS5 on SQLite, quoted words are matched literally and ANDed
+    match = ' '.join(f'"{word}"' for word in words)
+    table = Recipe._meta.db_table
+    # bm25 is lower for better matches, weights follow the columns
+    rank = RawSQL(
+        f'-bm25({FTS_TABLE}, 10.0, 1.0)',
+        [],
+        output_field=FloatField()
+        )
+    # joined rather than a subquery per row, so MATCH runs once
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = {table}.id', f'{FTS_TABLE} MATCH %s'],
+        params=[match]
+        ).annotate(rank=rank)
@@ -0,0 +1,157 @@
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from django.utils import timezone
+
+from core.models import (
+    Change,
+    CollectionVersion,
+    Recipe,
+    recipe_image_file_path
+    )
+from recipe import renditions
+from recipe.uploads import StagedImage
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Process Wide Worker Pool, Started On First Use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.RECIPE_IMAGE_WORKERS,
+                thread_name_prefix='recipe-image'
+                )
+        return _executor
+
+
+def stage_upload(upload):
+    """Copy An Uploaded File To A Private Temp File Chunk By Chunk"""
+    if isinstance(upload, StagedImage):
+        # streamed to its own temp file by RecipeImageUploadHandler
+        return upload.temporary_file_path()
+    ext = os.path.splitext(upload.name)[1]
+    fd, path = tempfile.mkstemp(
+        suffix=ext,
+        dir=settings.FILE_UPLOAD_TEMP_DIR
+        )
+    with os.fdopen(fd, 'wb') as staged:
+        for chunk in upload.chunks():
+            staged.write(chunk)
+    return path
+
+
+def enqueue(recipe, path):
+    """Mark The Recipe Pending And Process The Staged File
+
+    With RECIPE_IMAGE_ASYNC the work runs on the pool once the current
+    transaction commits, otherwise inline.
+    """
+    _set_status(recipe.pk, Recipe.IMAGE_PENDING)
+    recipe.image_status = Recipe.IMAGE_PENDING
+    if not settings.RECIPE_IMAGE_ASYNC:
+        process_upload(recipe.pk, path)
+        recipe.refresh_from_db(fields=('image', 'image_status'))
+        return
+    transaction.on_commit(
+        lambda: get_executor().submit(_run_job, recipe.pk, path)
+        )
+
+
+def _set_status(recipe_id, image_status):
+    """Update image_status, Which Recipe Responses Expose"""
+    user_id = Recipe.objects.filter(pk=recipe_id).values_list(
+        'user_id',
+        flat=True
+        ).first()
+    if user_id is None:
+        return
+    Recipe.objects.filter(pk=recipe_id).update(
+        image_status=image_status,
+        updated_at=timezone.now()
+        )
+    # queryset updates send no signals
+    CollectionVersion.bump(user_id)
+    Change.record(user_id, Change.RECIPE, [recipe_id])
+
+
+def _run_job(recipe_id, path):
+    """Pool Entry Point, Owns Its Database Connection"""
+    close_old_connections()
+    try:
+        process_upload(recipe_id, path)
+    finally:
+        close_old_connections()
+
+
+def reencode(source):
+    """Decode An Image And Encode It Again Without Any Metadata"""
+    with Image.open(source) as image:
+        # apply the EXIF rotation before EXIF is dropped
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            fmt, ext, mode = 'PNG', 'png', 'RGBA'
+        else:
+            fmt, ext, mode = 'JPEG', 'jpg', 'RGB'
+        # a fresh image carries pixels only, no exif, icc or comments
+        clean = Image.new(mode, image.size)
+        clean.paste(image.convert(mode))
+    output = BytesIO()
+    options = {'optimize': True}
+    if fmt == 'JPEG':
+        options['quality'] = settings.RECIPE_IMAGE_QUALITY
+    clean.save(output, format=fmt, **options)
+    return output.getvalue(), ext
+
+
+def process_upload(recipe_id, path):
+    """Re-encode A Staged Upload And Swap It In As Recipe.image"""
+    try:
+        data, ext = reencode(path)
+    except Exception:
+        logger.exception('Image processing failed for recipe %s', recipe_id)
+        _set_status(recipe_id, Recipe.IMAGE_FAILED)
+        return
+    finally:
+        os.remove(path)
+
+    field = Recipe._meta.get_field('image')
+    name = field.storage.save(
+        recipe_image_file_path(None, f'image.{ext}'),
+        ContentFile(data)
+        )
+    with transaction.atomic():
+        recipe = Recipe.objects.select_for_update().filter(
+            pk=recipe_id
+            ).only('image', 'user').first()
+        if recipe is None:
+            # recipe deleted while the job was queued
+            field.storage.delete(name)
+            return
+        previous = recipe.image.name
+        Recipe.objects.filter(pk=recipe_id).update(
+            image=name,
+            image_status=Recipe.IMAGE_READY,
+            updated_at=timezone.now()
+            )
+        CollectionVersion.bump(recipe.user_id)
+        Change.record(recipe.user_id, Change.RECIPE, [recipe_id])
+    if previous:
+        field.storage.delete(previous)
+        renditions.delete_all(previous)
+    if settings.RECIPE_IMAGE_EAGER_RENDITIONS:
+        renditions.generate_all(name)
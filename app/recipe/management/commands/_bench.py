@@ -0,0 +1,59 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from core.models import Ingredients, Recipe, Tag
+
+# title vocabulary, so text search has common and rare words to match
+WORDS = (
+    'baked', 'chicken', 'curry', 'green', 'lemon', 'noodle', 'pasta',
+    'roast', 'salad', 'soup', 'spicy', 'stew', 'tart', 'thai', 'tomato',
+    'vegan',
+    )
+
+
+def seed_dataset(recipes, tags, ingredients, links, email='bench@example.com'):
+    """Create A User With A Random Recipe Collection And Return It"""
+    user = get_user_model().object.create_user(email, 'bench@pass123')
+    Tag.objects.bulk_create(
+        Tag(user=user, name=f'tag {i}') for i in range(tags)
+        )
+    Ingredients.objects.bulk_create(
+        Ingredients(user=user, name=f'ingredient {i}')
+        for i in range(ingredients)
+        )
+    Recipe.objects.bulk_create(
+        Recipe(user=user, title=f'{random.choice(WORDS)} '
+               f'{random.choice(WORDS)} recipe {i}', time_minute=i % 120,
+               price=i % 50)
+        for i in range(recipes)
+        )
+    recipe_ids = list(
+        Recipe.objects.filter(user=user).values_list('id', flat=True)
+        )
+    for relation, model in (('tag', Tag), ('ingredients', Ingredients)):
+        related_ids = list(
+            model.objects.filter(user=user).values_list('id', flat=True)
+            )
+        through = getattr(Recipe, relation).through
+        through.objects.bulk_create(
+            through(recipe_id=recipe_id, **{f'{relation}_id': related_id})
+            for recipe_id in recipe_ids
+            for related_id in random.sample(
+                related_ids, min(links, len(related_ids))
+                )
+            )
+        # bulk inserted links, count them in one go
+        model.objects.filter(user=user).recount_recipes()
+    return user
+
+
+def time_call(func, repeat):
+    """Median Wall Time Of func In Milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
@@ -0,0 +1,241 @@
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from core.models import Change, Recipe
+from recipe.asgi import ReadPoolASGIHandler
+from recipe.management.commands._bench import seed_dataset
+
+EMAIL = 'bench-asgi@example.com'
+
+
+def percentile(timings, fraction):
+    """Value Below Which fraction Of The Sorted timings Fall"""
+    return timings[round(fraction * (len(timings) - 1))]
+
+
+class Command(BaseCommand):
+    """Load Test The Read Endpoints Through The WSGI And ASGI Handlers"""
+    help = (
+        'Send the same mix of recipe list, recipe detail, tag and '
+        'ingredient list requests from concurrent clients to the WSGI '
+        'handler, the stock ASGI handler and the read pool one of '
+        'recipe.asgi, then report requests per second and p50/p99 '
+        'latency. The dataset is committed for the run and deleted '
+        'afterwards; the response cache is off so every request reads '
+        'the database.'
+        )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--tags', type=int, default=20)
+        parser.add_argument('--links', type=int, default=3)
+        parser.add_argument('--requests', type=int, default=400)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument(
+            '--wsgi-workers',
+            type=int,
+            default=1,
+            help='Requests the WSGI side serves at once, 1 is a sync worker'
+            )
+        parser.add_argument(
+            '--db-latency-ms',
+            type=float,
+            default=2.0,
+            help='Added to every query, standing in for a network round trip'
+            )
+        parser.add_argument('--host', default='localhost')
+
+    def handle(self, *args, **options):
+        """Seed, Run Both Handlers, Clean Up"""
+        if get_user_model().object.filter(email=EMAIL).exists():
+            raise CommandError(f'{EMAIL} exists, remove it first')
+        user = seed_dataset(
+            options['recipes'],
+            options['tags'],
+            options['tags'],
+            options['links'],
+            email=EMAIL
+            )
+        latency = options['db_latency_ms'] / 1000
+
+        def delay(execute, sql, params, many, context):
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def add_delay(connection, **kwargs):
+            # sent again each time a closed wrapper reconnects
+            if delay not in connection.execute_wrappers:
+                connection.execute_wrappers.append(delay)
+
+        try:
+            token = Token.objects.create(user=user).key
+            paths = self.request_paths(user, options['requests'])
+            if latency:
+                connections.close_all()
+                connection_created.connect(add_delay)
+            with override_settings(RECIPE_RESPONSE_CACHE_ALIAS=None):
+                for name, handler in (
+                        ('wsgi', None),
+                        ('asgi', ASGIHandler),
+                        ('asgi read pool', ReadPoolASGIHandler)):
+                    started = time.perf_counter()
+                    if handler is None:
+                        timings = self.run_wsgi(paths, token, options)
+                    else:
+                        timings = self.run_asgi(
+                            handler(),
+                            paths,
+                            token,
+                            options
+                            )
+                    self.report(name, timings, started)
+        finally:
+            connection_created.disconnect(add_delay)
+            connections.close_all()
+            user_id = user.id
+            user.delete()
+            Change.objects.filter(user_id=user_id).delete()
+
+    def request_paths(self, user, count):
+        """Mixed Read Requests, The Same For Both Handlers"""
+        ids = list(
+            Recipe.objects.filter(user=user).values_list('id', flat=True)
+            )
+        lists = (
+            reverse('recipe:recipe-list'),
+            reverse('recipe:tag-list'),
+            reverse('recipe:ingredients-list'),
+            )
+        paths = []
+        for index in range(count):
+            if index % 4 == 3:
+                paths.append(reverse(
+                    'recipe:recipe-detail',
+                    args=[random.choice(ids)]
+                    ))
+            else:
+                paths.append(lists[index % 4])
+        return paths
+
+    def run_wsgi(self, paths, token, options):
+        """Client Threads Queueing On wsgi_workers Threads Of A WSGIHandler"""
+        handler = WSGIHandler()
+        factory = RequestFactory(SERVER_NAME=options['host'])
+        pending = iter(paths)
+        lock = threading.Lock()
+        timings = []
+
+        def start_response(status, headers, exc_info=None):
+            if not status.startswith('200'):
+                raise CommandError(f'WSGI request answered {status}')
+
+        def serve(environ):
+            response = handler(environ, start_response)
+            b''.join(response)
+            response.close()
+
+        def client():
+            while True:
+                with lock:
+                    path = next(pending, None)
+                if path is None:
+                    return
+                environ = factory.get(
+                    path,
+                    HTTP_AUTHORIZATION=f'Token {token}'
+                    ).environ
+                started = time.perf_counter()
+                # workers take requests in arrival order, like a server
+                workers.submit(serve, environ).result()
+                timings.append(time.perf_counter() - started)
+
+        workers = ThreadPoolExecutor(max_workers=options['wsgi_workers'])
+        clients = [
+            threading.Thread(target=client)
+            for _ in range(options['concurrency'])
+            ]
+        try:
+            for thread in clients:
+                thread.start()
+            for thread in clients:
+                thread.join()
+        finally:
+            workers.shutdown()
+        if len(timings) != len(paths):
+            raise CommandError('WSGI requests failed')
+        return timings
+
+    def run_asgi(self, handler, paths, token, options):
+        """Client Coroutines Against One ASGI handler"""
+        pending = iter(paths)
+        timings = []
+
+        async def request(path):
+            scope = {
+                'type': 'http',
+                'method': 'GET',
+                'path': path,
+                'query_string': b'',
+                'root_path': '',
+                'scheme': 'http',
+                'server': (options['host'], 80),
+                'headers': [(b'authorization', f'Token {token}'.encode())],
+                }
+            messages = []
+
+            async def receive():
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                messages.append(message)
+
+            await handler(scope, receive, send)
+            if messages[0]['status'] != 200:
+                raise CommandError(
+                    f'ASGI request answered {messages[0]["status"]}'
+                    )
+
+        async def client():
+            for path in pending:
+                started = time.perf_counter()
+                await request(path)
+                timings.append(time.perf_counter() - started)
+
+        async def main():
+            await asyncio.gather(*[
+                client() for _ in range(options['concurrency'])
+                ])
+
+        # no asyncio.run, the image runs python 3.6
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(main())
+        finally:
+            loop.close()
+            if isinstance(handler, ReadPoolASGIHandler):
+                handler.executor.shutdown()
+        return timings
+
+    def report(self, name, timings, started):
+        elapsed = time.perf_counter() - started
+        timings = sorted(timings)
+        self.stdout.write(
+            f'{name:<15}{len(timings):>6} requests '
+            f'{len(timings) / elapsed:>9.1f} req/s '
+            f'p50 {percentile(timings, 0.5) * 1000:8.2f} ms '
+            f'p99 {percentile(timings, 0.99) * 1000:8.2f} ms'
+            )
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Recipe
+from recipe.management.commands._bench import seed_dataset, time_call
+from recipe.renderers import FastJSONRenderer
+from recipe.rows import ValuesReader
+from recipe.serializers import RecipeSerializers
+from recipe.views import with_list_load_plan
+
+
+class Command(BaseCommand):
+    """Compare Serializer And values() Rendering Of Recipe Lists"""
+    help = 'Benchmark list rendering on seeded, rolled back datasets'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            nargs='+',
+            default=[1000, 10000]
+            )
+        parser.add_argument('--tags', type=int, default=20)
+        parser.add_argument('--links', type=int, default=3)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        """Seed Each Size, Check Identical Output, Time Both Paths"""
+        for rows in options['rows']:
+            with transaction.atomic():
+                user = seed_dataset(
+                    rows,
+                    options['tags'],
+                    options['tags'],
+                    options['links']
+                    )
+                recipes = Recipe.objects.filter(user=user).order_by('-id')
+                reader = ValuesReader(RecipeSerializers())
+
+                def serializer_path():
+                    return JSONRenderer().render(RecipeSerializers(
+                        with_list_load_plan(recipes),
+                        many=True
+                        ).data)
+
+                def values_path():
+                    return FastJSONRenderer().render(reader.represent(
+                        list(recipes.values(*reader.columns))
+                        ))
+
+                if serializer_path() != values_path():
+                    raise CommandError(f'Output differs at {rows} rows')
+                for name, path in (
+                        ('serializer', serializer_path),
+                        ('values', values_path)):
+                    elapsed = time_call(path, options['repeat'])
+                    if name == 'serializer':
+                        baseline = elapsed
+                    self.stdout.write(
+                        f'{rows:>7} rows {name:<12} {elapsed:9.2f} ms '
+                        f'{rows / elapsed * 1000:>10.0f} rows/s '
+                        f'{baseline / elapsed:5.1f}x'
+                        )
+                transaction.set_rollback(True)
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from core.models import Recipe, Tag
+from recipe import filters
+from recipe.management.commands._bench import seed_dataset, time_call
+
+
+class Command(BaseCommand):
+    """Compare The Recipe Filters With The Plans They Replaced"""
+    help = 'Benchmark recipe/tag filtering on a seeded, rolled back dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=5000)
+        parser.add_argument('--tags', type=int, default=50)
+        parser.add_argument('--links', type=int, default=5)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        """Seed, Time Every Plan Then Roll Back"""
+        with transaction.atomic():
+            user = seed_dataset(
+                options['recipes'],
+                options['tags'],
+                options['tags'],
+                options['links']
+                )
+            tag_ids = list(
+                Tag.objects.filter(user=user).values_list('id', flat=True)
+                )[:3]
+            recipes = Recipe.objects.filter(user=user)
+            tags = Tag.objects.filter(user=user)
+            plans = (
+                ('assigned_only join+distinct', lambda: list(
+                    tags.filter(recipe__isnull=False).distinct()
+                    )),
+                ('assigned_only exists', lambda: list(tags.filter(Exists(
+                    Recipe.tag.through.objects.filter(tag_id=OuterRef('pk'))
+                    )))),
+                ('assigned_only counter', lambda: list(
+                    filters.assigned_only(tags)
+                    )),
+                ('tag any join', lambda: list(
+                    recipes.filter(tag__id__in=tag_ids).distinct()
+                    )),
+                ('tag any exists', lambda: list(
+                    filters.recipes_with_related(recipes, 'tag', tag_ids)
+                    )),
+                ('tag all having', lambda: list(
+                    filters.recipes_with_related(
+                        recipes, 'tag', tag_ids, filters.MATCH_ALL
+                        )
+                    )),
+                )
+            for name, plan in plans:
+                elapsed = time_call(plan, options['repeat'])
+                self.stdout.write(f'{name:<30} {elapsed:8.2f} ms')
+            transaction.set_rollback(True)
@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core import search
+from core.models import Recipe
+from recipe import filters
+from recipe.management.commands._bench import seed_dataset, time_call
+from recipe.pagination import KeysetPagination
+
+ORDERING = ('-rank', '-id')
+
+
+class Command(BaseCommand):
+    """Time Ranked Recipe Searches Against A Latency Target"""
+    help = 'Benchmark recipe search on a seeded, rolled back dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--tags', type=int, default=50)
+        parser.add_argument('--links', type=int, default=3)
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--target-ms',
+            type=float,
+            default=50.0,
+            help='Fail when the median of any search exceeds this'
+            )
+
+    def handle(self, *args, **options):
+        """Seed, Index, Time Every Search Then Roll Back"""
+        page = options['page_size']
+        slow = []
+        with transaction.atomic():
+            user = seed_dataset(
+                options['recipes'],
+                options['tags'],
+                options['tags'],
+                options['links']
+                )
+            ids = list(Recipe.objects.filter(
+                user=user
+                ).values_list('id', flat=True))
+            for start in range(0, len(ids), 500):
+                # bulk inserts send no signals
+                search.refresh(ids[start:start + 500])
+            recipes = Recipe.objects.filter(user=user)
+
+            def first_page(text):
+                return lambda: list(filters.search(
+                    recipes, text
+                    ).order_by(*ORDERING)[:page])
+
+            def second_page(text):
+                matches = filters.search(recipes, text).order_by(*ORDERING)
+                last = list(matches[page - 1:page])
+                if not last:
+                    return first_page(text)
+                seek = matches.filter(KeysetPagination()._seek(
+                    ORDERING,
+                    [last[0].rank, last[0].id]
+                    ))
+                return lambda: list(seek[:page])
+
+            plans = (
+                ('common word', first_page('soup')),
+                ('two words', first_page('thai curry')),
+                ('tag name', first_page('tag 7')),
+                ('no match', first_page('nothing')),
+                ('common word page 2', second_page('soup')),
+                )
+            for name, plan in plans:
+                elapsed = time_call(plan, options['repeat'])
+                self.stdout.write(f'{name:<30} {elapsed:8.2f} ms')
+                if elapsed > options['target_ms']:
+                    slow.append(name)
+            transaction.set_rollback(True)
+        if slow:
+            raise CommandError(
+                f'Over the {options["target_ms"]} ms target: '
+                f'{", ".join(slow)}'
+                )
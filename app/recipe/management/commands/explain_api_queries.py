@@ -0,0 +1,118 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import Ingredients, Recipe, Tag
+from recipe import filters
+from recipe.pagination import (
+    KeysetPagination,
+    NameKeysetPagination,
+    RecipeKeysetPagination
+    )
+
+# placeholder values, EXPLAIN never needs the rows to exist
+USER_ID = 1
+IDS = [1, 2, 3]
+PAGE = 101
+
+SEQ_SCAN_PATTERNS = {
+    # "Seq Scan on core_recipe"
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    # "SCAN core_recipe" or "SCAN TABLE core_recipe", but not "SCAN ...
+    # USING (COVERING) INDEX" which walks an index
+    'sqlite': re.compile(r'SCAN (?:TABLE )?(\w+)(?!.*USING .*INDEX)'),
+    }
+
+
+def _seek(ordering, position):
+    """Second Page Filter Of A Keyset Paginator"""
+    return KeysetPagination()._seek(ordering, position)
+
+
+def query_shapes():
+    """Every Query The Recipe Api Sends, Keyed By A Readable Name"""
+    recipes = Recipe.objects.filter(user_id=USER_ID).order_by('-id')
+    shapes = {
+        'recipe list': recipes[:PAGE],
+        'recipe list next page': recipes.filter(
+            _seek(RecipeKeysetPagination.ordering, [1000])
+            )[:PAGE],
+        'recipe detail': recipes.filter(pk=1),
+        }
+    for field, bound in (('time_minute', 30), ('price', 10)):
+        for name in (field, f'-{field}'):
+            ordering = filters.ORDERINGS[name]
+            ordered = recipes.order_by(*ordering)
+            shapes.update({
+                f'recipe ordered by {name}': ordered.filter(
+                    **{f'{field}__lte': bound}
+                    )[:PAGE],
+                f'recipe ordered by {name} next page': ordered.filter(
+                    _seek(ordering, [bound, 1000])
+                    )[:PAGE],
+                })
+    for relation in ('tag', 'ingredients'):
+        shapes.update({
+            f'recipe {relation} any': filters.recipes_with_related(
+                recipes, relation, IDS
+                )[:PAGE],
+            f'recipe {relation} all': filters.recipes_with_related(
+                recipes, relation, IDS, filters.MATCH_ALL
+                )[:PAGE],
+            })
+    for model, relation in ((Tag, 'tag'), (Ingredients, 'ingredients')):
+        name = model._meta.model_name
+        related = model.objects.filter(user_id=USER_ID).order_by(
+            *NameKeysetPagination.ordering
+            )
+        shapes.update({
+            f'{name} list': related[:PAGE],
+            f'{name} list next page': related.filter(
+                _seek(NameKeysetPagination.ordering, ['name', 1000])
+                )[:PAGE],
+            f'{name} assigned only': filters.assigned_only(related)[:PAGE],
+            f'{name} prefetch': model.objects.filter(recipe__in=IDS),
+            })
+    return shapes
+
+
+class Command(BaseCommand):
+    """EXPLAIN Every Api Query Shape And Fail On Sequential Scans"""
+    help = 'Check that every recipe api query is served by an index'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verbose-plans',
+            action='store_true',
+            help='Print the full plan of every query'
+            )
+
+    def handle(self, *args, **options):
+        """Explain Each Query Shape And Collect Table Scans"""
+        pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(
+                f'Unsupported database backend {connection.vendor}'
+                )
+        failures = []
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # small tables are cheaper to scan, ask whether an index
+                # path exists at all rather than what the planner prefers
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            for name, queryset in query_shapes().items():
+                plan = queryset.explain()
+                scanned = pattern.findall(plan)
+                if options['verbose_plans']:
+                    self.stdout.write(f'{name}:\n{plan}\n')
+                if scanned:
+                    failures.append(f'{name}: {", ".join(scanned)}')
+                    self.stdout.write(self.style.ERROR(f'SCAN  {name}'))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'INDEX {name}'))
+        if failures:
+            raise CommandError(
+                'Sequential scans found:\n' + '\n'.join(failures)
+                )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipe.caching import response_cache
+
+
+class Command(BaseCommand):
+    """Print Hit And Miss Counters Of The List Response Cache"""
+    help = 'Show recipe list response cache hits and misses'
+
+    def handle(self, *args, **options):
+        if response_cache.cache is None:
+            raise CommandError('RECIPE_RESPONSE_CACHE_ALIAS is not set')
+        stats = response_cache.stats()
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total if total else 0
+        self.stdout.write(
+            f'hits {stats["hits"]}  misses {stats["misses"]}  '
+            f'hit ratio {ratio:.1%}'
+            )
@@ -0,0 +1,159 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _invert(ordering):
+    """Flip The Direction Of Every Ordering Field"""
+    return tuple(
+        field[1:] if field.startswith('-') else f'-{field}'
+        for field in ordering
+        )
+
+
+class KeysetPagination(BasePagination):
+    """Opaque Cursor Pagination Seeking On A Unique Ordering
+
+    The cursor holds the ordering values of the last row seen, so every
+    page is an index range scan no matter how deep the client pages.
+    The last ordering field must be unique to make the position exact.
+    """
+    ordering = ('-id',)
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = _('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return One Page Of Rows After The Requested Cursor"""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(view)
+        position, reverse = self.decode_cursor(request)
+
+        ordering = _invert(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            try:
+                queryset = queryset.filter(self._seek(ordering, position))
+            except (DjangoValidationError, TypeError, ValueError):
+                # values that do not fit the ordering fields
+                raise NotFound(self.invalid_cursor_message)
+
+        # one extra row tells us if there is another page in that direction
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+            ]))
+
+    def get_ordering(self, view):
+        """Ordering Of This Request, A View May Choose One Per Request"""
+        if hasattr(view, 'get_pagination_ordering'):
+            return view.get_pagination_ordering()
+        return self.ordering
+
+    def get_page_size(self, request):
+        """Page Size From Query Params, Capped By Settings"""
+        page_size = settings.RECIPE_API_PAGE_SIZE
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return page_size
+        if requested <= 0:
+            return page_size
+        return min(requested, settings.RECIPE_API_MAX_PAGE_SIZE)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # reversed past the first row, restart from the top
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self._position(self.page[-1]), False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self._position(self.page[0]), True)
+
+    def decode_cursor(self, request):
+        """Return The (position, reverse) Pair Stored In The Cursor"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            position, reverse = data['p'], bool(data['r'])
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or \
+                len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, position, reverse):
+        """Build The Url For A Page Starting After position"""
+        data = json.dumps(
+            {'p': position, 'r': int(reverse)},
+            separators=(',', ':'),
+            default=str
+            )
+        encoded = base64.urlsafe_b64encode(data.encode()).decode()
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            encoded
+            )
+
+    def _position(self, instance):
+        """Ordering Values Of A Row, A Model Instance Or A values() Dict"""
+        if isinstance(instance, dict):
+            return [instance[field.lstrip('-')] for field in self.ordering]
+        return [getattr(instance, field.lstrip('-'))
+                for field in self.ordering]
+
+    def _seek(self, ordering, position):
+        """Filter For Rows Strictly After position In ordering"""
+        # (a, b) > (x, y) expands to a > x OR (a = x AND b > y)
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+
+class RecipeKeysetPagination(KeysetPagination):
+    """Newest Recipes First"""
+    ordering = ('-id',)
+
+
+class NameKeysetPagination(KeysetPagination):
+    """Tags And Ingredients By Name, id Breaking Ties"""
+    ordering = ('-name', 'id')
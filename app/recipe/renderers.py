@@ -0,0 +1,64 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Same Bytes As JSONRenderer, Encoded By orjson When Installed
+
+    Covers the compact, non ASCII escaping settings the api runs with;
+    an indent request or any other setting goes through JSONRenderer.
+    Floats would be formatted differently, the recipe endpoints render
+    decimals as strings and send none.
+    """
+    options = 0 if orjson is None else (
+        orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        if orjson is None or data is None or not self.compact or \
+                self.ensure_ascii or \
+                self.get_indent(accepted_media_type, renderer_context):
+            return super().render(
+                data,
+                accepted_media_type,
+                renderer_context
+                )
+        try:
+            ret = orjson.dumps(
+                data,
+                default=encoders.JSONEncoder().default,
+                option=self.options
+                )
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits, which json handles
+            return super().render(
+                data,
+                accepted_media_type,
+                renderer_context
+                )
+        # JSONRenderer escapes these for JavaScript, see its render()
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+            b'\xe2\x80\xa9',
+            b'\\u2029'
+            )
+
+
+class NDJSONRenderer(FastJSONRenderer):
+    """One Compact JSON Document Per Line"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        items = data if isinstance(data, list) else [data]
+        return b''.join(
+            super(NDJSONRenderer, self).render(item) + b'\n'
+            for item in items
+            )
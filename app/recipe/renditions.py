@@ -0,0 +1,88 @@
+import os
+import threading
+import zlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from core.models import Recipe
+
+FORMATS = {
+    'jpeg': ('JPEG', 'jpg'),
+    'webp': ('WEBP', 'webp'),
+    }
+
+# striped locks: concurrent requests for the same rendition wait for the
+# first one to write it instead of each decoding the original
+_locks = [threading.Lock() for _ in range(64)]
+
+
+def _lock_for(name):
+    return _locks[zlib.crc32(name.encode()) % len(_locks)]
+
+
+def _storage():
+    return Recipe._meta.get_field('image').storage
+
+
+def rendition_name(original, rendition):
+    """Storage Name Of A Rendition, Next To The Original File
+
+    Width, quality and format are part of the name, so changing a spec
+    in settings never serves a stale file.
+    """
+    spec = settings.RECIPE_IMAGE_RENDITIONS[rendition]
+    ext = FORMATS[spec['format']][1]
+    stem = os.path.splitext(original)[0]
+    return f'{stem}.{rendition}-{spec["width"]}w-q{spec["quality"]}.{ext}'
+
+
+def render(original, rendition):
+    """Encode One Rendition Of An Original Image, Never Upscaling"""
+    spec = settings.RECIPE_IMAGE_RENDITIONS[rendition]
+    fmt = FORMATS[spec['format']][0]
+    with _storage().open(original) as source, Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.width > spec['width']:
+            height = round(image.height * spec['width'] / image.width)
+            image = image.resize(
+                (spec['width'], max(height, 1)),
+                Image.LANCZOS
+                )
+        if fmt == 'JPEG' and image.mode != 'RGB':
+            image = image.convert('RGB')
+        output = BytesIO()
+        image.save(output, format=fmt, quality=spec['quality'])
+    return output.getvalue()
+
+
+def ensure(original, rendition):
+    """Return The Rendition Storage Name, Generating It Once If Missing"""
+    storage = _storage()
+    name = rendition_name(original, rendition)
+    if storage.exists(name):
+        return name
+    with _lock_for(name):
+        # another request may have written it while we waited
+        if storage.exists(name):
+            return name
+        saved = storage.save(name, ContentFile(render(original, rendition)))
+        if saved != name:
+            # another process won the race, keep its file
+            storage.delete(saved)
+    return name
+
+
+def generate_all(original):
+    """Eagerly Create Every Configured Rendition"""
+    for rendition in settings.RECIPE_IMAGE_RENDITIONS:
+        ensure(original, rendition)
+
+
+def delete_all(original):
+    """Remove The Renditions Of A Replaced Original"""
+    storage = _storage()
+    for rendition in settings.RECIPE_IMAGE_RENDITIONS:
+        storage.delete(rendition_name(original, rendition))
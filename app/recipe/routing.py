@@ -0,0 +1,67 @@
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+from core.db import routers
+
+
+class ReplicaReadMixin:
+    """Serve Safe Requests From A Replica Unless The User Just Wrote
+
+    A write keeps the user's reads on the primary for DB_STICKY_SECONDS,
+    so they read their own writes whatever the replication lag. The
+    window travels in a signed DB_STICKY_COOKIE, which any worker can
+    check, and in the DB_STICKY_CACHE_ALIAS cache under the user id,
+    which covers clients that drop cookies. Set up after authentication,
+    which stays on the primary.
+    """
+    sticky_salt = 'recipe.routing.sticky'
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and not self.is_sticky(request):
+            routers.route_reads(routers.choose_replica())
+        else:
+            routers.route_reads(None)
+
+    def is_sticky(self, request):
+        """Whether The Requesting User Wrote Within The Window"""
+        if settings.DB_STICKY_SECONDS <= 0:
+            return False
+        pinned = request.get_signed_cookie(
+            settings.DB_STICKY_COOKIE,
+            default=None,
+            salt=self.sticky_salt,
+            max_age=settings.DB_STICKY_SECONDS
+            )
+        if pinned is not None and pinned == str(request.user.pk):
+            return True
+        return routers.is_sticky(request.user.pk)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        try:
+            response = super().finalize_response(
+                request,
+                response,
+                *args,
+                **kwargs
+                )
+            if request.method not in SAFE_METHODS and \
+                    request.user.is_authenticated and \
+                    settings.DB_STICKY_SECONDS > 0:
+                routers.stick(request.user.pk)
+                response.set_signed_cookie(
+                    settings.DB_STICKY_COOKIE,
+                    str(request.user.pk),
+                    salt=self.sticky_salt,
+                    max_age=settings.DB_STICKY_SECONDS,
+                    httponly=True
+                    )
+            if response.streaming and routers.read_alias() is not None:
+                # read after the view returns
+                response.streaming_content = routers.pinned(
+                    response.streaming_content,
+                    routers.read_alias()
+                    )
+        finally:
+            routers.route_reads(None)
+        return response
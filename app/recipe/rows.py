@@ -0,0 +1,179 @@
+from collections import defaultdict
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from recipe.renderers import FastJSONRenderer
+
+# fields whose to_representation returns database values unchanged
+PASSTHROUGH_FIELDS = (serializers.IntegerField, serializers.CharField)
+
+
+class ValuesReader:
+    """Represent values() Rows The Way A Read Only Serializer Would
+
+    Built from a serializer instance, so sparse fields and expanded
+    relations follow it. No model instances, field binding or OrderedDict
+    per row: plain columns are copied, others go through their field's
+    to_representation, and m2m relations come from one through table read
+    per relation, in related id order like the prefetches of the views.
+    supported is False when a field can not be read this way.
+    """
+
+    def __init__(self, serializer):
+        self.model = serializer.Meta.model
+        self.pk = self.model._meta.pk.attname
+        self.plan = []
+        self.columns = {self.pk}
+        self.relations = {}
+        self.supported = True
+        method_columns = getattr(serializer, 'row_method_columns', {})
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                if name not in method_columns:
+                    self.supported = False
+                    continue
+                self.columns.update(method_columns[name])
+                method = getattr(serializer, field.method_name)
+                self.plan.append((name, 'method', method))
+            elif isinstance(field, serializers.ManyRelatedField):
+                child = field.child_relation
+                if not isinstance(
+                        child, serializers.PrimaryKeyRelatedField) or \
+                        child.pk_field is not None:
+                    self.supported = False
+                    continue
+                self._add_relation(name, field.source, None)
+            elif isinstance(field, serializers.ListSerializer):
+                nested = ValuesReader(field.child)
+                if nested.relations or any(
+                        kind == 'method' for _, kind, _ in nested.plan):
+                    self.supported = False
+                    continue
+                self._add_relation(name, field.source, nested)
+            else:
+                self._add_column(name, field)
+
+    def _model_field(self, source):
+        """Concrete Model Field Behind A Serializer Source, Or None"""
+        try:
+            return self.model._meta.get_field(source)
+        except FieldDoesNotExist:
+            return None
+
+    def _add_column(self, name, field):
+        model_field = self._model_field(field.source)
+        if model_field is None or not model_field.concrete or \
+                model_field.is_relation or \
+                isinstance(model_field, models.FileField):
+            self.supported = False
+            return
+        self.columns.add(model_field.attname)
+        if isinstance(field, PASSTHROUGH_FIELDS):
+            self.plan.append((name, 'copy', model_field.attname))
+        else:
+            self.plan.append(
+                (name, 'convert', (model_field.attname, field))
+                )
+
+    def _add_relation(self, name, source, nested):
+        model_field = self._model_field(source)
+        if not isinstance(model_field, models.ManyToManyField):
+            self.supported = False
+            return
+        self.relations[name] = (model_field, nested)
+        self.plan.append((name, 'related', name))
+
+    def _related(self, name, ids):
+        """Map Of Row id To The Represented Related Objects"""
+        model_field, nested = self.relations[name]
+        through = model_field.remote_field.through
+        own = model_field.m2m_column_name()
+        other = model_field.m2m_reverse_name()
+        related = defaultdict(list)
+        links = through.objects.filter(**{f'{own}__in': ids}).order_by(
+            own,
+            other
+            )
+        if nested is None:
+            for row_id, related_id in links.values_list(own, other):
+                related[row_id].append(related_id)
+            return related
+        # nested rows come through the join to the related table
+        prefix = model_field.m2m_reverse_field_name()
+        columns = sorted(nested.columns)
+        rows = links.values_list(
+            own,
+            *[f'{prefix}__{column}' for column in columns]
+            )
+        for row_id, *values in rows:
+            related[row_id].append(
+                nested.represent_row(dict(zip(columns, values)), {})
+                )
+        return related
+
+    def represent_row(self, row, related):
+        """Output Of The Serializer For One Row"""
+        item = {}
+        for name, kind, arg in self.plan:
+            if kind == 'copy':
+                item[name] = row[arg]
+            elif kind == 'convert':
+                column, field = arg
+                value = row[column]
+                item[name] = None if value is None else \
+                    field.to_representation(value)
+            elif kind == 'related':
+                item[name] = related[arg].get(row[self.pk], [])
+            else:
+                item[name] = arg(SimpleNamespace(**row))
+        return item
+
+    def represent(self, rows):
+        """Output Of The Serializer With many=True For These Rows"""
+        ids = [row[self.pk] for row in rows]
+        related = {
+            name: self._related(name, ids) if ids else {}
+            for name in self.relations
+            }
+        return [self.represent_row(row, related) for row in rows]
+
+
+class FastListMixin:
+    """Serve list From values() Rows When The Serializer Allows It
+
+    Turned off by RECIPE_API_FAST_LIST, which falls back to the
+    serializer. Either way the rendered bytes are the same.
+    """
+    renderer_classes = (FastJSONRenderer,) + tuple(
+        renderer for renderer in
+        api_settings.DEFAULT_RENDERER_CLASSES
+        if renderer.format != 'json'
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not settings.RECIPE_API_FAST_LIST:
+            return super().list(request, *args, **kwargs)
+        reader = ValuesReader(self.get_serializer())
+        if not reader.supported:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        columns = set(reader.columns)
+        if self.paginator is not None:
+            # the paginator builds its cursors from the ordering values
+            columns.update(
+                field.lstrip('-')
+                for field in self.paginator.get_ordering(self)
+                )
+        rows = queryset.prefetch_related(None).values(*columns)
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(reader.represent(list(rows)))
+        return self.get_paginated_response(reader.represent(page))
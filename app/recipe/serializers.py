@@ -1,48 +1,173 @@
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+from rest_framework.settings import api_settings
+from core import bulk, signals
 from core.models import (
     Tag,
     Ingredients,
     Recipe
     )
+from recipe.uploads import StagedImage
 
 
-class TagSerializer(serializers.ModelSerializer):
+class BatchManyRelatedField(serializers.ManyRelatedField):
+    """Resolve A List Of Primary Keys With A Single Query"""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        child = self.child_relation
+        pks = []
+        for item in data:
+            if isinstance(item, bool):
+                child.fail('incorrect_type', data_type=type(item).__name__)
+            try:
+                pks.append(int(item))
+            except (TypeError, ValueError):
+                child.fail('incorrect_type', data_type=type(item).__name__)
+        pks = list(dict.fromkeys(pks))
+        found = child.get_queryset().in_bulk(pks)
+        missing = [pk for pk in pks if pk not in found]
+        if missing:
+            # every unknown id at once rather than the first one only
+            raise serializers.ValidationError([
+                child.error_messages['does_not_exist'].format(pk_value=pk)
+                for pk in missing
+                ])
+        return [found[pk] for pk in pks]
+
+
+class UserPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary Key Field Limited To Objects Of The Requesting User"""
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BatchManyRelatedField(**list_kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        request = self.context.get('request')
+        if request is None:
+            return queryset
+        return queryset.filter(user=request.user)
+
+
+class NamedSerializerMixin:
+    """Names Are Unique Per User Regardless Of Case
+
+    Creating a name the user already has returns the existing object,
+    renaming onto another object's name is rejected.
+    """
+
+    def validate_name(self, value):
+        if self.instance is None:
+            return value
+        request = self.context.get('request')
+        user = self.instance.user if request is None else request.user
+        clash = self.Meta.model.objects.filter(
+            user=user,
+            name__iexact=value
+            ).exclude(pk=self.instance.pk)
+        if clash.exists():
+            raise serializers.ValidationError(
+                f'{self.Meta.model._meta.verbose_name} with this name '
+                'already exists.'
+                )
+        return value
+
+    def create(self, validated_data):
+        name = validated_data['name']
+        return self.Meta.model.objects.get_or_create_many(
+            validated_data['user'],
+            [name]
+            )[name]
+
+
+class TagSerializer(NamedSerializerMixin, serializers.ModelSerializer):
     """Serializer For Tag Objects"""
 
     class Meta:
         model = Tag
         fields = (
             'id',
-            'name'
+            'name',
+            'recipe_count'
             )
         read_ony_fields = ('id',)
 
 
-class IngredientsSerializer(serializers.ModelSerializer):
+class IngredientsSerializer(
+        NamedSerializerMixin,
+        serializers.ModelSerializer
+        ):
     """Serializer For Ingredients Model And Objects"""
 
     class Meta:
         model = Ingredients
         fields = (
             'id',
-            'name'
+            'name',
+            'recipe_count'
             )
         red_only_fields = (
             'id',
             )
 
 
-class RecipeSerializers(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """Keep Only The Requested fields And Nest Only The expand Relations
+
+    Both default to None, which leaves the serializer as declared.
+    """
+    # relation name -> serializer used when the relation is expanded
+    expandable = {}
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        if expand is None:
+            return
+        for name, nested in self.expandable.items():
+            if name not in self.fields:
+                continue
+            if name in expand:
+                self.fields[name] = nested(many=True, read_only=True)
+            else:
+                self.fields[name] = serializers.PrimaryKeyRelatedField(
+                    many=True,
+                    read_only=True
+                    )
+
+
+class RecipeSerializers(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer For Recipe Model And Objects"""
     # ingredients and tag are not recipe model its primary key Fields so
-    ingredients = serializers.PrimaryKeyRelatedField(
+    ingredients = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Ingredients.objects.all()
         )
-    tag = serializers.PrimaryKeyRelatedField(
+    tag = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all()
         )
+    renditions = serializers.SerializerMethodField()
+    expandable = {
+        'ingredients': IngredientsSerializer,
+        'tag': TagSerializer
+        }
+    # columns get_renditions reads, for recipe.rows.ValuesReader
+    row_method_columns = {'renditions': ('id', 'image')}
 
     class Meta:
         model = Recipe
@@ -53,26 +178,195 @@ class RecipeSerializers(serializers.ModelSerializer):
             'price',
             'link',
             'ingredients',
-            'tag'
+            'tag',
+            'renditions'
             )
         read_only_fields = (
             'id',
             )
 
+    def get_renditions(self, recipe):
+        """Map Of Rendition Name To Its Url, Empty Without An Image"""
+        if not recipe.image:
+            return {}
+        request = self.context.get('request')
+        urls = {}
+        for rendition in settings.RECIPE_IMAGE_RENDITIONS:
+            url = reverse(
+                'recipe:recipe-image-rendition',
+                args=[recipe.id, rendition]
+                )
+            urls[rendition] = request.build_absolute_uri(url) \
+                if request else url
+        return urls
+
+    def save(self, **kwargs):
+        """Save With One Version Bump, Change Row And Reindex"""
+        # the row and each of its relations would otherwise send their own
+        with signals.batched():
+            return super().save(**kwargs)
+
 
 class RecipeDetailSerializer(RecipeSerializers):
     """Serializer For Recipe Detail View """
     ingredients = IngredientsSerializer(many=True, read_only=True)
     tag = TagSerializer(many=True, read_only=True)
 
+    class Meta(RecipeSerializers.Meta):
+        fields = RecipeSerializers.Meta.fields + (
+            'image',
+            'image_status'
+            )
+        read_only_fields = (
+            'id',
+            'image',
+            'image_status'
+            )
+
+
+class RecipeBulkListSerializer(serializers.ListSerializer):
+    """Validate And Write A Batch Of Recipes With A Fixed Query Count"""
+    relations = bulk.RECIPE_RELATIONS
+    related_models = {
+        'ingredients': Ingredients,
+        'tag': Tag
+        }
+    # bulk_update skips auto_now, create sets updated_at itself
+    update_fields = (
+        'title',
+        'time_minute',
+        'price',
+        'link',
+        'updated_at'
+        )
+
+    def to_internal_value(self, data):
+        """Check Every Related id Of The Batch With One Query Per Model"""
+        if not isinstance(data, list):
+            return super().to_internal_value(data)
+        if len(data) > settings.RECIPE_API_MAX_BULK_SIZE:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    f'At most {settings.RECIPE_API_MAX_BULK_SIZE} '
+                    f'recipes per request'
+                    ]
+                })
+        # field errors and unknown ids are reported together per item
+        items, errors = [], []
+        for item in data:
+            try:
+                items.append(self.child.run_validation(item))
+                errors.append({})
+            except serializers.ValidationError as exc:
+                items.append({})
+                errors.append(dict(exc.detail))
+
+        user = self.context['request'].user
+        known = {
+            relation: self._owned_ids(model, user, items, relation)
+            for relation, model in self.related_models.items()
+            }
+        known['id'] = self._owned_ids(Recipe, user, items, 'id')
+        seen = set()
+        for item, error in zip(items, errors):
+            if 'id' in item and item['id'] not in known['id']:
+                error['id'] = ['Recipe does not exist.']
+            elif 'id' in item and item['id'] in seen:
+                # a second replace would write the same links twice
+                error['id'] = ['Recipe appears more than once in the batch.']
+            seen.add(item.get('id'))
+            for relation in self.relations:
+                missing = [
+                    pk for pk in item.get(relation, [])
+                    if pk not in known[relation]
+                    ]
+                if missing:
+                    error[relation] = [
+                        f'Invalid pk "{pk}" - object does not exist.'
+                        for pk in missing
+                        ]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
+
+    def _owned_ids(self, model, user, items, key):
+        """Subset Of The Submitted ids That Belong To user"""
+        ids = set()
+        for item in items:
+            value = item.get(key, [])
+            ids.update(value if isinstance(value, list) else [value])
+        if not ids:
+            return set()
+        return set(model.objects.filter(
+            user=user,
+            id__in=ids
+            ).values_list('id', flat=True))
+
+    def create(self, validated_data):
+        """Insert New Recipes, Replace Those With An id, In One Transaction"""
+        links = [
+            {relation: item.pop(relation, []) for relation in self.relations}
+            for item in validated_data
+            ]
+        recipes = [Recipe(**item) for item in validated_data]
+        created = [recipe for recipe in recipes if recipe.id is None]
+        updated = [recipe for recipe in recipes if recipe.id is not None]
+        now = timezone.now()
+        for recipe in updated:
+            recipe.updated_at = now
+        # the saves of insert_recipes on backends without bulk ids join
+        # recipes_written in one batch instead of repeating it
+        with signals.batched():
+            bulk.insert_recipes(created)
+            if updated:
+                Recipe.objects.bulk_update(updated, self.update_fields)
+                bulk.unlink_recipes([recipe.id for recipe in updated])
+            bulk.link_recipes(recipes, links)
+            if recipes:
+                # bulk writes send no signals
+                bulk.recipes_written(
+                    recipes[0].user_id,
+                    [recipe.id for recipe in recipes]
+                    )
+        return recipes
+
+
+class RecipeBulkSerializer(RecipeSerializers):
+    """Bulk Recipe Item, An id Replaces That Recipe Instead Of Creating"""
+    id = serializers.IntegerField(required=False)
+    # plain ids, the list serializer resolves them for the whole batch
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False
+        )
+    tag = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False
+        )
+
+    class Meta(RecipeSerializers.Meta):
+        list_serializer_class = RecipeBulkListSerializer
+
+
+class StagedImageField(serializers.ImageField):
+    """Image Field Accepting Uploads Already Checked While Streaming"""
+
+    def to_internal_value(self, data):
+        if isinstance(data, StagedImage):
+            # header was sniffed by the upload handler, skip a full decode
+            return data
+        return super().to_internal_value(data)
+
 
 class RecipeImageSerializer(serializers.ModelSerializer):
     """Serializer For Upload Image"""
+    image = StagedImageField()
 
     class Meta:
         model = Recipe
         fields = (
             'id',
-            'image'
+            'image',
+            'image_status'
             )
-        read_only_fields = ('id',)
+        read_only_fields = ('id', 'image_status')
@@ -0,0 +1,152 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from core.models import Change, ChangeHorizon
+
+
+class TokenExpired(APIException):
+    """The Changes After A Token Were Pruned From The Log"""
+    status_code = status.HTTP_410_GONE
+    default_detail = 'Sync token too old, start again without since.'
+    default_code = 'sync_token_expired'
+
+
+def encode_token(position):
+    """Opaque Sync Token For A Position In The Change Log"""
+    return base64.urlsafe_b64encode(str(position).encode()).decode()
+
+
+def decode_token(token):
+    """Change Log Position Of A Token Issued By encode_token"""
+    try:
+        position = int(base64.urlsafe_b64decode(token.encode()).decode())
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValidationError({'since': ['Invalid sync token.']})
+    if position < 0:
+        raise ValidationError({'since': ['Invalid sync token.']})
+    return position
+
+
+def encode_cursor(position, section, after):
+    """Opaque Cursor Of The Next Page Of A Full Copy"""
+    data = json.dumps([position, section, after], separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(position, section, after) Of A Cursor Issued By encode_cursor"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        position, section, after = values
+        if not all(isinstance(value, int) and value >= 0
+                   for value in values):
+            raise ValueError
+    except (binascii.Error, UnicodeError, TypeError, ValueError):
+        raise ValidationError({'cursor': ['Invalid cursor.']})
+    return position, section, after
+
+
+def settled(user_id, start, position):
+    """Highest Position In (start, position] Safe To Hand Out As A Token
+
+    Change ids are taken when a row is inserted but become visible when
+    the transaction commits, so a fresh change may still be preceded by
+    an uncommitted one with a lower id.
+    """
+    cutoff = timezone.now() - timedelta(
+        seconds=settings.RECIPE_SYNC_SETTLE_SECONDS
+        )
+    unsettled = Change.objects.filter(
+        user_id=user_id,
+        id__gt=start,
+        id__lte=position,
+        created_at__gt=cutoff
+        ).order_by('id').values_list('id', flat=True).first()
+    return position if unsettled is None else max(unsettled - 1, start)
+
+
+def head(user_id):
+    """Position Of The Latest Change Of user_id
+
+    Never before the pruning horizon, a full copy holds everything
+    pruned so its token may start after it.
+    """
+    latest = Change.objects.filter(user_id=user_id).order_by(
+        '-id'
+        ).values_list('id', flat=True).first() or 0
+    return max(latest, ChangeHorizon.current())
+
+
+class ChangeSet:
+    """Latest State Of Every Object Changed After A Position
+
+    Reads at most RECIPE_SYNC_MAX_CHANGES log rows through the
+    (user_id, id) index, so the work follows the amount of change and
+    not the size of the collection.
+    """
+
+    def __init__(self, user_id, position):
+        if position < ChangeHorizon.current():
+            raise TokenExpired()
+        limit = settings.RECIPE_SYNC_MAX_CHANGES
+        rows = list(Change.objects.filter(
+            user_id=user_id,
+            id__gt=position
+            ).order_by('id').values_list(
+            'id',
+            'kind',
+            'object_id',
+            'deleted'
+            )[:limit + 1])
+        self.more = len(rows) > limit
+        rows = rows[:limit]
+        # later entries win, an object created then deleted is a tombstone
+        latest = OrderedDict()
+        for _, kind, object_id, deleted in rows:
+            latest.pop((kind, object_id), None)
+            latest[(kind, object_id)] = deleted
+        self.changed = {kind: [] for kind, _ in Change.KIND_CHOICES}
+        self.deleted = {kind: [] for kind, _ in Change.KIND_CHOICES}
+        for (kind, object_id), deleted in latest.items():
+            (self.deleted if deleted else self.changed)[kind].append(
+                object_id
+                )
+        last = rows[-1][0] if rows else position
+        self.position = settled(user_id, position, last)
+        # the rest waits for the unsettled changes anyway
+        self.more = self.more and self.position == last
+
+
+class FullCopy:
+    """One Page Of A Whole Collection, Section After Section
+
+    Each section is walked by id from where the last page stopped, so
+    every page is an index range scan however deep the copy goes. At
+    most RECIPE_SYNC_PAGE_SIZE rows are read, next is the (section,
+    after) to continue from or None on the last page.
+    """
+
+    def __init__(self, querysets, section=0, after=0):
+        limit = settings.RECIPE_SYNC_PAGE_SIZE
+        self.rows = [[] for _ in querysets]
+        self.next = None
+        for index in range(section, len(querysets)):
+            start = after if index == section else 0
+            # one row past the limit tells if the copy goes on
+            rows = list(querysets[index].order_by('id').filter(
+                id__gt=start
+                )[:limit + 1])
+            if len(rows) > limit:
+                self.rows[index] = rows[:limit]
+                self.next = (index, rows[limit - 1].id if limit else start)
+                return
+            self.rows[index] = rows
+            limit -= len(rows)
@@ -0,0 +1,110 @@
+import json
+import threading
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TransactionTestCase
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from core.models import Recipe, Tag
+from recipe.asgi import ReadPoolASGIHandler
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+class ReadPoolASGIHandlerTest(TransactionTestCase):
+    """Test Reads Are Served On The Read Pool"""
+
+    def setUp(self):
+        self.user = get_user_model().object.create_user(
+            email='test@gmail.com',
+            password='test_pass@123'
+            )
+        self.token = Token.objects.create(user=self.user)
+        self.handler = ReadPoolASGIHandler()
+
+    def tearDown(self):
+        if self.handler._executor is not None:
+            self.handler._executor.shutdown()
+
+    def request(self, method, path, body=b''):
+        """Run One Request Through The Handler, Return (status, body)"""
+        scope = {
+            'type': 'http',
+            'method': method,
+            'path': path,
+            'query_string': b'',
+            'root_path': '',
+            'scheme': 'http',
+            'server': ('testserver', 80),
+            'headers': [
+                (b'authorization', f'Token {self.token.key}'.encode()),
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode()),
+                ],
+            }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': body}
+
+        async def send(message):
+            messages.append(message)
+
+        async_to_sync(self.handler)(scope, receive, send)
+        return messages[0]['status'], b''.join(
+            message.get('body', b'') for message in messages[1:]
+            )
+
+    def test_reads_go_to_pool(self):
+        """Only GET And HEAD Of The Read Views Use The Pool"""
+        factory = RequestFactory()
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Soup',
+            time_minute=5,
+            price=5
+            )
+        detail = reverse('recipe:recipe-detail', args=[recipe.id])
+        for request, expected in (
+                (factory.get(RECIPE_URL), True),
+                (factory.head(detail), True),
+                (factory.get(TAGS_URL), True),
+                (factory.post(TAGS_URL), False),
+                (factory.delete(detail), False),
+                (factory.get(reverse('recipe:sync')), False),
+                (factory.get('/no/such/path/'), False)):
+            self.assertEqual(self.handler.is_read(request), expected)
+
+    def test_list_served_from_pool_thread(self):
+        """A Recipe List Is Answered By A Read Pool Thread"""
+        Recipe.objects.create(
+            user=self.user,
+            title='Soup',
+            time_minute=5,
+            price=5
+            )
+        threads = []
+        serve_read = self.handler.serve_read
+
+        def record_thread(request):
+            threads.append(threading.current_thread().name)
+            return serve_read(request)
+
+        self.handler.serve_read = record_thread
+        status, body = self.request('GET', RECIPE_URL)
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            [item['title'] for item in json.loads(body)['results']],
+            ['Soup']
+            )
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith('recipe-read'))
+
+    def test_writes_keep_default_path(self):
+        """A Tag Create Goes Through Django's Handler Path"""
+        self.handler.serve_read = None
+        status, body = self.request('POST', TAGS_URL, b'{"name": "Vegan"}')
+        self.assertEqual(status, 201)
+        self.assertTrue(Tag.objects.filter(name='Vegan').exists())
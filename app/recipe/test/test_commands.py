@@ -0,0 +1,97 @@
+from io import StringIO
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, TransactionTestCase
+from core.models import Recipe
+
+
+class ExplainApiQueriesTest(TestCase):
+    """Test The Query Plan Check Command"""
+
+    def test_api_queries_use_indexes(self):
+        """Every Api Query Shape Is Served By An Index"""
+        call_command('explain_api_queries', stdout=StringIO())
+
+    def test_sequential_scan_fails(self):
+        """A Query Without A Usable Index Fails The Command"""
+        shapes = {'recipe by title': Recipe.objects.filter(title='soup')}
+        with patch(
+                'recipe.management.commands.explain_api_queries.query_shapes',
+                return_value=shapes
+                ):
+            with self.assertRaises(CommandError):
+                call_command(
+                    'explain_api_queries',
+                    stdout=StringIO()
+                    )
+
+
+class BenchRecipeSearchTest(TestCase):
+    """Test The Search Benchmark Command"""
+
+    def test_reports_every_search(self):
+        """Each Timed Search Is Reported And Nothing Is Kept"""
+        out = StringIO()
+        call_command(
+            'bench_recipe_search',
+            recipes=50,
+            tags=5,
+            repeat=1,
+            target_ms=60000,
+            stdout=out
+            )
+        self.assertIn('common word page 2', out.getvalue())
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_missed_target_fails(self):
+        """A Search Slower Than The Target Fails The Command"""
+        with self.assertRaises(CommandError):
+            call_command(
+                'bench_recipe_search',
+                recipes=50,
+                tags=5,
+                repeat=1,
+                target_ms=0,
+                stdout=StringIO()
+                )
+
+
+class BenchListSerializationTest(TestCase):
+    """Test The List Rendering Benchmark Command"""
+
+    def test_reports_both_paths(self):
+        """Both Paths Are Timed Per Size And Nothing Is Kept"""
+        out = StringIO()
+        call_command(
+            'bench_list_serialization',
+            rows=[20, 40],
+            tags=3,
+            repeat=1,
+            stdout=out
+            )
+        self.assertEqual(out.getvalue().count('rows values'), 2)
+        self.assertFalse(Recipe.objects.exists())
+
+
+class BenchAsgiReadsTest(TransactionTestCase):
+    """Test The Read Load Test Command"""
+
+    def test_reports_each_handler(self):
+        """Every Handler Is Reported And The Dataset Is Removed"""
+        out = StringIO()
+        call_command(
+            'bench_asgi_reads',
+            recipes=20,
+            tags=3,
+            requests=12,
+            concurrency=3,
+            db_latency_ms=0,
+            host='testserver',
+            stdout=out
+            )
+        for name in ('wsgi', 'asgi', 'asgi read pool'):
+            self.assertIn(f'\n{name} ', '\n' + out.getvalue())
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(get_user_model().object.exists())
@@ -44,7 +44,7 @@ class PrivateIngredientsTest(TestCase):
         ingredients = Ingredients.objects.all().order_by('-name')
         serializer = IngredientsSerializer(ingredients, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_ingredients_for_authenticated_user(self):
         """Test That Ingredients Model Limited To Authenticated User"""
@@ -57,8 +57,8 @@ class PrivateIngredientsTest(TestCase):
         ingredients = Ingredients.objects.create(user=self.user, name='again')
         res = self.client.get(INGREDIENTS_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], ingredients.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], ingredients.name)
 
     def test_create_ingredients_successful(self):
         """Test Create Ingredients Successfully"""
@@ -95,13 +95,14 @@ class PrivateIngredientsTest(TestCase):
             user=self.user
             )
         recipe.ingredients.add(ingredient1)
+        ingredient1.refresh_from_db()
 
         res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
 
         serializer1 = IngredientsSerializer(ingredient1)
         serializer2 = IngredientsSerializer(ingredient2)
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertNotIn(serializer2.data, res.data['results'])
 
     def test_retrieve_ingredient_assigned_unique(self):
         """Test filtering ingredients by assigned returns unique items"""
@@ -123,6 +124,6 @@ class PrivateIngredientsTest(TestCase):
 
         res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
 
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
 
 
@@ -1,20 +1,44 @@
 from django.contrib.auth import get_user_model
 from django.urls import reverse
-from django.test import TestCase
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from recipe import serializers
+from recipe import images
+from recipe import renditions
+from recipe import uploads
+from recipe.caching import response_cache
+from recipe.renderers import FastJSONRenderer
+from recipe.rows import ValuesReader
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 from rest_framework import status
 from core.models import (
+    Change,
     Recipe,
     Tag,
     Ingredients)
 
+from collections import OrderedDict
+from datetime import datetime, timezone
+from django.utils.translation import gettext_lazy
+
 # image uploading
+import base64
+import json
+from decimal import Decimal
 import tempfile
 import os
+from io import BytesIO
+from unittest import skipUnless
+from unittest.mock import patch
 from PIL import Image
 
 RECIPE_URL = reverse('recipe:recipe-list')
+BULK_URL = reverse('recipe:recipe-bulk')
+EXPORT_URL = reverse('recipe:recipe-export')
 
 
 def image_upload_url(recipe_id):
@@ -22,6 +46,14 @@ def image_upload_url(recipe_id):
     return reverse('recipe:recipe-upload-image', args=[recipe_id])
 
 
+def rendition_url(recipe_id, rendition):
+    """Url Of A Resized Recipe Image"""
+    return reverse(
+        'recipe:recipe-image-rendition',
+        args=[recipe_id, rendition]
+        )
+
+
 def sample_tag(user, name='main course'):
     """To Create Return Tag With User"""
     return Tag.objects.create(user=user, name=name)
@@ -80,7 +112,7 @@ class PrivateRecipeApiTest(TestCase):
         recipes = Recipe.objects.all().order_by('-id')
         serializer = serializers.RecipeSerializers(recipes, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipes_limited_user(self):
         """Recipes Are Limited To Authenticated User"""
@@ -94,8 +126,8 @@ class PrivateRecipeApiTest(TestCase):
         recipes = Recipe.objects.filter(user=self.user)
         serializer = serializers.RecipeSerializers(recipes, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipe_detail_view(self):
         """Test For Recipe Detail View"""
@@ -193,7 +225,945 @@ class PrivateRecipeApiTest(TestCase):
         tag = recipe.tag.all()
         self.assertEqual(len(tag), 0)
 
+    def test_create_recipe_with_relations_constant_queries(self):
+        """Creating A Recipe Bumps, Logs And Reindexes It Once"""
+        tag = sample_tag(user=self.user)
+        ingredient = sample_ingredients(user=self.user)
+        payload = {
+            'title': 'Test recipe with relations',
+            'tag': [tag.id],
+            'ingredients': [ingredient.id],
+            'time_minute': 30,
+            'price': 10.00
+            }
+        # relation checks, insert, link and count each relation, then
+        # one bump, one change row and one reindex
+        with self.assertNumQueries(22):
+            res = self.client.post(RECIPE_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            Change.objects.filter(kind=Change.RECIPE).count(),
+            1
+            )
+
+    def test_update_recipe_with_relations_constant_queries(self):
+        """Updating A Recipe Bumps, Logs And Reindexes It Once"""
+        recipe = sample_recipe(user=self.user)
+        recipe.tag.add(sample_tag(user=self.user))
+        recipe.ingredients.add(sample_ingredients(user=self.user))
+        payload = {
+            'title': 'updated',
+            'tag': [sample_tag(user=self.user, name='new tag').id],
+            'ingredients': [
+                sample_ingredients(user=self.user, name='new').id
+                ],
+            'time_minute': 10,
+            'price': 12.0
+            }
+        Change.objects.all().delete()
+        with self.assertNumQueries(29):
+            res = self.client.put(detail_url(recipe.id), payload)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(Change.objects.count(), 1)
+
+    def _sample_recipes_with_relations(self, count, start=0):
+        """Create Recipes Each Linked To A Tag And An Ingredient"""
+        for i in range(start, start + count):
+            recipe = sample_recipe(user=self.user, title=f'recipe {i}')
+            recipe.tag.add(sample_tag(user=self.user, name=f'tag {i}'))
+            recipe.ingredients.add(
+                sample_ingredients(user=self.user, name=f'ingredient {i}')
+                )
+
+    def test_list_recipes_constant_queries(self):
+        """Recipe List Query Count Does Not Grow With Number Of Recipes"""
+        self._sample_recipes_with_relations(2)
+        # collection version, recipes, ingredients, tags
+        with self.assertNumQueries(4):
+            res = self.client.get(RECIPE_URL)
+        self.assertEqual(len(res.data['results']), 2)
+
+        self._sample_recipes_with_relations(10, start=2)
+        with self.assertNumQueries(4):
+            res = self.client.get(RECIPE_URL)
+        self.assertEqual(len(res.data['results']), 12)
+
+    def test_recipe_detail_constant_queries(self):
+        """Recipe Detail Query Count Does Not Grow With Relations"""
+        recipe = sample_recipe(user=self.user)
+        for i in range(5):
+            recipe.tag.add(sample_tag(user=self.user, name=f'tag {i}'))
+            recipe.ingredients.add(
+                sample_ingredients(user=self.user, name=f'ingredient {i}')
+                )
+        with self.assertNumQueries(4):
+            res = self.client.get(detail_url(recipe.id))
+        self.assertEqual(len(res.data['tag']), 5)
+        self.assertEqual(len(res.data['ingredients']), 5)
+
+    def test_recipes_paginated_by_cursor(self):
+        """Following next Links Returns Every Recipe Once, Newest First"""
+        recipes = [
+            sample_recipe(user=self.user, title=f'recipe {i}')
+            for i in range(5)
+            ]
+        seen = []
+        res = self.client.get(RECIPE_URL, {'page_size': 2})
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data['results']), 2)
+            seen.extend(item['id'] for item in res.data['results'])
+            if not res.data['next']:
+                break
+            res = self.client.get(res.data['next'])
+        self.assertEqual(seen, [recipe.id for recipe in reversed(recipes)])
+
+    def test_recipes_previous_link(self):
+        """previous Link Returns The Page Before The Current One"""
+        for i in range(4):
+            sample_recipe(user=self.user, title=f'recipe {i}')
+        first = self.client.get(RECIPE_URL, {'page_size': 2})
+        self.assertIsNone(first.data['previous'])
+        second = self.client.get(first.data['next'])
+        res = self.client.get(second.data['previous'])
+        self.assertEqual(res.data['results'], first.data['results'])
+
+    @override_settings(RECIPE_API_MAX_PAGE_SIZE=3)
+    def test_recipes_page_size_capped(self):
+        """Requested Page Size Is Capped By Settings"""
+        for i in range(5):
+            sample_recipe(user=self.user, title=f'recipe {i}')
+        res = self.client.get(RECIPE_URL, {'page_size': 100})
+        self.assertEqual(len(res.data['results']), 3)
+        self.assertIsNotNone(res.data['next'])
+
+    def test_recipes_invalid_cursor(self):
+        """Malformed Cursor Returns Not Found"""
+        res = self.client.get(RECIPE_URL, {'cursor': 'not-a-cursor'})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_create_recipe_tag_validation_single_query(self):
+        """Submitted Tag ids Are Validated With One Query"""
+        tags = [
+            sample_tag(user=self.user, name=f'tag {i}') for i in range(10)
+            ]
+        payload = {
+            'title': 'Many tags',
+            'ingredients': [],
+            'time_minute': 10,
+            'price': 5.00,
+            }
+        with CaptureQueriesContext(connection) as one:
+            self.client.post(
+                RECIPE_URL,
+                dict(payload, tag=[tags[0].id]),
+                format='json'
+                )
+        with CaptureQueriesContext(connection) as many:
+            res = self.client.post(
+                RECIPE_URL,
+                dict(payload, tag=[tag.id for tag in tags]),
+                format='json'
+                )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(one), len(many))
+
+    def test_create_recipe_other_users_tag(self):
+        """Tags Of Another User Are Rejected With Every Missing id"""
+        other = get_user_model().object.create_user(
+            'other7@gmail.com',
+            'test@123'
+            )
+        foreign = [sample_tag(user=other, name=f'x {i}') for i in range(2)]
+        payload = {
+            'title': 'Foreign tags',
+            'tag': [tag.id for tag in foreign],
+            'ingredients': [],
+            'time_minute': 10,
+            'price': 5.00,
+            }
+        res = self.client.post(RECIPE_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(res.data['tag']), 2)
+        self.assertFalse(Recipe.objects.exists())
+
+
+class RecipeConditionalGetTest(TestCase):
+    """Test ETag And Last-Modified Handling Of Recipe Reads"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().object.create_user(
+            'etag@gmail.com',
+            'etag@123'
+            )
+        self.client.force_authenticate(self.user)
+        self.recipe = sample_recipe(user=self.user)
+
+    def test_list_not_modified(self):
+        """Matching If-None-Match Answers 304 With One Query"""
+        res = self.client.get(RECIPE_URL)
+        self.assertIn('ETag', res)
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                RECIPE_URL,
+                HTTP_IF_NONE_MATCH=res['ETag']
+                )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b'')
+
+    def test_list_modified_after_write(self):
+        """Any Write To The Collection Changes The ETag"""
+        etag = self.client.get(RECIPE_URL)['ETag']
+        self.recipe.tag.add(sample_tag(user=self.user))
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_etag_depends_on_query(self):
+        """Different Filters Have Different Validators"""
+        etag = self.client.get(RECIPE_URL)['ETag']
+        res = self.client.get(RECIPE_URL, {'tag': '1'})
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_other_users_write_keeps_etag(self):
+        """Writes By Another User Do Not Invalidate The Collection"""
+        etag = self.client.get(RECIPE_URL)['ETag']
+        other = get_user_model().object.create_user(
+            'etag_other@gmail.com',
+            'etag@123'
+            )
+        sample_recipe(user=other)
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_if_modified_since(self):
+        """Detail Honours If-Modified-Since"""
+        url = detail_url(self.recipe.id)
+        res = self.client.get(url)
+        res = self.client.get(
+            url,
+            HTTP_IF_MODIFIED_SINCE=res['Last-Modified']
+            )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_delete_changes_etag(self):
+        """Deleting A Recipe Changes The ETag"""
+        etag = self.client.get(RECIPE_URL)['ETag']
+        self.client.delete(detail_url(self.recipe.id))
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_bulk_write_changes_etag(self):
+        """Bulk Writes Change The ETag Even Without Signals"""
+        etag = self.client.get(RECIPE_URL)['ETag']
+        self.client.post(BULK_URL, [{
+            'title': 'bulk',
+            'time_minute': 1,
+            'price': 1.0,
+            }], format='json')
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class RecipeResponseCacheTest(TestCase):
+    """Test The Per User List Response Cache"""
+
+    def setUp(self):
+        caches[settings.RECIPE_RESPONSE_CACHE_ALIAS].clear()
+        self.client = APIClient()
+        self.user = get_user_model().object.create_user(
+            'cache@gmail.com',
+            'cache@123'
+            )
+        self.client.force_authenticate(self.user)
+        self.recipe = sample_recipe(user=self.user)
+
+    def test_second_request_served_from_cache(self):
+        """Repeated List Is A Cache Hit With The Same Body"""
+        first = self.client.get(RECIPE_URL)
+        self.assertEqual(first['X-Cache'], 'MISS')
+        # only the collection version lookup
+        with self.assertNumQueries(1):
+            second = self.client.get(RECIPE_URL)
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(
+            response_cache.stats(),
+            {'hits': 1, 'misses': 1}
+            )
+
+    def test_write_invalidates_cache(self):
+        """Linking A Tag Makes The Next List A Miss"""
+        self.client.get(RECIPE_URL)
+        tag = sample_tag(user=self.user)
+        self.recipe.tag.add(tag)
+        res = self.client.get(RECIPE_URL)
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.json()['results'][0]['tag'], [tag.id])
+
+    def test_id_params_normalized(self):
+        """Id Lists In Any Order Share A Cache Entry"""
+        tag1 = sample_tag(user=self.user, name='one')
+        tag2 = sample_tag(user=self.user, name='two')
+        self.client.get(RECIPE_URL, {'tag': f'{tag1.id},{tag2.id}'})
+        res = self.client.get(RECIPE_URL, {'tag': f'{tag2.id},{tag1.id}'})
+        self.assertEqual(res['X-Cache'], 'HIT')
+        res = self.client.get(RECIPE_URL, {'tag': f'{tag1.id}'})
+        self.assertEqual(res['X-Cache'], 'MISS')
+
+    def test_users_do_not_share_entries(self):
+        """Another User's Identical Request Is A Miss"""
+        self.client.get(RECIPE_URL)
+        other = get_user_model().object.create_user(
+            'cache_other@gmail.com',
+            'cache@123'
+            )
+        self.client.force_authenticate(other)
+        res = self.client.get(RECIPE_URL)
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.json()['results'], [])
+
+    def test_file_based_backend(self):
+        """The Cache Works On A File Based Backend"""
+        with tempfile.TemporaryDirectory() as location:
+            backend = {
+                'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': location,
+                }
+            with override_settings(CACHES={
+                    'default': settings.CACHES['default'],
+                    'files': backend,
+                    }, RECIPE_RESPONSE_CACHE_ALIAS='files'):
+                self.client.get(RECIPE_URL)
+                res = self.client.get(RECIPE_URL)
+                self.assertEqual(res['X-Cache'], 'HIT')
+                sample_recipe(user=self.user)
+                res = self.client.get(RECIPE_URL)
+                self.assertEqual(res['X-Cache'], 'MISS')
+                self.assertEqual(len(res.json()['results']), 2)
+
+    @override_settings(RECIPE_RESPONSE_CACHE_ALIAS=None)
+    def test_cache_disabled(self):
+        """No Alias Means No Caching"""
+        self.client.get(RECIPE_URL)
+        res = self.client.get(RECIPE_URL)
+        self.assertNotIn('X-Cache', res)
+
+
+class RecipeBulkApiTest(TestCase):
+    """Test Bulk Recipe Create And Replace"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().object.create_user(
+            'bulk@gmail.com',
+            'bulk@123'
+            )
+        self.client.force_authenticate(self.user)
+        self.tag = sample_tag(user=self.user)
+        self.ingredient = sample_ingredients(user=self.user)
+
+    def _payload(self, count):
+        """Bulk Payload Of count Recipes Linked To The Sample Relations"""
+        return [
+            {
+                'title': f'bulk {i}',
+                'time_minute': i,
+                'price': 2.5,
+                'tag': [self.tag.id],
+                'ingredients': [self.ingredient.id],
+                }
+            for i in range(count)
+            ]
+
+    def test_bulk_create_recipes(self):
+        """Every Item Is Created With Its Relations"""
+        res = self.client.post(BULK_URL, self._payload(3), format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [item['title'] for item in res.data],
+            ['bulk 0', 'bulk 1', 'bulk 2']
+            )
+        recipes = Recipe.objects.filter(user=self.user)
+        self.assertEqual(recipes.count(), 3)
+        for recipe in recipes:
+            self.assertEqual(list(recipe.tag.all()), [self.tag])
+            self.assertEqual(list(recipe.ingredients.all()), [self.ingredient])
+
+    @patch.object(
+        connection.features,
+        'can_return_rows_from_bulk_insert',
+        False
+        )
+    def test_bulk_create_fallback_writes_once(self):
+        """Saved One By One, Each Recipe Still Gets A Single Change Row"""
+        version = self.client.get(RECIPE_URL)['ETag']
+        res = self.client.post(BULK_URL, self._payload(3), format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        changes = Change.objects.filter(kind=Change.RECIPE)
+        self.assertEqual(
+            sorted(changes.values_list('object_id', flat=True)),
+            sorted(item['id'] for item in res.data)
+            )
+        self.assertNotEqual(self.client.get(RECIPE_URL)['ETag'], version)
+
+    def test_bulk_ignores_list_filters(self):
+        """List Filters In The Query String Do Not Drop Written Rows"""
+        res = self.client.post(
+            f'{BULK_URL}?search=nothing&tag={self.tag.id + 1}',
+            self._payload(2),
+            format='json'
+            )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [item['title'] for item in res.data],
+            ['bulk 0', 'bulk 1']
+            )
+
+    @skipUnless(
+        connection.features.can_return_rows_from_bulk_insert,
+        'backend can not return ids from bulk inserts'
+        )
+    def test_bulk_create_constant_queries(self):
+        """Query Count Does Not Grow With The Batch Size"""
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(BULK_URL, self._payload(2), format='json')
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(BULK_URL, self._payload(20), format='json')
+        self.assertEqual(len(small), len(large))
 
+    def test_bulk_replace_recipes(self):
+        """Items With An id Replace The Existing Recipe"""
+        recipe = sample_recipe(user=self.user, title='old')
+        recipe.tag.add(self.tag)
+        payload = [{
+            'id': recipe.id,
+            'title': 'new',
+            'time_minute': 5,
+            'price': 1.0,
+            'ingredients': [self.ingredient.id],
+            }]
+        updated_at = recipe.updated_at
+        res = self.client.post(BULK_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'new')
+        self.assertGreater(recipe.updated_at, updated_at)
+        self.assertEqual(recipe.tag.count(), 0)
+        self.assertEqual(list(recipe.ingredients.all()), [self.ingredient])
+
+    def test_bulk_per_item_errors(self):
+        """Invalid Items Are Reported By Position And Nothing Is Saved"""
+        other = get_user_model().object.create_user(
+            'bulk_other@gmail.com',
+            'bulk@123'
+            )
+        foreign_tag = sample_tag(user=other)
+        foreign_recipe = sample_recipe(user=other)
+        payload = self._payload(4)
+        payload[1]['tag'] = [foreign_tag.id]
+        del payload[2]['title']
+        payload[3]['id'] = foreign_recipe.id
+        res = self.client.post(BULK_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('tag', res.data[1])
+        self.assertIn('title', res.data[2])
+        self.assertIn('id', res.data[3])
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+
+    def test_bulk_repeated_id_rejected(self):
+        """An id Replaced Twice In One Batch Is An Error On The Repeat"""
+        recipe = sample_recipe(user=self.user, title='old')
+        payload = self._payload(3)
+        payload[0]['id'] = recipe.id
+        payload[2]['id'] = recipe.id
+        res = self.client.post(BULK_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertEqual(res.data[1], {})
+        self.assertIn('id', res.data[2])
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'old')
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 1)
+
+    @override_settings(RECIPE_API_MAX_BULK_SIZE=2)
+    def test_bulk_size_limited(self):
+        """Batches Over The Configured Size Are Rejected"""
+        res = self.client.post(BULK_URL, self._payload(3), format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RecipeRangeOrderingTest(TestCase):
+    """Test Range Filters And Sorting Of The Recipe List"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().object.create_user(
+            'test@gmail.com',
+            'test_pass@123'
+            )
+        self.client.force_authenticate(self.user)
+
+    def titles(self, **params):
+        res = self.client.get(RECIPE_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [item['title'] for item in res.data['results']]
+
+    def test_time_minute_range(self):
+        """Test Recipes Are Filtered By Preparation Time"""
+        sample_recipe(self.user, title='quick', time_minute=10)
+        sample_recipe(self.user, title='medium', time_minute=30)
+        sample_recipe(self.user, title='slow', time_minute=90)
+        self.assertEqual(
+            self.titles(time_minute__lte=30, ordering='time_minute'),
+            ['quick', 'medium']
+            )
+        self.assertEqual(
+            self.titles(time_minute__gte=30, time_minute__lte=60),
+            ['medium']
+            )
+
+    def test_price_range_is_exact(self):
+        """Test Decimal Prices Compare Exactly At The Bounds"""
+        sample_recipe(self.user, title='cheap', price='0.30')
+        sample_recipe(self.user, title='dear', price='0.31')
+        self.assertEqual(self.titles(price__lte='0.3'), ['cheap'])
+        self.assertEqual(self.titles(price__gte='0.31'), ['dear'])
+
+    def test_price_is_decimal(self):
+        """Test Prices Are Stored And Rendered As Decimals"""
+        recipe = sample_recipe(self.user, price='12.10')
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.price, Decimal('12.10'))
+        res = self.client.get(detail_url(recipe.id))
+        self.assertEqual(res.data['price'], '12.10')
+
+    def test_cheapest_quick_recipes_first(self):
+        """Test Ordering By Price Pages Through Ties Without Gaps"""
+        prices = ['3.00', '1.00', '2.00', '1.00', '2.00', '5.00']
+        for index, price in enumerate(prices):
+            sample_recipe(
+                self.user,
+                title=f'recipe {index}',
+                price=price,
+                time_minute=20
+                )
+        sample_recipe(self.user, title='too slow', price='0.50',
+                      time_minute=45)
+        params = {'ordering': 'price', 'time_minute__lte': 30, 'page_size': 2}
+        res = self.client.get(RECIPE_URL, params)
+        seen = [item['price'] for item in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            seen.extend(item['price'] for item in res.data['results'])
+        self.assertEqual(seen, sorted(prices, key=Decimal))
+
+    def test_descending_ordering(self):
+        """Test A Leading Minus Sorts Descending"""
+        sample_recipe(self.user, title='quick', time_minute=5)
+        sample_recipe(self.user, title='slow', time_minute=50)
+        self.assertEqual(
+            self.titles(ordering='-time_minute'),
+            ['slow', 'quick']
+            )
+
+    def test_ordering_not_whitelisted(self):
+        """Test Orderings Outside The Whitelist Are Rejected"""
+        res = self.client.get(RECIPE_URL, {'ordering': 'user__password'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ordering', res.data)
+
+    def test_invalid_range_values(self):
+        """Test Malformed Range Values Are Rejected Per Param"""
+        res = self.client.get(RECIPE_URL, {
+            'time_minute__lte': 'soon',
+            'price__gte': 'cheap'
+            })
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('time_minute__lte', res.data)
+        self.assertIn('price__gte', res.data)
+
+    def test_cursor_values_not_fitting_ordering(self):
+        """Test A Cursor Whose Values Do Not Fit The Ordering Is Refused"""
+        sample_recipe(self.user)
+        cursor = base64.urlsafe_b64encode(
+            json.dumps({'p': ['cheap', 1], 'r': 0}).encode()
+            ).decode()
+        res = self.client.get(RECIPE_URL, {
+            'ordering': 'price',
+            'cursor': cursor
+            })
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class RecipeSparseFieldsTest(TestCase):
+    """Test fields And expand Query Params"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().object.create_user(
+            'test@gmail.com',
+            'test_pass@123'
+            )
+        self.client.force_authenticate(self.user)
+        self.recipe = sample_recipe(self.user, title='Curry')
+        self.tag = sample_tag(self.user, name='Vegan')
+        self.ingredient = sample_ingredients(self.user, name='Rice')
+        self.recipe.tag.add(self.tag)
+        self.recipe.ingredients.add(self.ingredient)
+
+    def test_list_only_requested_fields(self):
+        """Test A Sparse List Reads One Table And Emits Only Its Fields"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPE_URL, {'fields': 'id,title'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'],
+            [{'id': self.recipe.id, 'title': 'Curry'}]
+            )
+        # collection version, then the recipes alone
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('"price"', queries[1]['sql'])
+        self.assertNotIn('core_tag', queries[1]['sql'])
+
+    def test_list_expand_relation(self):
+        """Test Expanded Relations Nest Objects, Others Stay ids"""
+        res = self.client.get(RECIPE_URL, {
+            'fields': 'id,tag,ingredients',
+            'expand': 'tag'
+            })
+        item = res.data['results'][0]
+        self.assertEqual(
+            item['tag'],
+            [{'id': self.tag.id, 'name': 'Vegan', 'recipe_count': 1}]
+            )
+        self.assertEqual(item['ingredients'], [self.ingredient.id])
+
+    def test_detail_defaults_unchanged(self):
+        """Test Detail Still Nests Both Relations By Default"""
+        res = self.client.get(detail_url(self.recipe.id))
+        serializer = serializers.RecipeDetailSerializer(
+            self.recipe,
+            context={'request': res.wsgi_request}
+            )
+        self.assertEqual(res.data, serializer.data)
+
+    def test_detail_sparse(self):
+        """Test Detail Honours fields And An Empty expand"""
+        res = self.client.get(
+            detail_url(self.recipe.id),
+            {'fields': 'title,tag,image_status', 'expand': ''}
+            )
+        self.assertEqual(res.data, {
+            'title': 'Curry',
+            'tag': [self.tag.id],
+            'image_status': ''
+            })
+
+    def test_unknown_fields_rejected(self):
+        """Test Unknown Field And Relation Names Are Rejected"""
+        res = self.client.get(RECIPE_URL, {'fields': 'id,user'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', res.data)
+        res = self.client.get(RECIPE_URL, {'expand': 'title'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('expand', res.data)
+
+    def test_sorted_sparse_pages(self):
+        """Test Paging By A Column Left Out Of fields"""
+        sample_recipe(self.user, title='Soup', price='1.00')
+        res = self.client.get(RECIPE_URL, {
+            'fields': 'title',
+            'ordering': 'price',
+            'page_size': 1
+            })
+        self.assertEqual(res.data['results'], [{'title': 'Soup'}])
+        res = self.client.get(res.data['next'])
+        self.assertEqual(res.data['results'], [{'title': 'Curry'}])
+
+
+@override_settings(RECIPE_RESPONSE_CACHE_ALIAS=None)
+class RecipeFastListTest(TestCase):
+    """Test values() Based Lists Render The Same Bytes As The Serializers"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().object.create_user(
+            'test@gmail.com',
+            'test_pass@123'
+            )
+        self.client.force_authenticate(self.user)
+        tags = [sample_tag(self.user, name=name)
+                for name in ('Végan', 'Quick \u2028 line', 'Z')]
+        ingredients = [sample_ingredients(self.user, name=name)
+                       for name in ('Rice', '"Quoted"')]
+        for index in range(5):
+            recipe = sample_recipe(
+                self.user,
+                title=f'Caffè ☕ {index} \\ "x"',
+                price=f'{index}.{index}5',
+                time_minute=index * 7,
+                link='http://example.com/a?b=c' if index % 2 else ''
+                )
+            recipe.tag.add(*tags[:index % 4])
+            recipe.ingredients.add(*ingredients[:index % 3])
+        Recipe.objects.filter(pk=recipe.pk).update(
+            image='uploads/recipe/x.jpg'
+            )
+
+    def assertSameBytes(self, url, params=None):
+        """Fast Response Equals JSONRenderer Output Of The Serializers"""
+        fast = self.client.get(url, params)
+        with override_settings(RECIPE_API_FAST_LIST=False):
+            slow = self.client.get(url, params)
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, JSONRenderer().render(slow.data))
+        return fast
+
+    def test_recipe_list_bytes(self):
+        """Test Every Recipe List Variant Matches Byte For Byte"""
+        self.assertSameBytes(RECIPE_URL)
+        self.assertSameBytes(RECIPE_URL, {'page_size': 2})
+        self.assertSameBytes(RECIPE_URL, {'ordering': 'price'})
+        self.assertSameBytes(RECIPE_URL, {'search': 'caffè'})
+        self.assertSameBytes(RECIPE_URL, {'fields': 'id,price,renditions'})
+        self.assertSameBytes(RECIPE_URL, {'expand': 'tag,ingredients'})
+
+    def test_next_pages_match(self):
+        """Test Cursors From The Fast Path Walk The Same Pages"""
+        res = self.assertSameBytes(RECIPE_URL, {
+            'page_size': 2,
+            'ordering': '-price'
+            })
+        while res.data['next']:
+            res = self.assertSameBytes(res.data['next'])
+
+    def test_tag_and_ingredient_list_bytes(self):
+        """Test Tag And Ingredient Lists Match Byte For Byte"""
+        self.assertSameBytes(reverse('recipe:tag-list'))
+        self.assertSameBytes(
+            reverse('recipe:ingredients-list'),
+            {'assigned_only': 1}
+            )
+
+    def test_fast_list_queries(self):
+        """Test The Fast Path Keeps The Fixed Query Count"""
+        for serializer in (
+                serializers.RecipeSerializers(),
+                serializers.TagSerializer(),
+                serializers.RecipeSerializers(expand=('tag',))):
+            self.assertTrue(ValuesReader(serializer).supported)
+        # version, recipes, ingredient links, tag links
+        with self.assertNumQueries(4):
+            self.client.get(RECIPE_URL)
+
+    def test_renderer_matches_json_renderer(self):
+        """Test The Renderer Matches JSONRenderer On Awkward Values"""
+        data = OrderedDict((
+            ('text', 'é \u2028 \u2029 \n \t \\ " / \x00 \x7f'),
+            ('when', datetime(2020, 1, 2, 3, 4, 5, 678901,
+                              tzinfo=timezone.utc)),
+            ('lazy', gettext_lazy('Not found.')),
+            ('nested', [{'b': 1, 'a': [True, False, None]}]),
+            (1, 'int key'),
+            ('big', 2 ** 70),
+            ))
+        self.assertEqual(
+            FastJSONRenderer().render(data),
+            JSONRenderer().render(data)
+            )
+
+
+class RecipeExportTest(TestCase):
+    """Test Streaming Export Of The Recipe Collection"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().object.create_user(
+            'test@gmail.com',
+            'test_pass@123'
+            )
+        self.client.force_authenticate(self.user)
+        tag = sample_tag(self.user)
+        for index in range(5):
+            recipe = sample_recipe(self.user, title=f'recipe {index}')
+            if index % 2:
+                recipe.tag.add(tag)
+        other = get_user_model().object.create_user(
+            'other@gmail.com',
+            'test_pass@123'
+            )
+        sample_recipe(other, title='not mine')
+
+    def expected(self):
+        recipes = Recipe.objects.filter(user=self.user).order_by('-id')
+        return JSONRenderer().render(serializers.RecipeSerializers(
+            recipes,
+            many=True
+            ).data)
+
+    def test_export_json(self):
+        """Test The JSON Export Is The Whole Collection As One Array"""
+        res = self.client.get(EXPORT_URL, {'format': 'json'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'application/json')
+        self.assertEqual(b''.join(res.streaming_content), self.expected())
+
+    def test_export_ndjson(self):
+        """Test The NDJSON Export Has One Recipe Per Line"""
+        res = self.client.get(EXPORT_URL, {'format': 'ndjson'})
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        self.assertIn('recipes.ndjson', res['Content-Disposition'])
+        lines = b''.join(res.streaming_content).splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            json.loads(self.expected())
+            )
+
+    @override_settings(RECIPE_EXPORT_CHUNK_SIZE=2)
+    def test_export_relations_batched_per_chunk(self):
+        """Test Relations Are Loaded Once Per Chunk Of Recipes"""
+        res = self.client.get(EXPORT_URL)
+        with CaptureQueriesContext(connection) as queries:
+            body = b''.join(res.streaming_content)
+        self.assertEqual(body, self.expected())
+        # one recipe read, then ingredients and tags for each of 3 chunks
+        self.assertEqual(len(queries), 7)
+
+    def test_export_empty(self):
+        """Test Users Without Recipes Get Empty Documents"""
+        Recipe.objects.filter(user=self.user).delete()
+        res = self.client.get(EXPORT_URL)
+        self.assertEqual(b''.join(res.streaming_content), b'[]')
+        res = self.client.get(EXPORT_URL, {'format': 'ndjson'})
+        self.assertEqual(b''.join(res.streaming_content), b'')
+
+    def test_export_filters_and_fields(self):
+        """Test List Filters And Sparse Fields Apply To The Export"""
+        res = self.client.get(EXPORT_URL, {
+            'format': 'ndjson',
+            'fields': 'title',
+            'search': 'recipe 3'
+            })
+        self.assertEqual(
+            b''.join(res.streaming_content),
+            b'{"title":"recipe 3"}\n'
+            )
+
+    def test_export_bad_params_fail_before_streaming(self):
+        """Test Invalid Params Give A Normal Error Response"""
+        res = self.client.get(EXPORT_URL, {'ordering': 'user'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(res.streaming)
+
+
+class RecipeSearchApiTest(TestCase):
+    """Test Ranked Full Text Search Of Recipes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().object.create_user(
+            'test@gmail.com',
+            'test_pass@123'
+            )
+        self.client.force_authenticate(self.user)
+
+    def search(self, text, **params):
+        res = self.client.get(RECIPE_URL, {'search': text, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [item['title'] for item in res.data['results']]
+
+    def test_search_by_title(self):
+        """Test Only Recipes Matching Every Word Are Returned"""
+        sample_recipe(self.user, title='Thai green curry')
+        sample_recipe(self.user, title='Green salad')
+        sample_recipe(self.user, title='Beef stew')
+        self.assertEqual(self.search('green curry'), ['Thai green curry'])
+        self.assertEqual(self.search('pizza'), [])
+
+    def test_search_is_stemmed(self):
+        """Test Word Forms Match The Same Stem"""
+        sample_recipe(self.user, title='Baked potatoes')
+        self.assertEqual(self.search('potato'), ['Baked potatoes'])
+
+    def test_search_tag_and_ingredient_names(self):
+        """Test Names Of Linked Tags And Ingredients Are Searched"""
+        recipe = sample_recipe(self.user, title='Weeknight dinner')
+        recipe.tag.add(sample_tag(self.user, name='Vegan'))
+        recipe.ingredients.add(sample_ingredients(self.user, name='Tofu'))
+        sample_recipe(self.user, title='Roast chicken')
+        self.assertEqual(self.search('vegan tofu'), ['Weeknight dinner'])
+
+    def test_search_follows_renames_and_unlinks(self):
+        """Test The Vector Is Kept Current On Related Writes"""
+        recipe = sample_recipe(self.user, title='Stir fry')
+        tag = sample_tag(self.user, name='Spicy')
+        recipe.tag.add(tag)
+        tag.name = 'Mild'
+        tag.save()
+        self.assertEqual(self.search('spicy'), [])
+        self.assertEqual(self.search('mild'), ['Stir fry'])
+        tag.delete()
+        self.assertEqual(self.search('mild'), [])
+        recipe.title = 'Noodles'
+        recipe.save()
+        self.assertEqual(self.search('noodles'), ['Noodles'])
+        recipe.delete()
+        self.assertEqual(self.search('noodles'), [])
+
+    def test_search_bulk_created(self):
+        """Test Recipes Written By The Bulk Endpoint Are Searchable"""
+        res = self.client.post(BULK_URL, [
+            {'title': 'Lemon tart', 'time_minute': 30, 'price': 4,
+             'ingredients': [], 'tag': []},
+            ], format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.search('lemon'), ['Lemon tart'])
+
+    def test_search_ranks_title_matches_first(self):
+        """Test A Title Hit Outranks A Tag Name Hit"""
+        tagged = sample_recipe(self.user, title='Family dinner')
+        tagged.tag.add(sample_tag(self.user, name='Pasta'))
+        sample_recipe(self.user, title='Pasta bake')
+        self.assertEqual(
+            self.search('pasta'),
+            ['Pasta bake', 'Family dinner']
+            )
+
+    def test_search_paginates_by_rank(self):
+        """Test Ranked Results Page Without Gaps Or Repeats"""
+        for index in range(5):
+            sample_recipe(self.user, title=f'soup {index}')
+        sample_recipe(self.user, title='soup soup soup')
+        res = self.client.get(RECIPE_URL, {'search': 'soup', 'page_size': 2})
+        titles = [item['title'] for item in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            titles.extend(item['title'] for item in res.data['results'])
+        self.assertEqual(len(titles), 6)
+        self.assertEqual(len(set(titles)), 6)
+        self.assertEqual(titles[0], 'soup soup soup')
+
+    def test_search_limited_to_user(self):
+        """Test Other Users Recipes Never Match"""
+        other = get_user_model().object.create_user(
+            'other@gmail.com',
+            'test_pass@123'
+            )
+        sample_recipe(other, title='Secret sauce')
+        self.assertEqual(self.search('sauce'), [])
+
+    def test_search_without_words(self):
+        """Test Punctuation Only Searches Match Nothing"""
+        sample_recipe(self.user, title='Toast')
+        self.assertEqual(self.search('"*:'), [])
+
+
+@override_settings(RECIPE_IMAGE_ASYNC=False)
 class RecipeImagUpload(TestCase):
     """Tests For Image Uploads"""
 
@@ -207,8 +1177,148 @@ class RecipeImagUpload(TestCase):
 
     def tearDown(self):
         """Run After The Test Function"""
+        self.recipe.refresh_from_db()
+        if self.recipe.image:
+            renditions.delete_all(self.recipe.image.name)
         self.recipe.image.delete()
 
+    def _upload_sample_image(self, size=(800, 400)):
+        """Upload A Generated JPEG To The Sample Recipe"""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new('RGB', size).save(ntf, format='JPEG')
+            ntf.seek(0)
+            self.client.post(url, {'image': ntf}, format='multipart')
+        self.recipe.refresh_from_db()
+
+    @override_settings(RECIPE_IMAGE_MAX_BYTES=1024)
+    def test_upload_too_large_rejected_early(self):
+        """Body Larger Than The Byte Cap Is Refused Before Parsing"""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            ntf.write(b'\0' * 64 * 1024)
+            ntf.seek(0)
+            res = self.client.post(url, {'image': ntf}, format='multipart')
+        self.assertEqual(
+            res.status_code,
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=100)
+    def test_upload_too_many_pixels(self):
+        """Images Over The Pixel Cap Are Rejected From Their Header"""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.png') as ntf:
+            Image.new('RGB', (20, 20)).save(ntf, format='PNG')
+            ntf.seek(0)
+            res = self.client.post(url, {'image': ntf}, format='multipart')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    def test_upload_unsupported_format(self):
+        """Formats Outside RECIPE_IMAGE_FORMATS Are Rejected"""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.bmp') as ntf:
+            Image.new('RGB', (10, 10)).save(ntf, format='BMP')
+            ntf.seek(0)
+            res = self.client.post(url, {'image': ntf}, format='multipart')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_upload_handler_sniffs_header_only(self):
+        """Format And Size Are Known After The First Chunk"""
+        data = BytesIO()
+        Image.effect_noise((1000, 1000), 64).save(data, format='PNG')
+        data = data.getvalue()
+        handler = uploads.RecipeImageUploadHandler()
+        handler.new_file('image', 'noise.png', 'image/png', len(data))
+        chunk = handler.chunk_size
+        handler.receive_data_chunk(data[:chunk], 0)
+        self.assertEqual(handler.header, ('PNG', (1000, 1000)))
+        for start in range(chunk, len(data), chunk):
+            handler.receive_data_chunk(data[start:start + chunk], start)
+        staged = handler.file_complete(len(data))
+        self.assertEqual(staged.dimensions, (1000, 1000))
+        self.assertEqual(os.path.getsize(staged.temporary_file_path()),
+                         len(data))
+        staged.close()
+        os.remove(staged.temporary_file_path())
+
+    @override_settings(RECIPE_IMAGE_MAX_BYTES=100)
+    def test_upload_handler_stops_past_byte_cap(self):
+        """Streaming Past The Cap Aborts And Removes The Partial File"""
+        handler = uploads.RecipeImageUploadHandler()
+        handler.new_file('image', 'big.jpg', 'image/jpeg', None)
+        with self.assertRaises(uploads.ImageTooLarge):
+            handler.receive_data_chunk(b'\0' * 200, 0)
+        self.assertFalse(os.path.exists(handler.path))
+
+    @override_settings(RECIPE_IMAGE_EAGER_RENDITIONS=False)
+    def test_rendition_generated_on_first_request(self):
+        """Missing Rendition Is Rendered Once Then Served From Storage"""
+        self._upload_sample_image()
+        storage = self.recipe.image.storage
+        name = renditions.rendition_name(self.recipe.image.name, 'thumb')
+        self.assertFalse(storage.exists(name))
+
+        url = rendition_url(self.recipe.id, 'thumb')
+        with patch(
+                'recipe.renditions.render',
+                wraps=renditions.render
+                ) as render:
+            res = self.client.get(url)
+            self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_302_FOUND)
+        self.assertEqual(res['Location'], storage.url(name))
+        self.assertEqual(render.call_count, 1)
+        with Image.open(storage.path(name)) as thumb:
+            self.assertEqual(thumb.format, 'WEBP')
+            self.assertEqual(thumb.size, (160, 80))
+
+    def test_renditions_generated_after_upload(self):
+        """Eager Mode Writes Every Rendition Next To The Original"""
+        self._upload_sample_image()
+        storage = self.recipe.image.storage
+        for rendition in settings.RECIPE_IMAGE_RENDITIONS:
+            name = renditions.rendition_name(self.recipe.image.name, rendition)
+            self.assertTrue(storage.exists(name))
+            self.assertEqual(
+                os.path.dirname(name),
+                os.path.dirname(self.recipe.image.name)
+                )
+
+    def test_rendition_not_upscaled(self):
+        """Images Narrower Than The Rendition Keep Their Size"""
+        self._upload_sample_image(size=(100, 50))
+        name = renditions.ensure(self.recipe.image.name, 'large')
+        with Image.open(self.recipe.image.storage.path(name)) as large:
+            self.assertEqual(large.size, (100, 50))
+
+    def test_replaced_image_renditions_removed(self):
+        """Uploading A New Image Deletes The Old Renditions"""
+        self._upload_sample_image()
+        old = renditions.rendition_name(self.recipe.image.name, 'thumb')
+        self._upload_sample_image()
+        self.assertFalse(self.recipe.image.storage.exists(old))
+
+    def test_unknown_rendition(self):
+        """Unknown Rendition Names Are Not Found"""
+        self._upload_sample_image()
+        res = self.client.get(rendition_url(self.recipe.id, 'huge'))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_renditions_map_in_detail(self):
+        """Recipe Detail Lists A Url Per Configured Rendition"""
+        self._upload_sample_image()
+        res = self.client.get(detail_url(self.recipe.id))
+        self.assertEqual(
+            set(res.data['renditions']),
+            set(settings.RECIPE_IMAGE_RENDITIONS)
+            )
+        self.assertTrue(res.data['renditions']['thumb'].endswith(
+            rendition_url(self.recipe.id, 'thumb')
+            ))
+
     def test_upload_image_to_recipe(self):
         """Test uploading an image to recipe"""
         url = image_upload_url(self.recipe.id)
@@ -222,6 +1332,63 @@ class RecipeImagUpload(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertIn('image', res.data)
         self.assertTrue(os.path.exists(self.recipe.image.path))
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_READY)
+
+    def test_upload_image_strips_metadata(self):
+        """Processed Image Carries No EXIF Data"""
+        url = image_upload_url(self.recipe.id)
+        exif = Image.Exif()
+        exif[0x010f] = 'Camera Maker'
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new('RGB', (10, 10)).save(ntf, format='JPEG', exif=exif)
+            ntf.seek(0)
+            self.client.post(url, {'image': ntf}, format='multipart')
+
+        self.recipe.refresh_from_db()
+        with Image.open(self.recipe.image.path) as processed:
+            self.assertNotIn('exif', processed.info)
+            self.assertEqual(processed.size, (10, 10))
+
+    def test_upload_invalid_image(self):
+        """Non Image Upload Is Rejected Before Processing"""
+        url = image_upload_url(self.recipe.id)
+        res = self.client.post(url, {'image': 'notimage'}, format='multipart')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(RECIPE_IMAGE_ASYNC=True)
+    def test_upload_image_async(self):
+        """Async Upload Answers 202 And Hands The File To The Pool"""
+        url = image_upload_url(self.recipe.id)
+        with patch('recipe.images.get_executor') as executor, \
+                patch('recipe.images.transaction.on_commit', lambda f: f()):
+            with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+                Image.new('RGB', (10, 10)).save(ntf, format='JPEG')
+                ntf.seek(0)
+                res = self.client.post(
+                    url,
+                    {'image': ntf},
+                    format='multipart'
+                    )
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data['image_status'], Recipe.IMAGE_PENDING)
+        job, recipe_id, path = executor.return_value.submit.call_args[0]
+        self.assertIs(job, images._run_job)
+        self.assertEqual(recipe_id, self.recipe.id)
+
+        images.process_upload(recipe_id, path)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_READY)
+        self.assertFalse(os.path.exists(path))
+
+    def test_process_undecodable_file(self):
+        """Files Pillow Can Not Decode Mark The Recipe Failed"""
+        with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as ntf:
+            ntf.write(b'not an image')
+        with self.assertLogs('recipe.images', level='ERROR'):
+            images.process_upload(self.recipe.id, ntf.name)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_FAILED)
+        self.assertFalse(os.path.exists(ntf.name))
 
     def test_filter_recipes_by_tags(self):
         """Test returning recipes with specific tags"""
@@ -241,9 +1408,9 @@ class RecipeImagUpload(TestCase):
         serializer1 = serializers.RecipeSerializers(recipe1)
         serializer2 = serializers.RecipeSerializers(recipe2)
         serializer3 = serializers.RecipeSerializers(recipe3)
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertIn(serializer2.data, res.data['results'])
+        self.assertNotIn(serializer3.data, res.data['results'])
 
     def test_filter_recipes_by_ingredients(self):
         """Test returning recipes with specific ingredients"""
@@ -263,6 +1430,49 @@ class RecipeImagUpload(TestCase):
         serializer1 = serializers.RecipeSerializers(recipe1)
         serializer2 = serializers.RecipeSerializers(recipe2)
         serializer3 = serializers.RecipeSerializers(recipe3)
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertIn(serializer2.data, res.data['results'])
+        self.assertNotIn(serializer3.data, res.data['results'])
+
+    def test_filter_recipes_by_tags_unique(self):
+        """Recipe Matching Several Tags Is Returned Once"""
+        recipe = sample_recipe(user=self.user)
+        tag1 = sample_tag(user=self.user, name='Vegan')
+        tag2 = sample_tag(user=self.user, name='Dinner')
+        recipe.tag.add(tag1, tag2)
+
+        res = self.client.get(
+            RECIPE_URL,
+            {'tag': '{},{}'.format(tag1.id, tag2.id)}
+            )
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_filter_recipes_match_all_tags(self):
+        """match=all Returns Only Recipes Having Every Tag"""
+        recipe1 = sample_recipe(user=self.user, title='Vegan dinner')
+        recipe2 = sample_recipe(user=self.user, title='Vegan lunch')
+        tag1 = sample_tag(user=self.user, name='Vegan')
+        tag2 = sample_tag(user=self.user, name='Dinner')
+        recipe1.tag.add(tag1, tag2)
+        recipe2.tag.add(tag1)
+
+        res = self.client.get(
+            RECIPE_URL,
+            {'tag': '{},{}'.format(tag1.id, tag2.id), 'match': 'all'}
+            )
+
+        serializer1 = serializers.RecipeSerializers(recipe1)
+        self.assertEqual(res.data['results'], [serializer1.data])
+
+    def test_filter_recipes_invalid_match(self):
+        """Unknown match Mode Is Rejected"""
+        res = self.client.get(RECIPE_URL, {'tag': '1', 'match': 'some'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_recipes_invalid_ids(self):
+        """Tag And Ingredient Filters Other Than ids Are Rejected"""
+        for params in ({'tag': 'abc'}, {'ingredients': '1,x'}):
+            res = self.client.get(RECIPE_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(next(iter(params)), res.data)
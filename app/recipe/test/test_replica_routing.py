@@ -0,0 +1,179 @@
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from core.db import routers
+from core.models import Recipe, Tag
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+EXPORT_URL = reverse('recipe:recipe-export')
+REPLICA = 'replica'
+
+
+@override_settings(
+    DATABASE_REPLICAS=[REPLICA],
+    RECIPE_RESPONSE_CACHE_ALIAS=None
+    )
+class ReplicaTestCase(TestCase):
+    """Harness With A Second SQLite Database Acting As A Replica
+
+    Nothing replicates, so a row written to one database only shows
+    which one a request read from.
+    """
+    databases = {'default', REPLICA}
+
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.replica_path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        connections.databases[REPLICA] = dict(
+            connections['default'].settings_dict,
+            ENGINE='django.db.backends.sqlite3',
+            NAME=cls.replica_path,
+            TEST={'NAME': cls.replica_path}
+            )
+        # migrated before DATABASE_REPLICAS lists it and blocks that
+        call_command('migrate', database=REPLICA, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections.databases[REPLICA]
+        delattr(connections._connections, REPLICA)
+        os.remove(cls.replica_path)
+
+    def setUp(self):
+        # sticky flags of earlier tests, user ids are reused
+        caches[settings.DB_STICKY_CACHE_ALIAS].clear()
+        self.user = self.create_user('test@gmail.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_user(self, email):
+        """A User With The Same id On Both Databases"""
+        user = get_user_model().object.create_user(email, 'test_pass@123')
+        # the router sends model saves to the primary, name the replica
+        get_user_model()(id=user.id, email=email).save(using=REPLICA)
+        return user
+
+    def create_recipe(self, title, using='default', user=None):
+        return Recipe.objects.using(using).create(
+            user=user or self.user,
+            title=title,
+            time_minute=5,
+            price=5
+            )
+
+    def titles(self, **params):
+        res = self.client.get(RECIPE_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [item['title'] for item in res.data['results']]
+
+
+class ReplicaRoutingTests(ReplicaTestCase):
+    """Test Safe Requests Read From The Replica"""
+
+    def setUp(self):
+        super().setUp()
+        self.create_recipe('primary soup')
+        self.create_recipe('replica soup', using=REPLICA)
+
+    def test_safe_reads_use_replica(self):
+        """Lists And Details Are Read From The Replica"""
+        self.assertEqual(self.titles(), ['replica soup'])
+        recipe = Recipe.objects.using(REPLICA).get()
+        tag = Tag.objects.using(REPLICA).create(user=self.user, name='Vegan')
+        Recipe.tag.through.objects.using(REPLICA).create(
+            recipe=recipe,
+            tag=tag
+            )
+        res = self.client.get(
+            reverse('recipe:recipe-detail', args=[recipe.id])
+            )
+        self.assertEqual(res.data['title'], 'replica soup')
+        self.assertEqual(res.data['tag'][0]['name'], 'Vegan')
+        self.assertIsNone(routers.read_alias())
+
+    def test_writes_go_to_primary(self):
+        """Creates Land On The Primary Only"""
+        res = self.client.post(TAGS_URL, {'name': 'Dinner'})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Tag.objects.using('default').filter(
+            name='Dinner'
+            ).exists())
+        self.assertFalse(Tag.objects.using(REPLICA).exists())
+
+    @override_settings(DB_STICKY_CACHE_ALIAS=None)
+    def test_reads_after_write_stick_to_primary(self):
+        """The Writer Reads The Primary While The Signed Cookie Holds"""
+        res = self.client.post(TAGS_URL, {'name': 'Dinner'})
+        cookie = res.cookies[settings.DB_STICKY_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.DB_STICKY_SECONDS)
+        self.assertEqual(self.titles(), ['primary soup'])
+        self.client.cookies.clear()
+        self.assertEqual(self.titles(), ['replica soup'])
+
+    def test_forged_cookie_ignored(self):
+        """Only A Cookie Signed For This User Pins The Primary"""
+        self.client.cookies[settings.DB_STICKY_COOKIE] = str(self.user.pk)
+        self.assertEqual(self.titles(), ['replica soup'])
+
+    def test_cookieless_client_pinned_by_default(self):
+        """A Token Client Without Cookies Reads Its Write From The Primary"""
+        self.client.post(TAGS_URL, {'name': 'Dinner'})
+        self.client.cookies.clear()
+        self.assertEqual(self.titles(), ['primary soup'])
+        caches[settings.DB_STICKY_CACHE_ALIAS].clear()
+        self.assertEqual(self.titles(), ['replica soup'])
+
+    def test_stickiness_is_per_user(self):
+        """Another User's Write Leaves This User On The Replica"""
+        other = self.create_user('other@gmail.com')
+        other_client = APIClient()
+        other_client.force_authenticate(other)
+        other_client.post(TAGS_URL, {'name': 'Dinner'})
+        self.assertEqual(self.titles(), ['replica soup'])
+
+    @override_settings(DB_STICKY_SECONDS=0)
+    def test_sticky_window_disabled(self):
+        """Without A Window Reads Return To The Replica At Once"""
+        self.client.post(TAGS_URL, {'name': 'Dinner'})
+        self.assertEqual(self.titles(), ['replica soup'])
+
+    def test_streamed_export_reads_replica(self):
+        """The Export Streams Its Rows From The Replica"""
+        res = self.client.get(EXPORT_URL, {'format': 'json'})
+        body = json.loads(b''.join(res.streaming_content))
+        self.assertEqual([item['title'] for item in body], ['replica soup'])
+        self.assertIsNone(routers.read_alias())
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_reads_primary(self):
+        """With No Replica Configured Everything Reads The Primary"""
+        self.assertEqual(self.titles(), ['primary soup'])
+
+
+class ReplicaRouterTests(ReplicaTestCase):
+    """Test The Router Outside Requests"""
+
+    def test_router(self):
+        """Writes And Migrations Stay Off The Replica"""
+        router = routers.ReplicaRouter()
+        self.assertEqual(router.db_for_write(Recipe), 'default')
+        self.assertIsNone(router.db_for_read(Recipe))
+        self.assertFalse(router.allow_migrate(REPLICA, 'core'))
+        self.assertTrue(router.allow_migrate('default', 'core'))
+        recipe = self.create_recipe('replica soup', using=REPLICA)
+        self.assertEqual(router.db_for_read(Tag, instance=recipe), REPLICA)
@@ -0,0 +1,251 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from django.urls import reverse
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from core.models import Change, Ingredients, Recipe, Tag
+
+SYNC_URL = reverse('recipe:sync')
+
+
+def sample_recipe(user, **params):
+    """Create And Return Sample Recipe"""
+    defaults = {
+        'title': 'sample recipe',
+        'time_minute': 10,
+        'price': 5.00
+        }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class PublicSyncApiTest(TestCase):
+    """Test Unauthenticated Sync Access"""
+
+    def test_login_required(self):
+        """Test Authentication Is Required"""
+        res = APIClient().get(SYNC_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(RECIPE_SYNC_SETTLE_SECONDS=0)
+class PrivateSyncApiTest(TestCase):
+    """Test Delta Sync For Authenticated User"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().object.create_user(
+            email='test@gmail.com',
+            password='test_pass@123'
+            )
+        self.client.force_authenticate(self.user)
+
+    def sync(self, token=None):
+        res = self.client.get(SYNC_URL, {'since': token} if token else {})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_full_sync_without_token(self):
+        """Test The First Sync Sends The Whole Collection"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe = sample_recipe(self.user)
+        recipe.tag.add(tag)
+        other = get_user_model().object.create_user(
+            email='other@gmail.com',
+            password='test_pass@123'
+            )
+        sample_recipe(other)
+        data = self.sync()
+        self.assertTrue(data['full'])
+        self.assertEqual(
+            [item['id'] for item in data['recipes']['changed']],
+            [recipe.id]
+            )
+        self.assertEqual(data['recipes']['changed'][0]['tag'], [tag.id])
+        self.assertEqual(data['tags']['changed'][0]['name'], 'Vegan')
+        self.assertEqual(data['ingredients']['changed'], [])
+
+    def test_delta_contains_only_changes(self):
+        """Test A Token Returns Only What Changed After It"""
+        unchanged = sample_recipe(self.user, title='unchanged')
+        edited = sample_recipe(self.user, title='before')
+        token = self.sync()['token']
+
+        edited.title = 'after'
+        edited.save()
+        created = Ingredients.objects.create(user=self.user, name='Salt')
+        data = self.sync(token)
+        self.assertFalse(data['full'])
+        self.assertEqual(
+            [item['title'] for item in data['recipes']['changed']],
+            ['after']
+            )
+        self.assertNotIn(
+            unchanged.id,
+            [item['id'] for item in data['recipes']['changed']]
+            )
+        self.assertEqual(
+            data['ingredients']['changed'][0]['id'],
+            created.id
+            )
+
+        data = self.sync(data['token'])
+        self.assertEqual(data['recipes'], {'changed': [], 'deleted': []})
+
+    def test_deletes_return_tombstones(self):
+        """Test Deleted Rows Are Reported By id"""
+        recipe = sample_recipe(self.user)
+        tag = Tag.objects.create(user=self.user, name='Dinner')
+        token = self.sync()['token']
+        recipe_id, tag_id = recipe.id, tag.id
+        recipe.delete()
+        tag.delete()
+        data = self.sync(token)
+        self.assertEqual(data['recipes']['deleted'], [recipe_id])
+        self.assertEqual(data['tags']['deleted'], [tag_id])
+        self.assertEqual(data['recipes']['changed'], [])
+
+    def test_cascade_deletes_return_tombstones(self):
+        """Test Rows Deleted By A Cascade Get Tombstones"""
+        recipe = sample_recipe(self.user)
+        tag = Tag.objects.create(user=self.user, name='Dinner')
+        user_id, recipe_id, tag_id = self.user.id, recipe.id, tag.id
+        self.user.delete()
+        self.assertTrue(Change.objects.filter(
+            user_id=user_id,
+            kind=Change.RECIPE,
+            object_id=recipe_id,
+            deleted=True
+            ).exists())
+        self.assertTrue(Change.objects.filter(
+            user_id=user_id,
+            kind=Change.TAG,
+            object_id=tag_id,
+            deleted=True
+            ).exists())
+
+    def test_deleting_tag_changes_linked_recipes(self):
+        """Test Recipes Losing A Deleted Tag Are Sent Again"""
+        tag = Tag.objects.create(user=self.user, name='Dinner')
+        recipe = sample_recipe(self.user)
+        recipe.tag.add(tag)
+        token = self.sync()['token']
+        tag.delete()
+        data = self.sync(token)
+        self.assertEqual(data['recipes']['changed'][0]['id'], recipe.id)
+        self.assertEqual(data['recipes']['changed'][0]['tag'], [])
+
+    def test_linking_from_tag_side_changes_recipe(self):
+        """Test Adding And Clearing Recipes Through A Tag Is Tracked"""
+        tag = Tag.objects.create(user=self.user, name='Dinner')
+        recipe = sample_recipe(self.user)
+        token = self.sync()['token']
+        tag.recipe_set.add(recipe)
+        data = self.sync(token)
+        self.assertEqual(data['recipes']['changed'][0]['tag'], [tag.id])
+        tag.recipe_set.clear()
+        data = self.sync(data['token'])
+        self.assertEqual(data['recipes']['changed'][0]['tag'], [])
+
+    def test_created_then_deleted_is_tombstone(self):
+        """Test Only The Latest State Of A Row Is Sent"""
+        token = self.sync()['token']
+        recipe = sample_recipe(self.user)
+        recipe_id = recipe.id
+        recipe.delete()
+        data = self.sync(token)
+        self.assertEqual(data['recipes']['changed'], [])
+        self.assertEqual(data['recipes']['deleted'], [recipe_id])
+
+    @override_settings(RECIPE_SYNC_MAX_CHANGES=2)
+    def test_large_delta_is_batched(self):
+        """Test A Delta Over The Limit Is Sent In Several Responses"""
+        token = self.sync()['token']
+        for index in range(3):
+            sample_recipe(self.user, title=f'recipe {index}')
+        data = self.sync(token)
+        self.assertTrue(data['more'])
+        self.assertEqual(len(data['recipes']['changed']), 2)
+        data = self.sync(data['token'])
+        self.assertFalse(data['more'])
+        self.assertEqual(
+            [item['title'] for item in data['recipes']['changed']],
+            ['recipe 2']
+            )
+
+    def test_delta_queries_follow_changes(self):
+        """Test A Delta Reads The Changed Rows Only"""
+        for index in range(20):
+            sample_recipe(self.user, title=f'recipe {index}')
+        token = self.sync()['token']
+        sample_recipe(self.user, title='new')
+        # horizon, changes, settle check, recipes with two prefetches
+        with self.assertNumQueries(6):
+            data = self.sync(token)
+        self.assertEqual(len(data['recipes']['changed']), 1)
+
+    def test_unsettled_changes_are_sent_again(self):
+        """Test The Token Stays Before Changes Still Settling"""
+        token = self.sync()['token']
+        sample_recipe(self.user)
+        with override_settings(RECIPE_SYNC_SETTLE_SECONDS=60):
+            data = self.sync(token)
+        self.assertEqual(len(data['recipes']['changed']), 1)
+        self.assertEqual(data['token'], token)
+
+    @override_settings(RECIPE_SYNC_PAGE_SIZE=2)
+    def test_full_sync_is_paged(self):
+        """Test The Full Copy Comes In Pages Sharing One Token"""
+        recipes = [
+            sample_recipe(self.user, title=f'recipe {index}')
+            for index in range(3)
+            ]
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        res = self.client.get(SYNC_URL)
+        pages = [res.data]
+        while pages[-1]['next']:
+            res = self.client.get(pages[-1]['next'])
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append(res.data)
+        self.assertEqual(len(pages), 2)
+        self.assertEqual(pages[0]['token'], pages[1]['token'])
+        self.assertTrue(all(page['full'] for page in pages))
+        changed = {
+            key: [
+                item['id'] for page in pages for item in page[key]['changed']
+                ]
+            for key in ('recipes', 'tags')
+            }
+        self.assertEqual(
+            changed['recipes'],
+            [recipe.id for recipe in recipes]
+            )
+        self.assertEqual(changed['tags'], [tag.id])
+
+    def test_invalid_cursor(self):
+        """Test A Malformed Full Copy Cursor Is Rejected"""
+        res = self.client.get(SYNC_URL, {'cursor': 'not-a-cursor'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_pruned_token_needs_full_sync(self):
+        """Test A Token From Before Pruned Changes Gets 410"""
+        token = self.sync()['token']
+        sample_recipe(self.user)
+        Change.objects.update(created_at=timezone.now() - timedelta(days=40))
+        call_command('prune_changes', days=30, stdout=StringIO())
+        self.assertFalse(Change.objects.exists())
+        res = self.client.get(SYNC_URL, {'since': token})
+        self.assertEqual(res.status_code, status.HTTP_410_GONE)
+        data = self.sync()
+        self.assertEqual(len(data['recipes']['changed']), 1)
+        self.assertEqual(self.sync(data['token'])['recipes']['changed'], [])
+
+    def test_invalid_token(self):
+        """Test A Malformed Token Is Rejected"""
+        res = self.client.get(SYNC_URL, {'since': 'not-a-token'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
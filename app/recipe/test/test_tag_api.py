@@ -40,7 +40,7 @@ class PrivateApiTagTests(TestCase):
         tag = Tag.objects.all().order_by('-name')
         serializer = serializers.TagSerializer(tag, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_tag_limited_user(self):
         """Test The Tags Are Returned For Authenticated User"""
@@ -51,8 +51,8 @@ class PrivateApiTagTests(TestCase):
         tag = Tag.objects.create(user=self.user, name='test user')
         res = self.client.get(TAGS_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
 
     def test_create_tag_successful(self):
         """Test Create Tag Successful"""
@@ -81,13 +81,14 @@ class PrivateApiTagTests(TestCase):
             user=self.user,
             )
         recipe.tag.add(tag1)
+        tag1.refresh_from_db()
 
         res = self.client.get(TAGS_URL, {'assigned_only': 1})
 
         serializer1 = serializers.TagSerializer(tag1)
         serializer2 = serializers.TagSerializer(tag2)
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertNotIn(serializer2.data, res.data['results'])
 
     def test_retrieve_tags_assigned_unique(self):
         """Test filtering tags by assigned returns unique items"""
@@ -109,4 +110,52 @@ class PrivateApiTagTests(TestCase):
 
         res = self.client.get(TAGS_URL, {'assigned_only': 1})
 
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_invalid_assigned_only(self):
+        """An assigned_only That Is Not A Boolean Is Rejected"""
+        res = self.client.get(TAGS_URL, {'assigned_only': 'x'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('assigned_only', res.data)
+
+    def test_tags_paginated_by_name(self):
+        """Tags Are Paged By Descending Name"""
+        for name in ('b', 'a', 'c', 'e', 'd'):
+            Tag.objects.create(user=self.user, name=name)
+        names = []
+        res = self.client.get(TAGS_URL, {'page_size': 2})
+        while True:
+            names.extend(item['name'] for item in res.data['results'])
+            if not res.data['next']:
+                break
+            res = self.client.get(res.data['next'])
+        self.assertEqual(names, ['e', 'd', 'c', 'b', 'a'])
+
+    def test_tags_not_modified(self):
+        """Tag List Answers 304 Until A Tag Changes"""
+        Tag.objects.create(user=self.user, name='Breakfast')
+        etag = self.client.get(TAGS_URL)['ETag']
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Tag.objects.create(user=self.user, name='Lunch')
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_create_existing_name_returns_tag(self):
+        """Creating A Name The User Has Returns The Existing Tag"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        res = self.client.post(TAGS_URL, {'name': 'VEGAN'})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['id'], tag.id)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+
+    def test_rename_onto_existing_name(self):
+        """Renaming A Tag To Another Tag's Name Is Rejected"""
+        Tag.objects.create(user=self.user, name='Vegan')
+        tag = Tag.objects.create(user=self.user, name='Dinner')
+        serializer = serializers.TagSerializer(tag, data={'name': 'vegan'})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('name', serializer.errors)
+        serializer = serializers.TagSerializer(tag, data={'name': 'DINNER'})
+        self.assertTrue(serializer.is_valid())
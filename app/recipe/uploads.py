@@ -0,0 +1,144 @@
+import os
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from PIL import Image
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+# bytes read before giving up on finding the image dimensions, JPEG can
+# put large EXIF blocks in front of the frame header
+SNIFF_BYTES = 256 * 1024
+# room for the multipart framing around the file in Content-Length
+MULTIPART_OVERHEAD = 16 * 1024
+
+
+class ImageTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Image file too large.'
+    default_code = 'image_too_large'
+
+
+class StagedImage(UploadedFile):
+    """Upload Already Written To A Temp File And Checked By Its Header"""
+
+    def __init__(self, path, name, content_type, size, image_format,
+                 dimensions):
+        super().__init__(open(path, 'rb'), name, content_type, size)
+        self.path = path
+        self.image_format = image_format
+        self.dimensions = dimensions
+
+    def temporary_file_path(self):
+        return self.path
+
+
+def sniff(head, final):
+    """Image Format And Size From The First Bytes Of A File
+
+    Returns None while more bytes could still make the header readable.
+    """
+    try:
+        # open() is lazy, it parses the header and decodes no pixels
+        with Image.open(BytesIO(bytes(head))) as image:
+            return image.format, image.size
+    except Exception:
+        if not final and len(head) < SNIFF_BYTES:
+            return None
+        raise ValidationError({'image': ['Upload a valid image.']})
+
+
+def check_image(image_format, dimensions):
+    """Reject Formats And Pixel Counts The Pipeline Will Not Decode"""
+    if image_format not in settings.RECIPE_IMAGE_FORMATS:
+        raise ValidationError({
+            'image': [f'Unsupported image format {image_format}.']
+            })
+    width, height = dimensions
+    if width * height > settings.RECIPE_IMAGE_MAX_PIXELS:
+        raise ValidationError({
+            'image': [f'Image of {width}x{height} has too many pixels.']
+            })
+
+
+def check_content_length(request):
+    """Refuse A Request Body That Can Not Fit Under The Byte Cap"""
+    try:
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        return
+    if length > settings.RECIPE_IMAGE_MAX_BYTES + MULTIPART_OVERHEAD:
+        raise ImageTooLarge()
+
+
+def discard_staged(files):
+    """Remove Staging Files Of Uploads That Will Not Be Processed"""
+    for upload in files.values():
+        if isinstance(upload, StagedImage):
+            upload.close()
+            os.remove(upload.temporary_file_path())
+
+
+class RecipeImageUploadHandler(FileUploadHandler):
+    """Stream The image Field To Disk With Constant Memory
+
+    Bytes go straight into the staging file processed by recipe.images.
+    The header is sniffed as soon as it arrives, so an oversized or
+    unsupported image is refused before the rest is read.
+    """
+    field_name = 'image'
+
+    def new_file(self, field_name, *args, **kwargs):
+        if field_name != self.field_name:
+            raise SkipFile()
+        super().new_file(field_name, *args, **kwargs)
+        self.head = bytearray()
+        self.header = None
+        self.size = 0
+        ext = os.path.splitext(self.file_name or '')[1]
+        fd, self.path = tempfile.mkstemp(
+            suffix=ext,
+            dir=settings.FILE_UPLOAD_TEMP_DIR
+            )
+        self.file = os.fdopen(fd, 'wb')
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        try:
+            if self.size > settings.RECIPE_IMAGE_MAX_BYTES:
+                raise ImageTooLarge()
+            if self.header is None:
+                self.head += raw_data
+                self.header = sniff(self.head, final=False)
+                if self.header is not None:
+                    check_image(*self.header)
+                    self.head = None
+        except Exception:
+            self.discard()
+            raise
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        self.file.close()
+        try:
+            if self.header is None:
+                self.header = sniff(self.head, final=True)
+                check_image(*self.header)
+        except Exception:
+            self.discard()
+            raise
+        return StagedImage(
+            self.path,
+            self.file_name,
+            self.content_type,
+            file_size,
+            *self.header
+            )
+
+    def discard(self):
+        """Drop The Partially Written Staging File"""
+        self.file.close()
+        os.remove(self.path)
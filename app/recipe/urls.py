@@ -10,6 +10,7 @@ router.register('recipes', views.RecipesViewSet)
 app_name = 'recipe'
 
 urlpatterns = [
+    path('sync/', views.SyncView.as_view(), name='sync'),
     path('', include(router.urls))
     ]
 
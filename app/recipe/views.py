@@ -1,34 +1,119 @@
+from collections import OrderedDict
+
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+from user.authentication import CachedTokenAuthentication
 from recipe import serializers
+from recipe import filters
+from recipe import images
+from recipe import renditions
+from recipe import sync
+from recipe import uploads
+from recipe.caching import ConditionalGetMixin
+from recipe import exports
+from recipe.renderers import FastJSONRenderer, NDJSONRenderer
+from recipe.routing import ReplicaReadMixin
+from recipe.rows import FastListMixin, ValuesReader
+from recipe.pagination import (
+    NameKeysetPagination,
+    RecipeKeysetPagination
+    )
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.utils.urls import replace_query_param
+from django.conf import settings
+from django.http import HttpResponseRedirect, StreamingHttpResponse
+from django.db.models import Prefetch
 from core.models import (
+    Change,
     Tag,
     Ingredients,
     Recipe
     )
 
 
+# Recipe columns rendered by the list and detail serializers
+RECIPE_FIELDS = (
+    'id',
+    'title',
+    'time_minute',
+    'price',
+    'link',
+    'image',
+    )
+
+
+# serializer field -> Recipe columns it reads, relations are prefetched
+FIELD_COLUMNS = {
+    'id': ('id',),
+    'title': ('title',),
+    'time_minute': ('time_minute',),
+    'price': ('price',),
+    'link': ('link',),
+    'image': ('image',),
+    'image_status': ('image_status',),
+    'renditions': ('image',),
+    }
+RELATIONS = {
+    'ingredients': Ingredients,
+    'tag': Tag
+    }
+
+
+def _param_list(params, name, available):
+    """Comma Separated Names Of A Query Param, Checked Against available"""
+    if name not in params:
+        return available
+    names = [
+        value.strip()
+        for value in params[name].split(',')
+        if value.strip()
+        ]
+    unknown = [value for value in names if value not in available]
+    if unknown:
+        raise ValidationError(
+            {name: [f'Unknown field "{value}".' for value in unknown]}
+            )
+    return tuple(dict.fromkeys(names))
+
+
+def with_list_load_plan(queryset):
+    """Recipes With The Columns And Related ids The List Serializes"""
+    # one query per relation for the whole page instead of one per row
+    # related ids in id order, as recipe.rows reads them
+    return queryset.only(*RECIPE_FIELDS).prefetch_related(
+        Prefetch(
+            'ingredients',
+            queryset=Ingredients.objects.only('id').order_by('id')
+            ),
+        Prefetch('tag', queryset=Tag.objects.only('id').order_by('id')),
+        )
+
+
 class BaseRecipeViewClass(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    FastListMixin,
     viewsets.GenericViewSet,
     mixins.CreateModelMixin,
     mixins.ListModelMixin
     ):
     """The Class Using To Avoid Duplication Of Code"""
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = NameKeysetPagination
 
     def get_queryset(self):
         """Object That Return Current Authenticated Users Only"""
         # filtering tag and ingredients based
-        assigned_only = bool(
-            int(self.request.query_params.get('assigned_only', 0)))
         queryset = self.queryset
-        if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
-        return queryset.filter(user=self.request.user).order_by('-name').distinct()
+        if filters.flag(self.request.query_params, 'assigned_only'):
+            queryset = filters.assigned_only(queryset)
+        return queryset.filter(
+            user=self.request.user
+            ).order_by('-name', 'id')
 
     def perform_create(self, serializer):
         """Create New Object"""
@@ -47,32 +132,114 @@ class IngredientsViewSet(BaseRecipeViewClass):
     serializer_class = serializers.IngredientsSerializer
 
 
-class RecipesViewSet(viewsets.ModelViewSet):
+class RecipesViewSet(
+        ReplicaReadMixin,
+        ConditionalGetMixin,
+        FastListMixin,
+        viewsets.ModelViewSet
+        ):
     """Recipes View Set To Manage Recipe In Data Base"""
     queryset = Recipe.objects.all()
     serializer_class = serializers.RecipeSerializers
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
-
-    def _params_to_ints(self, qs):
-        """Private Function that Convert list Of string ids to list of integer ids"""
-        return [int(str_id) for str_id in qs.split(',')]
+    pagination_class = RecipeKeysetPagination
 
     def get_queryset(self):
         """Retrieve The Recipes To Authenticated User"""
         # filter by tag, if tag is provided in query prams then it filter else its set None
-        tags = self.request.query_params.get('tag')
-        ingredients = self.request.query_params.get('ingredients')
+        tags = filters.id_list(self.request.query_params, 'tag')
+        ingredients = filters.id_list(self.request.query_params, 'ingredients')
+        match = self.request.query_params.get('match', filters.MATCH_ANY)
+        if match not in filters.MATCH_MODES:
+            raise ValidationError(
+                {'match': f'Must be one of {", ".join(filters.MATCH_MODES)}'}
+                )
         queryset = self.queryset
         if tags:
-            tag_ids = self._params_to_ints(tags)
-            # tag_id__id__in double underscore using for foreign key filter
-            queryset = queryset.filter(tag__id__in=tag_ids)
+            queryset = filters.recipes_with_related(
+                queryset,
+                'tag',
+                tags,
+                match
+                )
 
         if ingredients:
-            ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
-        return queryset.filter(user=self.request.user)
+            queryset = filters.recipes_with_related(
+                queryset,
+                'ingredients',
+                ingredients,
+                match
+                )
+        queryset = filters.in_ranges(queryset, self.request.query_params)
+        queryset = queryset.filter(user=self.request.user)
+        search = self.request.query_params.get('search')
+        if search:
+            queryset = filters.search(queryset, search)
+        queryset = queryset.order_by(*self.get_pagination_ordering())
+        return self._apply_load_plan(queryset)
+
+    def get_pagination_ordering(self):
+        """Requested Ordering, Else Best Matches Or Newest First"""
+        if self.request.query_params.get('search'):
+            default = ('-rank', '-id')
+        else:
+            default = RecipeKeysetPagination.ordering
+        return filters.ordering(self.request.query_params, default)
+
+    def _apply_load_plan(self, queryset):
+        """Load Only The Columns And Relations The Action Serializes"""
+        if self.action in ('list', 'retrieve'):
+            fields, expand = self.get_sparse_fields()
+            # the pk and the sort keys read by the paginator
+            columns = {'id'} | {
+                field.lstrip('-')
+                for field in self.get_pagination_ordering()
+                if field.lstrip('-') != 'rank'
+                }
+            for field in fields:
+                columns.update(FIELD_COLUMNS.get(field, ()))
+            queryset = queryset.only(*columns)
+            for relation, model in RELATIONS.items():
+                if relation not in fields:
+                    continue
+                loaded = (
+                    ('id', 'name', 'recipe_count') if relation in expand
+                    else ('id',)
+                    )
+                queryset = queryset.prefetch_related(Prefetch(
+                    relation,
+                    queryset=model.objects.only(*loaded).order_by('id')
+                    ))
+            return queryset
+        if self.action in ('upload_image', 'image_rendition'):
+            return queryset.only('id', 'user', 'image', 'image_status')
+        return queryset
+
+    def get_sparse_fields(self):
+        """Requested (fields, expand) Of A Read Request"""
+        if hasattr(self, '_sparse_fields'):
+            return self._sparse_fields
+        params = self.request.query_params
+        available = self.get_serializer_class().Meta.fields
+        fields = _param_list(params, 'fields', available)
+        # detail nests both relations unless told otherwise
+        if 'expand' in params:
+            expand = _param_list(params, 'expand', tuple(RELATIONS))
+        elif self.action == 'retrieve':
+            expand = tuple(RELATIONS)
+        else:
+            expand = ()
+        self._sparse_fields = (fields, expand)
+        return self._sparse_fields
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in ('list', 'retrieve', 'export'):
+            kwargs['fields'], kwargs['expand'] = self.get_sparse_fields()
+        return super().get_serializer(*args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
 
     def get_serializer_class(self):
         """For Details View Choose Serializer Class Based On User Request"""
@@ -82,22 +249,189 @@ class RecipesViewSet(viewsets.ModelViewSet):
         # for image field get request
         elif self.action == 'upload_image':
             return serializers.RecipeImageSerializer
+        elif self.action == 'bulk':
+            return serializers.RecipeBulkSerializer
         return self.serializer_class
 
     def perform_create(self, serializer):
         """Create Recipe For Authenticated User"""
         serializer.save(user=self.request.user)
 
+    @action(methods=['POST'], detail=False, url_path='bulk')
+    def bulk(self, request):
+        """Create Or Replace A List Of Recipes In One Transaction"""
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        recipes = serializer.save(user=self.request.user)
+        # re-read with the list load plan, a fixed three queries; the list
+        # filters of the query string do not apply to written rows
+        saved = with_list_load_plan(
+            Recipe.objects.filter(user=request.user)
+            ).in_bulk([recipe.id for recipe in recipes])
+        data = serializers.RecipeSerializers(
+            [saved[recipe.id] for recipe in recipes],
+            many=True,
+            context=self.get_serializer_context()
+            ).data
+        if any('id' in item for item in serializer.validated_data):
+            return Response(data, status.HTTP_200_OK)
+        return Response(data, status.HTTP_201_CREATED)
+
+    @action(
+        methods=['GET'],
+        detail=False,
+        url_path='export',
+        renderer_classes=(FastJSONRenderer, NDJSONRenderer)
+        )
+    def export(self, request):
+        """Stream Every Matching Recipe As A JSON Array Or NDJSON Lines"""
+        # built up front so bad params fail before the stream starts
+        reader = ValuesReader(self.get_serializer())
+        rows = self.get_queryset().prefetch_related(None).values(
+            *reader.columns
+            )
+        size = settings.RECIPE_EXPORT_CHUNK_SIZE
+        renderer = request.accepted_renderer
+        if renderer.format == NDJSONRenderer.format:
+            stream = exports.stream_ndjson(reader, rows, size)
+        else:
+            stream = exports.stream_json(reader, rows, size)
+        response = StreamingHttpResponse(
+            stream,
+            content_type=renderer.media_type
+            )
+        response['Content-Disposition'] = \
+            f'attachment; filename="recipes.{renderer.format}"'
+        return response
+
     @action(methods=['POST'], detail=True, url_path='upload-image')
     # adding custom action for image upload
     def upload_image(self, request, pk=None):
         """Upload Image To Recipe Model"""
         recipe = self.get_object()
+        uploads.check_content_length(request)
+        # must be set before request.data parses the body
+        request._request.upload_handlers = [
+            uploads.RecipeImageUploadHandler(request._request)
+            ]
         serializer = self.get_serializer(
             recipe,
             data=request.data
             )
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status.HTTP_200_OK)
-        return Response(serializer.eror, status.HTTP_400_BAD_REQUEST)
+        if not serializer.is_valid():
+            uploads.discard_staged(request.FILES)
+            raise ValidationError(serializer.errors)
+        # decode and re-encode off the request worker
+        path = images.stage_upload(serializer.validated_data['image'])
+        images.enqueue(recipe, path)
+        serializer = self.get_serializer(recipe)
+        if recipe.image_status == Recipe.IMAGE_PENDING:
+            return Response(serializer.data, status.HTTP_202_ACCEPTED)
+        return Response(serializer.data, status.HTTP_200_OK)
+
+    @action(
+        methods=['GET'],
+        detail=True,
+        url_path=r'image/(?P<rendition>[\w-]+)'
+        )
+    def image_rendition(self, request, pk=None, rendition=None):
+        """Redirect To A Resized Copy Of The Image, Creating It On Demand"""
+        recipe = self.get_object()
+        if not recipe.image or \
+                rendition not in settings.RECIPE_IMAGE_RENDITIONS:
+            raise NotFound()
+        name = renditions.ensure(recipe.image.name, rendition)
+        return HttpResponseRedirect(recipe.image.storage.url(name))
+
+
+class SyncView(APIView):
+    """Recipes, Tags And Ingredients Changed Or Deleted Since A Token
+
+    Without since the whole collection is sent, a page at a time: follow
+    next until it is null. Either way the response carries the token to
+    ask for the next changes with; a token older than the pruned change
+    log is answered 410 and the client starts a full copy again.
+    """
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    # change kind, response key, rows and serializer
+    sections = (
+        (
+            Change.RECIPE,
+            'recipes',
+            with_list_load_plan(Recipe.objects.all()),
+            serializers.RecipeSerializers
+            ),
+        (
+            Change.TAG,
+            'tags',
+            Tag.objects.all(),
+            serializers.TagSerializer
+            ),
+        (
+            Change.INGREDIENTS,
+            'ingredients',
+            Ingredients.objects.all(),
+            serializers.IngredientsSerializer
+            ),
+        )
+
+    def get(self, request):
+        """Delta Since The since Token, Or A Page Of The Full Copy"""
+        user_id = request.user.id
+        since = request.query_params.get('since')
+        querysets = [
+            queryset.filter(user_id=user_id).order_by('id')
+            for _, _, queryset, _ in self.sections
+            ]
+        changes = page = None
+        next_url = None
+        if since:
+            changes = sync.ChangeSet(user_id, sync.decode_token(since))
+            position, more = changes.position, changes.more
+        else:
+            cursor = request.query_params.get('cursor')
+            if cursor:
+                position, section, after = sync.decode_cursor(cursor)
+            else:
+                # taken before reading, later writes come with the next
+                # delta; every page of the copy carries the same token
+                position = sync.settled(user_id, 0, sync.head(user_id))
+                section, after = 0, 0
+            page = sync.FullCopy(querysets, section, after)
+            more = False
+            if page.next is not None:
+                next_url = replace_query_param(
+                    request.build_absolute_uri(),
+                    'cursor',
+                    sync.encode_cursor(position, *page.next)
+                    )
+        data = OrderedDict((
+            ('token', sync.encode_token(position)),
+            ('full', changes is None),
+            ('more', more),
+            ('next', next_url),
+            ))
+        for index, (kind, key, _, serializer_class) in enumerate(
+                self.sections):
+            queryset = querysets[index]
+            deleted = []
+            if changes is not None:
+                ids = changes.changed[kind]
+                rows = list(queryset.filter(id__in=ids)) if ids else []
+                found = {row.id for row in rows}
+                # changed and then deleted past the end of this batch
+                deleted = changes.deleted[kind] + [
+                    pk for pk in ids if pk not in found
+                    ]
+            else:
+                rows = page.rows[index]
+            data[key] = OrderedDict((
+                ('changed', serializer_class(
+                    rows,
+                    many=True,
+                    context={'request': request}
+                    ).data),
+                ('deleted', deleted),
+                ))
+        return Response(data)
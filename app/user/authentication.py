@@ -0,0 +1,165 @@
+import copy
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+class TokenCache:
+    """Bounded Per Worker LRU Of Authenticated (user, token) Pairs
+
+    Entries expire after TOKEN_AUTH_CACHE_TTL seconds. Signals in
+    user.signals evict entries when a token or user changes, which only
+    reaches the LRU of the worker handling the change: without a shared
+    layer other workers keep a revoked token for up to the TTL.
+
+    When TOKEN_AUTH_CACHE_ALIAS names a Django cache, it is the source of
+    truth instead. Every local hit is checked against the stamp of the
+    shared entry, so an eviction anywhere is seen on the next request.
+    The shared entry holds the user's columns but the password hash,
+    which is left deferred, and never the token key itself.
+    """
+
+    key_prefix = 'auth-token'
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_size(self):
+        return settings.TOKEN_AUTH_CACHE_SIZE
+
+    @property
+    def ttl(self):
+        return settings.TOKEN_AUTH_CACHE_TTL
+
+    @property
+    def shared(self):
+        """Django Cache Used As Second Layer, If Any"""
+        alias = settings.TOKEN_AUTH_CACHE_ALIAS
+        return caches[alias] if alias else None
+
+    def _shared_key(self, key):
+        # never put raw credentials into an external cache
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return f'{self.key_prefix}:{digest}'
+
+    def get(self, key):
+        """Return A Private Copy Of The Cached Pair Or None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            elif entry is not None:
+                self._entries.move_to_end(key)
+        shared = self.shared
+        if shared is not None:
+            stored = shared.get(self._shared_key(key))
+            if stored is None:
+                # evicted or expired on the shared layer, maybe elsewhere
+                self._discard(key)
+                return None
+            if entry is None or entry[1] != stored['stamp']:
+                credentials = self._load(key, stored)
+                self._store(key, stored['stamp'], credentials, now)
+                return copy.deepcopy(credentials)
+        if entry is None:
+            return None
+        # callers may mutate request.user, never share it
+        return copy.deepcopy(entry[2])
+
+    def set(self, key, credentials):
+        """Cache A Freshly Authenticated Pair"""
+        stamp = uuid.uuid4().hex
+        self._store(key, stamp, credentials, time.monotonic())
+        shared = self.shared
+        if shared is not None:
+            shared.set(
+                self._shared_key(key),
+                self._dump(stamp, credentials),
+                self.ttl
+                )
+
+    def _store(self, key, stamp, credentials, now):
+        with self._lock:
+            self._entries[key] = (now + self.ttl, stamp, credentials)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    @staticmethod
+    def _dump(stamp, credentials):
+        """Shared Entry Of A Pair, Without Password Hash Or Token Key"""
+        user, token = credentials
+        names = [
+            field.attname for field in user._meta.concrete_fields
+            if field.attname != 'password'
+            ]
+        return {
+            'stamp': stamp,
+            'fields': names,
+            'values': [getattr(user, name) for name in names],
+            'created': token.created,
+            }
+
+    @staticmethod
+    def _load(key, stored):
+        """Rebuild The Pair Of A Shared Entry"""
+        # password stays deferred: loaded on access, skipped by save()
+        user = get_user_model().from_db(
+            DEFAULT_DB_ALIAS,
+            stored['fields'],
+            stored['values']
+            )
+        token = Token.from_db(
+            DEFAULT_DB_ALIAS,
+            ['key', 'user_id', 'created'],
+            [key, user.pk, stored['created']]
+            )
+        token.user = user
+        return user, token
+
+    def evict(self, *keys):
+        """Drop Tokens From Both Layers"""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+        shared = self.shared
+        if shared is not None and keys:
+            shared.delete_many([self._shared_key(key) for key in keys])
+
+    def clear(self):
+        """Drop Every Local Entry"""
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token Authentication That Skips The Database On Cache Hits"""
+
+    def authenticate_credentials(self, key):
+        """Serve From The Token Cache, Fall Back To The Token Query"""
+        credentials = token_cache.get(key)
+        if credentials is None:
+            credentials = super().authenticate_credentials(key)
+            token_cache.set(key, credentials)
+            credentials = copy.deepcopy(credentials)
+        return credentials
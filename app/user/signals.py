@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from user.authentication import token_cache
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    """Deleted Tokens Must Stop Authenticating Immediately"""
+    token_cache.evict(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def evict_user_tokens(sender, instance, **kwargs):
+    """Drop Cached Copies Of A User That Changed
+
+    Covers deactivation and password changes, and keeps request.user from
+    going stale after a profile update.
+    """
+    keys = Token.objects.filter(user=instance).values_list('key', flat=True)
+    token_cache.evict(*keys)
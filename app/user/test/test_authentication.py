@@ -0,0 +1,126 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from user.authentication import token_cache
+
+ME_URL = reverse('user:me')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test Token Authentication Served From The Token Cache"""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().object.create_user(
+            email='cache@gmail.com',
+            password='cache_pass@123',
+            name='Cache User'
+            )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def tearDown(self):
+        token_cache.clear()
+
+    def test_cached_token_costs_no_queries(self):
+        """Second Request With The Same Token Does Not Query The Database"""
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_deleted_token_rejected(self):
+        """Deleting A Token Evicts It From The Cache"""
+        self.client.get(ME_URL)
+        self.token.delete()
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Deactivating A User Evicts Their Tokens"""
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_evicts_token(self):
+        """Changing The Password Forces A Fresh Token Lookup"""
+        self.client.get(ME_URL)
+        self.user.set_password('new_pass@123')
+        self.user.save()
+        with self.assertNumQueries(1):
+            self.client.get(ME_URL)
+
+    def test_profile_update_not_stale(self):
+        """Profile Changes Are Visible On The Next Request"""
+        self.client.patch(ME_URL, {'name': 'Renamed'})
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.data['name'], 'Renamed')
+
+    @override_settings(TOKEN_AUTH_CACHE_SIZE=1)
+    def test_cache_is_bounded(self):
+        """Least Recently Used Token Is Dropped Past The Size Limit"""
+        self.client.get(ME_URL)
+        other = get_user_model().object.create_user(
+            email='other@gmail.com',
+            password='other_pass@123'
+            )
+        other_client = APIClient()
+        other_client.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=other)}'
+            )
+        other_client.get(ME_URL)
+        with self.assertNumQueries(1):
+            self.client.get(ME_URL)
+
+    @override_settings(TOKEN_AUTH_CACHE_TTL=0)
+    def test_expired_entry_refetched(self):
+        """Entries Older Than The TTL Are Looked Up Again"""
+        self.client.get(ME_URL)
+        with self.assertNumQueries(1):
+            self.client.get(ME_URL)
+
+    @override_settings(TOKEN_AUTH_CACHE_ALIAS='default')
+    def test_shared_cache_layer(self):
+        """A Worker With An Empty LRU Reads The Shared Django Cache"""
+        self.client.get(ME_URL)
+        token_cache.clear()
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.token.delete()
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(TOKEN_AUTH_CACHE_ALIAS='default')
+    def test_shared_cache_revocation_reaches_other_workers(self):
+        """A Local Hit Is Not Trusted Once The Shared Entry Is Gone"""
+        self.client.get(ME_URL)
+        # the token is deleted by another worker: only the shared layer
+        # hears of it, this worker's LRU still holds the pair
+        caches['default'].delete(token_cache._shared_key(self.token.key))
+        Token.objects.filter(key=self.token.key).delete()
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(TOKEN_AUTH_CACHE_ALIAS='default')
+    def test_shared_cache_holds_no_secrets(self):
+        """Neither The Password Hash Nor The Token Key Is Shared"""
+        self.client.get(ME_URL)
+        stored = caches['default'].get(token_cache._shared_key(self.token.key))
+        self.assertNotIn(self.user.password, repr(stored))
+        self.assertNotIn(self.token.key, repr(stored))
+        token_cache.clear()
+        self.client.patch(ME_URL, {'name': 'Renamed'})
+        self.user.refresh_from_db()
+        # the deferred hash was not written back over the real one
+        self.assertTrue(self.user.check_password('cache_pass@123'))
+        self.assertEqual(self.user.name, 'Renamed')
@@ -2,12 +2,12 @@ from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 from rest_framework import (
     generics,
-    authentication,
     permissions)
 from user.serializer import (
     UserSerializer,
     AuthTokenSerializer,
     )
+from user.authentication import CachedTokenAuthentication
 
 
 # Create your views here.
@@ -27,7 +27,7 @@ class UpdateUserProfile(generics.RetrieveUpdateAPIView):
     """Manage Authenticate User Profile"""
     serializer_class = UserSerializer
     # "()" is needed else get Exception **
-    authentication_classes = (authentication.TokenAuthentication, )
+    authentication_classes = (CachedTokenAuthentication, )
     permission_classes = (permissions.IsAuthenticated, )
 
     def get_object(self):